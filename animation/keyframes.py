@@ -0,0 +1,183 @@
+# File: keyframes.py
+# Ключевые кадры: дорожки значений (float, vec3, кватернион) с интерполяцией
+#   linear - отрезки прямых (для кватерниона - нормированная линейная, nlerp);
+#   cubic  - кубический Эрмит, касательные по соседним ключам (Catmull-Rom
+#            для неравномерного шага), только float / vec3;
+#   slerp  - сферическая интерполяция кватернионов.
+# Дорожки одного типа и интерполяции собираются в TrackBatch и считаются за
+# один проход NumPy: N дорожек, ключи дополнены до общего K. Вне диапазона
+# ключей значение держится на крайнем ключе.
+#
+# Кватернион - (x, y, z, w). Время - в любых единицах, лишь бы одних с ключами
+# (lab1 - миллисекунды). Источник времени - любой вызываемый объект без
+# аргументов; FixedStepClock даёт повторяемое время для замеров.
+import numpy as np
+
+KINDS = {"float": 1, "vec3": 3, "quat": 4}
+INTERPOLATIONS = {
+    "float": ("linear", "cubic"),
+    "vec3": ("linear", "cubic"),
+    "quat": ("linear", "slerp"),
+}
+
+
+class Track:
+    """Одна дорожка: times (K,) по возрастанию и values (K,) / (K, D)."""
+    def __init__(self, times, values, kind="float", interpolation="linear"):
+        if kind not in KINDS:
+            raise ValueError(f"unknown track kind '{kind}'")
+        if interpolation not in INTERPOLATIONS[kind]:
+            raise ValueError(f"interpolation '{interpolation}' is not supported for {kind} tracks")
+        self.times = np.asarray(times, dtype=np.float64).reshape(-1)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.times), KINDS[kind])
+        if not len(self.times) or np.any(np.diff(self.times) <= 0.0):
+            raise ValueError("keyframe times must be non-empty and strictly increasing")
+        if kind == "quat":
+            self.values = self.values / np.linalg.norm(self.values, axis=1, keepdims=True)
+        self.kind = kind
+        self.interpolation = interpolation
+
+    @property
+    def duration(self):
+        return self.times[-1]
+
+    def sample(self, t):
+        return TrackBatch([self]).sample(t)[0]
+
+
+class TrackBatch:
+    """N дорожек одного типа и интерполяции, ключи дополнены до K:
+    время - шагом 1 после последнего ключа, значение - последним ключом."""
+    def __init__(self, tracks):
+        if len({(tr.kind, tr.interpolation) for tr in tracks}) != 1:
+            raise ValueError("a batch needs tracks of one kind and interpolation")
+        self.kind, self.interpolation = tracks[0].kind, tracks[0].interpolation
+        self.counts = np.array([len(tr.times) for tr in tracks])
+        n, k, d = len(tracks), max(2, self.counts.max()), KINDS[self.kind]
+        self.times = np.empty((n, k))
+        self.values = np.empty((n, k, d))
+        for row, tr in enumerate(tracks):
+            c = len(tr.times)
+            self.times[row, :c] = tr.times
+            self.times[row, c:] = tr.times[-1] + np.arange(1, k - c + 1)
+            self.values[row, :c] = tr.values
+            self.values[row, c:] = tr.values[-1]
+        self.rows = np.arange(n)
+        self.first = self.times[:, 0]
+        self.last = self.times[self.rows, self.counts - 1]
+        if self.interpolation == "cubic":
+            self.tangents = self._tangents()
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _tangents(self):
+        """Касательные (N, K, D): разность соседей по времени, на концах - односторонняя."""
+        k = np.arange(self.times.shape[1])[None, :]
+        prev = np.clip(k - 1, 0, None)
+        succ = np.minimum(k + 1, self.counts[:, None] - 1)
+        dt = np.take_along_axis(self.times, succ, 1) - np.take_along_axis(self.times, prev, 1)
+        dv = (np.take_along_axis(self.values, succ[..., None], 1) -
+              np.take_along_axis(self.values, prev[..., None], 1))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(dt[..., None] > 0.0, dv / dt[..., None], 0.0)
+
+    def sample(self, t):
+        """Значения (N, D) в моменты t - скаляр или массив (N,)."""
+        t = np.clip(np.broadcast_to(np.asarray(t, dtype=np.float64), self.first.shape), self.first, self.last)
+        i = np.clip((self.times <= t[:, None]).sum(axis=1) - 1, 0, np.maximum(self.counts - 2, 0))
+        t0, t1 = self.times[self.rows, i], self.times[self.rows, i + 1]
+        v0, v1 = self.values[self.rows, i], self.values[self.rows, i + 1]
+        u = ((t - t0) / (t1 - t0))[:, None]
+        if self.interpolation == "cubic":
+            dt = (t1 - t0)[:, None]
+            m0, m1 = self.tangents[self.rows, i] * dt, self.tangents[self.rows, i + 1] * dt
+            u2, u3 = u * u, u * u * u
+            return ((2 * u3 - 3 * u2 + 1) * v0 + (u3 - 2 * u2 + u) * m0 +
+                    (-2 * u3 + 3 * u2) * v1 + (u3 - u2) * m1)
+        if self.kind == "quat":
+            return slerp(v0, v1, u[:, 0]) if self.interpolation == "slerp" else nlerp(v0, v1, u[:, 0])
+        return v0 + (v1 - v0) * u
+
+
+class Timeline:
+    """Именованные дорожки; sample(t) считает каждую группу одним TrackBatch."""
+    def __init__(self, tracks):
+        self.tracks = dict(tracks)
+        groups = {}
+        for name, tr in self.tracks.items():
+            groups.setdefault((tr.kind, tr.interpolation), []).append(name)
+        self.groups = [(names, TrackBatch([self.tracks[n] for n in names])) for names in groups.values()]
+
+    @property
+    def duration(self):
+        return max((tr.duration for tr in self.tracks.values()), default=0.0)
+
+    def sample(self, t):
+        """{имя: значение}: float для float-дорожек, массив (D,) для остальных."""
+        channels = {}
+        for names, batch in self.groups:
+            values = batch.sample(t)
+            for name, value in zip(names, values):
+                channels[name] = float(value[0]) if batch.kind == "float" else value
+        return channels
+
+
+# --- Кватернионы (x, y, z, w) ---
+def quat_axis_angle(axis, degrees):
+    """Поворот на degrees вокруг axis; axis (..., 3), degrees (...)."""
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = axis / np.linalg.norm(axis, axis=-1, keepdims=True)
+    half = np.radians(np.asarray(degrees, dtype=np.float64))[..., None] / 2.0
+    shape = np.broadcast_shapes(axis.shape[:-1], half.shape[:-1])
+    return np.concatenate([np.broadcast_to(axis * np.sin(half), shape + (3,)),
+                           np.broadcast_to(np.cos(half), shape + (1,))], axis=-1)
+
+
+def quat_to_matrix(q):
+    """Матрицы поворота (..., 3, 3) для единичных кватернионов (..., 4)."""
+    x, y, z, w = np.moveaxis(np.asarray(q, dtype=np.float64), -1, 0)
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], -1),
+        np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], -1),
+        np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], -1),
+    ], -2)
+
+
+def nlerp(q0, q1, u):
+    """Линейная интерполяция по короткой дуге с нормировкой."""
+    q1 = np.where((np.einsum("...i,...i->...", q0, q1) < 0.0)[..., None], -q1, q1)
+    q = q0 + (q1 - q0) * np.asarray(u)[..., None]
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def slerp(q0, q1, u):
+    """Сферическая интерполяция q0 -> q1 по короткой дуге, u (...) в [0, 1];
+    почти совпадающие кватернионы - через nlerp (sin угла около нуля)."""
+    dot = np.einsum("...i,...i->...", q0, q1)
+    q1 = np.where((dot < 0.0)[..., None], -q1, q1)
+    dot = np.minimum(np.abs(dot), 1.0)
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    near = sin_theta < 1e-6
+    safe = np.where(near, 1.0, sin_theta)
+    u = np.asarray(u, dtype=np.float64)
+    w0 = np.where(near, 1.0 - u, np.sin((1.0 - u) * theta) / safe)
+    w1 = np.where(near, u, np.sin(u * theta) / safe)
+    q = w0[..., None] * q0 + w1[..., None] * q1
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+# --- Источники времени ---
+class FixedStepClock:
+    """Повторяемое время для замеров: не зависит от часов, идёт только по tick()."""
+    def __init__(self, step_ms=16.0, start_ms=0.0):
+        self.step_ms = step_ms
+        self.ms = start_ms
+
+    def tick(self):
+        self.ms += self.step_ms
+        return self.ms
+
+    def __call__(self):
+        return self.ms
@@ -0,0 +1,140 @@
+# File: __main__.py
+# Стенд производительности лабораторных.
+#   python -m bench run  [--scenes ...] [--frames N] [--out results.json]
+#   python -m bench compare base.json new.json [--threshold 0.10]
+#   python -m bench list
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from bench.scenes import ROOT, DEFAULT_PARTICLE_COUNTS, build_registry
+
+# Метрика -> True, если больше = хуже
+METRICS = {
+    "fps": False,
+    "frame_ms_p50": True,
+    "frame_ms_p95": True,
+    "frame_ms_p99": True,
+    "peak_rss_kb": True,
+    "py_alloc_bytes_per_frame": True,
+}
+
+
+def run_worker(scene, args):
+    cmd = [sys.executable, "-m", "bench.worker", scene,
+           "--frames", str(args.frames), "--warmup", str(args.warmup),
+           "--seed", str(args.seed), "--alloc-frames", str(args.alloc_frames)]
+    if args.replay:
+        cmd += ["--replay", os.path.abspath(args.replay)]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("BENCH_RESULT "):
+            return json.loads(line[len("BENCH_RESULT "):])
+    sys.stderr.write(proc.stderr)
+    raise RuntimeError(f"scene '{scene}' failed (exit code {proc.returncode})")
+
+
+def cmd_run(args):
+    counts = [int(c) for c in args.particles.split(",")] if args.particles else DEFAULT_PARTICLE_COUNTS
+    scenes = args.scenes or list(build_registry(counts))
+    results = {}
+    for name in scenes:
+        res = run_worker(name, args)
+        results[name] = res
+        print(f"{name:<22} {res['fps']:8.1f} fps  p50 {res['frame_ms_p50']:7.2f} ms  "
+              f"p95 {res['frame_ms_p95']:7.2f} ms  p99 {res['frame_ms_p99']:7.2f} ms  "
+              f"rss {res['peak_rss_kb'] / 1024:6.1f} MB  alloc {res['py_alloc_bytes_per_frame'] / 1024:8.1f} KB/frame")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "frames": args.frames,
+            "seed": args.seed,
+        },
+        "scenes": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[INFO] results saved to {args.out}")
+    return 0
+
+
+def compare_reports(base, new, threshold):
+    """Возвращает список строк сравнения и список регрессий."""
+    rows, regressions = [], []
+    for name, new_res in new["scenes"].items():
+        base_res = base["scenes"].get(name)
+        if base_res is None:
+            rows.append(f"{name:<22} (нет в базовом прогоне)")
+            continue
+        for metric, higher_is_worse in METRICS.items():
+            old, cur = base_res.get(metric), new_res.get(metric)
+            if not old or cur is None:
+                continue
+            change = (cur - old) / old
+            worse = change > threshold if higher_is_worse else change < -threshold
+            mark = "REGRESSION" if worse else ""
+            rows.append(f"{name:<22} {metric:<26} {old:12.2f} -> {cur:12.2f}  {change * 100:+7.1f}%  {mark}")
+            if worse:
+                regressions.append((name, metric, change))
+        if base_res.get("frame_hash") != new_res.get("frame_hash"):
+            rows.append(f"{name:<22} frame_hash differs (изображение изменилось)")
+    return rows, regressions
+
+
+def cmd_compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    rows, regressions = compare_reports(base, new, args.threshold)
+    print("\n".join(rows))
+    if regressions:
+        print(f"[ERROR] {len(regressions)} regression(s) beyond {args.threshold * 100:.0f}%")
+        return 1
+    print("[INFO] no regressions")
+    return 0
+
+
+def cmd_list(args):
+    for name in build_registry():
+        print(name)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench", description="benchmarks for the lab scenes")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="run scenes and save JSON")
+    p_run.add_argument("--scenes", nargs="*", help="scene names (default: all)")
+    p_run.add_argument("--frames", type=int, default=120)
+    p_run.add_argument("--warmup", type=int, default=10)
+    p_run.add_argument("--seed", type=int, default=1234)
+    p_run.add_argument("--alloc-frames", type=int, default=20)
+    p_run.add_argument("--particles", help="particle counts for kursach, e.g. 500,2000,8000")
+    p_run.add_argument("--replay", help="drive the scenes from an input log instead of the fixed path")
+    p_run.add_argument("--out", default=os.path.join(ROOT, "bench_results.json"))
+    p_run.set_defaults(func=cmd_run)
+
+    p_cmp = sub.add_parser("compare", help="compare two result files")
+    p_cmp.add_argument("base")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("--threshold", type=float, default=0.10, help="relative change treated as regression")
+    p_cmp.set_defaults(func=cmd_compare)
+
+    p_list = sub.add_parser("list", help="list scene names")
+    p_list.set_defaults(func=cmd_list)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# File: alloc.py
+# Бюджет Python-аллокаций кадра в установившемся режиме. Сцена прогревается
+# (кэши программ, расположений uniform, LOD), затем bench.worker меряет
+# tracemalloc пиковый прирост памяти за кадр на --alloc-frames кадрах.
+# Больше бюджета - код возврата 1, как у bench compare / bench.golden.
+#
+#   python -m bench.alloc [--scenes lab3_new] [--budget-kb N]
+import argparse
+import sys
+
+from bench.__main__ import run_worker
+
+# Сцена -> бюджет, КБ за кадр. lab3_new: uniform кадра - из постоянных буферов,
+# остаток - временные массивы NumPy отсечения и LOD (около 8 КБ)
+ALLOC_BUDGETS_KB = {
+    "lab3_new": 10.0,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.alloc", description="per-frame Python allocation budget")
+    parser.add_argument("--scenes", nargs="*", help="scene names (default: scenes with a budget)")
+    parser.add_argument("--budget-kb", type=float, help="budget for every scene instead of the table")
+    parser.add_argument("--frames", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--alloc-frames", type=int, default=20)
+    args = parser.parse_args(argv)
+    args.replay = None
+
+    failures = []
+    for scene in args.scenes or list(ALLOC_BUDGETS_KB):
+        budget = args.budget_kb if args.budget_kb is not None else ALLOC_BUDGETS_KB.get(scene)
+        if budget is None:
+            print(f"{scene:<22} (нет бюджета, задайте --budget-kb)")
+            continue
+        res = run_worker(scene, args)
+        kb = res["py_alloc_bytes_per_frame"] / 1024
+        over = kb > budget
+        print(f"{scene:<22} alloc {kb:8.1f} KB/frame  budget {budget:6.1f} KB  {'OVER' if over else ''}")
+        if over:
+            failures.append(scene)
+    if failures:
+        print(f"[ERROR] {len(failures)} scene(s) over the allocation budget: " + ", ".join(failures))
+        return 1
+    print("[INFO] allocations within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
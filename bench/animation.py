@@ -0,0 +1,62 @@
+# File: animation.py
+# Замер дорожек ключевых кадров (animation/keyframes.py): N анимированных
+# объектов - позиция (vec3, cubic) и поворот (quat, slerp) - за кадр одним
+# проходом TrackBatch против цикла по дорожкам. Время - FixedStepClock.
+#
+#   python -m bench.animation [--counts 1000,10000,100000] [--keys 8] [--out animation.json]
+import argparse
+import json
+
+import numpy as np
+
+from bench.meshes import timed
+from animation.keyframes import FixedStepClock, Track, TrackBatch, quat_axis_angle
+
+LOOP_LIMIT = 2000  # больше дорожек циклом не считается - слишком долго
+
+
+def make_tracks(count, keys, rng):
+    positions, rotations = [], []
+    for _ in range(count):
+        times = np.cumsum(rng.uniform(100.0, 500.0, keys))
+        positions.append(Track(times, rng.uniform(-500.0, 500.0, (keys, 3)), "vec3", "cubic"))
+        q = quat_axis_angle(rng.normal(size=(keys, 3)), rng.uniform(-180.0, 180.0, keys))
+        rotations.append(Track(times, q, "quat", "slerp"))
+    return positions, rotations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="keyframe animation benchmark")
+    parser.add_argument("--counts", default="1000,10000,100000")
+    parser.add_argument("--keys", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--out", help="save results as JSON")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for count in map(int, args.counts.split(",")):
+        positions, rotations = make_tracks(count, args.keys, rng)
+        (pos_batch, rot_batch), build_ms = timed(lambda: (TrackBatch(positions), TrackBatch(rotations)))
+        clock = FixedStepClock(step_ms=16.0)
+        frame_ms = []
+        for _ in range(args.frames):
+            t = clock.tick()
+            _, ms = timed(lambda: (pos_batch.sample(t), rot_batch.sample(t)))
+            frame_ms.append(ms)
+        r = results[count] = {"build_ms": build_ms, "batch_ms_p50": float(np.median(frame_ms))}
+        line = f"{count:7d} objects  build {build_ms:8.1f} ms  batch {r['batch_ms_p50']:8.2f} ms/frame"
+        if count <= LOOP_LIMIT:
+            _, loop_ms = timed(lambda: [(p.sample(clock()), q.sample(clock())) for p, q in zip(positions, rotations)])
+            r["loop_ms"] = loop_ms
+            line += f"  loop {loop_ms:8.1f} ms  x{loop_ms / r['batch_ms_p50']:.0f}"
+        print(line)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"keys": args.keys, "objects": results}, f, indent=2)
+        print(f"[INFO] results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
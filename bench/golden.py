@@ -0,0 +1,194 @@
+# File: golden.py
+# Регрессии изображения и времени кадра за один прогон.
+# Каждая сцена рендерится в отдельном процессе (bench.worker) фиксированное
+# число кадров с фиксированным seed; последний кадр сравнивается с эталоном
+# bench/golden/<сцена>.png по RMSE каналов и SSIM яркости, рядом печатается
+# p50 времени кадра против записанного в manifest.json. Время шумное: сцена
+# прогоняется --runs раз, печатается медиана p50, а SLOWER ставится, только
+# если замедление повторилось во всех прогонах.
+#
+#   python -m bench.golden record [--scenes ...]     # записать эталоны
+#   python -m bench.golden check  [--scenes ...]     # сравнить с эталонами
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from bench.scenes import ROOT
+
+GOLDEN_DIR = os.path.join(ROOT, "bench", "golden")
+
+# Кадры, покрывающие все лабы: lab2 с текстурой, bump-mapping и без текстуры,
+# lab3 - плоские тени, lab3_new - карта теней, kursach - частицы
+GOLDEN_SCENES = (
+    "lab1.scene1", "lab1.scene2", "lab1.scene3", "lab1.scene4",
+    "lab2", "lab2.bump", "lab2.notexture",
+    "lab3",
+    "lab3_new",
+    "kursach.p2000",
+)
+
+# Допуски по умолчанию: RMSE в единицах 0..255, SSIM - доля от 1
+RMSE_LIMIT = 2.0
+SSIM_LIMIT = 0.98
+TIME_THRESHOLD = 0.25
+TIME_FLOOR_MS = 3.0     # меньшие абсолютные изменения p50 - шум таймера
+TIME_RUNS = 3
+
+
+def box_mean(img, size):
+    """Среднее по окнам size x size (только полные окна)."""
+    c = np.pad(img, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    s = c[size:, size:] - c[:-size, size:] - c[size:, :-size] + c[:-size, :-size]
+    return s / float(size * size)
+
+
+def ssim(a, b, window=7):
+    """SSIM по яркости (Wang et al. 2004) с равномерным окном window x window."""
+    weights = np.array([0.299, 0.587, 0.114])
+    x = a.astype(np.float64) @ weights
+    y = b.astype(np.float64) @ weights
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mx, my = box_mean(x, window), box_mean(y, window)
+    vx = box_mean(x * x, window) - mx * mx
+    vy = box_mean(y * y, window) - my * my
+    cov = box_mean(x * y, window) - mx * my
+    s = ((2 * mx * my + c1) * (2 * cov + c2)) / ((mx * mx + my * my + c1) * (vx + vy + c2))
+    return float(s.mean())
+
+
+def image_diff(image, golden):
+    """RMSE по каналам (максимум из трёх), SSIM и доля пикселей с отличием > 8."""
+    if image.shape != golden.shape:
+        return {"rmse": float("inf"), "ssim": 0.0, "changed": 1.0}
+    d = image.astype(np.float64) - golden.astype(np.float64)
+    rmse = np.sqrt((d * d).reshape(-1, 3).mean(axis=0))
+    return {"rmse": float(rmse.max()), "ssim": ssim(image, golden),
+            "changed": float((np.abs(d).max(axis=2) > 8).mean())}
+
+
+def render(scene, args, frame_out=None):
+    cmd = [sys.executable, "-m", "bench.worker", scene, "--frames", str(args.frames),
+           "--warmup", str(args.warmup), "--seed", str(args.seed), "--alloc-frames", "0"]
+    if frame_out:
+        cmd += ["--frame-out", frame_out]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("BENCH_RESULT "):
+            return json.loads(line[len("BENCH_RESULT "):])
+    sys.stderr.write(proc.stderr)
+    raise RuntimeError(f"scene '{scene}' failed (exit code {proc.returncode})")
+
+
+def load_manifest(directory):
+    path = os.path.join(directory, "manifest.json")
+    if not os.path.exists(path):
+        return {"scenes": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def cmd_record(args):
+    os.makedirs(args.dir, exist_ok=True)
+    manifest = load_manifest(args.dir)
+    manifest.update({"frames": args.frames, "warmup": args.warmup, "seed": args.seed})
+    for scene in args.scenes or GOLDEN_SCENES:
+        res = render(scene, args, os.path.join(args.dir, f"{scene}.png"))
+        p50 = float(np.median([res["frame_ms_p50"]] + [render(scene, args)["frame_ms_p50"]
+                                                       for _ in range(args.runs - 1)]))
+        manifest["gl"] = res["gl"]
+        manifest["scenes"][scene] = {"size": res["size"], "frame_hash": res["frame_hash"],
+                                     "frame_ms_p50": p50}
+        print(f"{scene:<22} recorded  p50 {p50:7.2f} ms (median of {args.runs})")
+    with open(os.path.join(args.dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"[INFO] golden images saved to {args.dir}")
+    return 0
+
+
+def slower(p50, base, args):
+    return bool(base) and p50 / base - 1.0 > args.time_threshold and p50 - base > args.time_floor
+
+
+def cmd_check(args):
+    manifest = load_manifest(args.dir)
+    if not manifest["scenes"]:
+        print(f"[ERROR] no golden images in {args.dir}, run 'python -m bench.golden record' first")
+        return 1
+    # Эталоны сняты с определёнными frames/seed - иначе сравнение бессмысленно
+    for key in ("frames", "warmup", "seed"):
+        setattr(args, key, manifest.get(key, getattr(args, key)))
+    failures, rows, renderer = [], {}, None
+    with tempfile.TemporaryDirectory() as tmp:
+        for scene in args.scenes or list(manifest["scenes"]):
+            golden = manifest["scenes"].get(scene)
+            if golden is None:
+                print(f"{scene:<22} (нет эталона)")
+                continue
+            frame_out = os.path.join(tmp, f"{scene}.png")
+            res = render(scene, args, frame_out)
+            renderer = res["gl"]["renderer"]
+            diff = image_diff(np.asarray(Image.open(frame_out).convert("RGB")),
+                              np.asarray(Image.open(os.path.join(args.dir, f"{scene}.png")).convert("RGB")))
+            marks = []
+            if diff["rmse"] > args.rmse or diff["ssim"] < args.ssim:
+                marks.append("IMAGE")
+            # Замедление засчитывается, только если повторилось в каждом прогоне
+            base = golden["frame_ms_p50"]
+            runs = [res["frame_ms_p50"]]
+            while len(runs) < args.runs and slower(min(runs), base, args):
+                runs.append(render(scene, args)["frame_ms_p50"])
+            if slower(min(runs), base, args):
+                marks.append("SLOWER")
+            p50 = float(np.median(runs))
+            change = p50 / base - 1.0 if base else 0.0
+            print(f"{scene:<22} rmse {diff['rmse']:6.2f}  ssim {diff['ssim']:.4f}  changed {diff['changed'] * 100:5.2f}%  "
+                  f"p50 {base:7.2f} -> {p50:7.2f} ms {change * 100:+6.1f}% ({len(runs)} run{'s' if len(runs) > 1 else ''})  "
+                  f"{' '.join(marks)}")
+            rows[scene] = dict(diff, frame_ms_p50=p50, frame_ms_p50_runs=runs, golden_frame_ms_p50=base)
+            failures += [(scene, m) for m in marks]
+    recorded = manifest.get("gl", {}).get("renderer")
+    if renderer and recorded and recorded != renderer:
+        print(f"[WARN] golden images were recorded on '{recorded}', current renderer is '{renderer}'")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(rows, f, indent=2)
+    if failures:
+        print(f"[ERROR] {len(failures)} regression(s): " + ", ".join(f"{s} ({m})" for s, m in failures))
+        return 1
+    print("[INFO] images and frame times within tolerance")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.golden", description="golden image and frame time regressions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, func in (("record", cmd_record), ("check", cmd_check)):
+        p = sub.add_parser(name)
+        p.add_argument("--scenes", nargs="*", help="scene names (default: all golden scenes)")
+        p.add_argument("--frames", type=int, default=30)
+        p.add_argument("--warmup", type=int, default=5)
+        p.add_argument("--seed", type=int, default=1234)
+        p.add_argument("--dir", default=GOLDEN_DIR)
+        p.add_argument("--runs", type=int, default=TIME_RUNS,
+                       help="frame time runs per scene (median recorded; a slowdown must repeat in all)")
+        p.set_defaults(func=func)
+    p_check = sub.choices["check"]
+    p_check.add_argument("--rmse", type=float, default=RMSE_LIMIT, help="max per-channel RMSE (0..255)")
+    p_check.add_argument("--ssim", type=float, default=SSIM_LIMIT, help="min luminance SSIM")
+    p_check.add_argument("--time-threshold", type=float, default=TIME_THRESHOLD,
+                         help="relative p50 slowdown treated as regression")
+    p_check.add_argument("--time-floor", type=float, default=TIME_FLOOR_MS,
+                         help="ignore p50 changes smaller than this many ms")
+    p_check.add_argument("--out", help="save results as JSON")
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+# File: headless.py
+# Безоконный запуск лабораторных: EGL pbuffer-контекст (Mesa llvmpipe и т.п.)
+# и подмена GLUT-функций, которым нужно настоящее окно.
+import os
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+import ctypes
+import math
+import numpy as np
+from OpenGL import EGL
+from OpenGL.GL import *
+
+from geometry import primitives
+
+
+# --- Контекст ---
+def create_context(width, height):
+    """Создаёт pbuffer width x height с depth/stencil и делает его текущим.
+    Кадровый буфер 0 при этом ведёт себя как окно GLUT."""
+    dpy = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if not EGL.eglInitialize(dpy, None, None):
+        raise RuntimeError("eglInitialize failed")
+
+    attrs = (EGL.EGLint * 17)(
+        EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+        EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+        EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8,
+        EGL.EGL_ALPHA_SIZE, 8, EGL.EGL_DEPTH_SIZE, 24, EGL.EGL_STENCIL_SIZE, 8,
+        EGL.EGL_NONE)
+    cfg = EGL.EGLConfig()
+    num = EGL.EGLint()
+    if not EGL.eglChooseConfig(dpy, attrs, ctypes.pointer(cfg), 1, ctypes.pointer(num)) or num.value == 0:
+        raise RuntimeError("no suitable EGL config")
+
+    surf_attrs = (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE)
+    surface = EGL.eglCreatePbufferSurface(dpy, cfg, surf_attrs)
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    # Профиль совместимости: лабы 1-3 и курсовая используют фиксированный конвейер
+    ctx = EGL.eglCreateContext(dpy, cfg, EGL.EGL_NO_CONTEXT, None)
+    if not EGL.eglMakeCurrent(dpy, surface, surface, ctx):
+        raise RuntimeError("eglMakeCurrent failed")
+    return dpy, surface, ctx
+
+
+def gl_info():
+    return {
+        "vendor": glGetString(GL_VENDOR).decode(),
+        "renderer": glGetString(GL_RENDERER).decode(),
+        "version": glGetString(GL_VERSION).decode(),
+    }
+
+
+def read_pixels(width, height):
+    data = glReadPixels(0, 0, width, height, GL_RGB, GL_UNSIGNED_BYTE)
+    img = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+    return img[::-1].copy()
+
+
+# --- Симулированное время ---
+class SimClock:
+    """Часы для glutGet(GLUT_ELAPSED_TIME): идут только когда их двигают."""
+    def __init__(self, start_ms=0):
+        self.ms = start_ms
+
+    def advance(self, dt_ms):
+        self.ms += dt_ms
+
+    def elapsed(self):
+        return int(self.ms)
+
+
+# --- Геометрия GLUT (freeglut без glutInit завершает процесс) ---
+def _torus_grid(inner_radius, outer_radius, sides, rings):
+    phi = np.linspace(0.0, 2.0 * math.pi, rings + 1)[:, None]
+    theta = np.linspace(0.0, 2.0 * math.pi, sides + 1)[None, :]
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    cos_p, sin_p = np.cos(phi), np.sin(phi)
+    dist = outer_radius + inner_radius * cos_t
+    pos = np.stack(np.broadcast_arrays(cos_p * dist, sin_p * dist, inner_radius * sin_t), axis=-1)
+    nrm = np.stack(np.broadcast_arrays(cos_p * cos_t, sin_p * cos_t, sin_t + 0 * cos_p), axis=-1)
+    return pos, nrm
+
+
+def solid_torus(inner_radius, outer_radius, sides, rings):
+    pos, nrm = _torus_grid(inner_radius, outer_radius, sides, rings)
+    for i in range(rings):
+        glBegin(GL_QUAD_STRIP)
+        for j in range(sides + 1):
+            glNormal3dv(nrm[i, j]); glVertex3dv(pos[i, j])
+            glNormal3dv(nrm[i + 1, j]); glVertex3dv(pos[i + 1, j])
+        glEnd()
+
+
+def wire_torus(inner_radius, outer_radius, sides, rings):
+    # Вершины - как в freeglut (fghGenerateTorus, float32), порядок линий тот же
+    vertices = primitives.wire_torus(outer_radius, inner_radius, rings, sides).vertices[0]
+    pos = vertices[:, 0:3].reshape(rings, sides, 3)
+    nrm = vertices[:, 3:6].reshape(rings, sides, 3)
+    for i in range(rings):
+        glBegin(GL_LINE_LOOP)
+        for j in range(sides):
+            glNormal3fv(nrm[i, j]); glVertex3fv(pos[i, j])
+        glEnd()
+    for j in range(sides):
+        glBegin(GL_LINE_LOOP)
+        for i in range(rings):
+            glNormal3fv(nrm[i, j]); glVertex3fv(pos[i, j])
+        glEnd()
+
+
+def solid_sphere(radius, slices, stacks):
+    theta = np.linspace(0.0, math.pi, stacks + 1)
+    phi = np.linspace(0.0, 2.0 * math.pi, slices + 1)
+    for i in range(stacks):
+        glBegin(GL_QUAD_STRIP)
+        for j in range(slices + 1):
+            for t in (theta[i], theta[i + 1]):
+                n = (math.cos(phi[j]) * math.sin(t), math.sin(phi[j]) * math.sin(t), math.cos(t))
+                glNormal3d(*n)
+                glVertex3d(n[0] * radius, n[1] * radius, n[2] * radius)
+        glEnd()
+
+
+def wire_cone(base, height, slices, stacks):
+    phi = np.linspace(0.0, 2.0 * math.pi, slices, endpoint=False)
+    for k in range(stacks + 1):
+        z = height * k / stacks
+        r = base * (1.0 - k / stacks)
+        glBegin(GL_LINE_LOOP)
+        for a in phi:
+            glVertex3d(r * math.cos(a), r * math.sin(a), z)
+        glEnd()
+    glBegin(GL_LINES)
+    for a in phi:
+        glVertex3d(base * math.cos(a), base * math.sin(a), 0.0)
+        glVertex3d(0.0, 0.0, height)
+    glEnd()
+
+
+def install_glut_shim(module, clock):
+    """Подменяет в пространстве имён модуля лабы функции GLUT, которые
+    требуют окна. Таймеры и перерисовку вызывает сам стенд."""
+    def swap_buffers():
+        glFinish()
+
+    def glut_get(what):
+        return clock.elapsed()
+
+    shim = {
+        "glutSwapBuffers": swap_buffers,
+        "glutPostRedisplay": lambda: None,
+        "glutTimerFunc": lambda ms, func, value: None,
+        "glutGet": glut_get,
+        "glutSolidTorus": solid_torus,
+        "glutWireTorus": wire_torus,
+        "glutSolidSphere": solid_sphere,
+        "glutWireCone": wire_cone,
+    }
+    for name, func in shim.items():
+        if hasattr(module, name):
+            setattr(module, name, func)
@@ -0,0 +1,158 @@
+# File: meshes.py
+# Замер импорта мешей lab3_new/mesh_import.py на модели в миллионы треугольников.
+# Модель (плотный тор) генерируется и сохраняется в OBJ, PLY и GLB.
+#
+#   python -m bench.meshes [--triangles 2000000] [--dir /tmp/bench_meshes] [--out meshes.json]
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from bench.scenes import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "lab3_new"))
+import mesh_import  # noqa: E402
+
+
+def dense_torus(triangles, radius_major=120.0, radius_minor=40.0):
+    """Тор с общими вершинами, примерно triangles треугольников."""
+    rings = max(8, int(math.sqrt(triangles / 2.0 * 1.5)))
+    sides = max(4, int(triangles / 2.0 / rings))
+    u = np.linspace(0.0, 2.0 * math.pi, rings + 1)[:, None]
+    v = np.linspace(0.0, 2.0 * math.pi, sides + 1)[None, :]
+    normal = np.stack(np.broadcast_arrays(np.cos(u) * np.cos(v), np.sin(v) + 0 * u, np.sin(u) * np.cos(v)), -1)
+    center = np.stack(np.broadcast_arrays(np.cos(u) * radius_major, 0 * v, np.sin(u) * radius_major), -1)
+    pos = center + radius_minor * normal
+    uv = np.stack(np.broadcast_arrays(u / (2 * math.pi), v / (2 * math.pi)), -1)
+    vertices = np.concatenate([pos, normal, uv], axis=-1).reshape(-1, 8).astype(np.float32)
+
+    i, j = np.meshgrid(np.arange(rings), np.arange(sides), indexing="ij")
+    a = i * (sides + 1) + j
+    b = a + sides + 1
+    quads = np.stack([a, b, b + 1, a + 1], axis=-1).reshape(-1, 4)
+    tris = np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]], axis=1).reshape(-1, 3)
+    return vertices, tris.astype(np.uint32)
+
+
+# --- Запись тестовых файлов ---
+def write_obj(path, vertices, tris):
+    with open(path, "w") as f:
+        f.write("# bench mesh\n")
+        np.savetxt(f, vertices[:, 0:3], fmt="v %.6f %.6f %.6f")
+        np.savetxt(f, vertices[:, 6:8], fmt="vt %.6f %.6f")
+        np.savetxt(f, vertices[:, 3:6], fmt="vn %.6f %.6f %.6f")
+        idx = np.repeat(tris.astype(np.int64) + 1, 3, axis=1)
+        np.savetxt(f, idx, fmt="f %d/%d/%d %d/%d/%d %d/%d/%d")
+
+
+def write_ply(path, vertices, tris):
+    header = (
+        "ply\nformat binary_little_endian 1.0\n"
+        f"element vertex {len(vertices)}\n"
+        "property float x\nproperty float y\nproperty float z\n"
+        "property float nx\nproperty float ny\nproperty float nz\n"
+        "property float s\nproperty float t\n"
+        f"element face {len(tris)}\n"
+        "property list uchar int vertex_indices\nend_header\n"
+    )
+    faces = np.zeros(len(tris), dtype=np.dtype([("n", "u1"), ("idx", "<i4", (3,))]))
+    faces["n"] = 3
+    faces["idx"] = tris
+    with open(path, "wb") as f:
+        f.write(header.encode("ascii"))
+        f.write(vertices.astype("<f4").tobytes())
+        f.write(faces.tobytes())
+
+
+def write_glb(path, vertices, tris):
+    pos = np.ascontiguousarray(vertices[:, 0:3])
+    nrm = np.ascontiguousarray(vertices[:, 3:6])
+    uv = np.ascontiguousarray(vertices[:, 6:8]).copy()
+    uv[:, 1] = 1.0 - uv[:, 1]
+    blobs = [pos.tobytes(), nrm.tobytes(), uv.tobytes(), tris.astype("<u4").tobytes()]
+    views, offset = [], 0
+    for blob in blobs:
+        views.append({"buffer": 0, "byteOffset": offset, "byteLength": len(blob)})
+        offset += len(blob)
+    n = len(vertices)
+    doc = {
+        "asset": {"version": "2.0"},
+        "scene": 0, "scenes": [{"nodes": [0]}], "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0, "NORMAL": 1, "TEXCOORD_0": 2}, "indices": 3}]}],
+        "buffers": [{"byteLength": offset}],
+        "bufferViews": views,
+        "accessors": [
+            {"bufferView": 0, "componentType": 5126, "count": n, "type": "VEC3",
+             "min": pos.min(0).tolist(), "max": pos.max(0).tolist()},
+            {"bufferView": 1, "componentType": 5126, "count": n, "type": "VEC3"},
+            {"bufferView": 2, "componentType": 5126, "count": n, "type": "VEC2"},
+            {"bufferView": 3, "componentType": 5125, "count": tris.size, "type": "SCALAR"},
+        ],
+    }
+    js = json.dumps(doc).encode("utf-8")
+    js += b" " * (-len(js) % 4)
+    binary = b"".join(blobs)
+    binary += b"\0" * (-len(binary) % 4)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sII", b"glTF", 2, 12 + 8 + len(js) + 8 + len(binary)))
+        f.write(struct.pack("<II", len(js), 0x4E4F534A) + js)
+        f.write(struct.pack("<II", len(binary), 0x004E4942) + binary)
+
+
+WRITERS = {"obj": write_obj, "ply": write_ply, "glb": write_glb}
+
+
+def timed(func, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - t0) * 1000.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="mesh import benchmark")
+    parser.add_argument("--triangles", type=int, default=2000000)
+    parser.add_argument("--dir", default="/tmp/bench_meshes")
+    parser.add_argument("--formats", default="obj,ply,glb")
+    parser.add_argument("--out", help="save results as JSON")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.dir, exist_ok=True)
+    vertices, tris = dense_torus(args.triangles)
+    print(f"[INFO] model: {len(vertices)} vertices, {len(tris)} triangles")
+
+    results = {}
+    for fmt in args.formats.split(","):
+        path = os.path.join(args.dir, f"torus_{len(tris)}.{fmt}")
+        if not os.path.exists(path):
+            WRITERS[fmt](path, vertices, tris)
+        if os.path.exists(mesh_import.cache_path(path)):
+            os.remove(mesh_import.cache_path(path))
+        (v, i), parse_ms = timed(mesh_import.import_mesh, path)
+        _, cold_ms = timed(mesh_import.load_mesh, path)
+        _, cached_ms = timed(mesh_import.load_mesh, path)
+        results[fmt] = {
+            "file_mb": os.path.getsize(path) / 2 ** 20,
+            "vertices": len(v),
+            "triangles": len(i) // 3,
+            "parse_ms": parse_ms,
+            "parse_and_cache_ms": cold_ms,
+            "cached_load_ms": cached_ms,
+            "mtri_per_s": len(i) / 3 / parse_ms / 1000.0,
+        }
+        r = results[fmt]
+        print(f"{fmt:<4} {r['file_mb']:8.1f} MB  parse {parse_ms:9.1f} ms ({r['mtri_per_s']:.2f} Mtri/s)  "
+              f"parse+cache {cold_ms:9.1f} ms  cached {cached_ms:7.1f} ms  -> {r['vertices']} verts")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"triangles": int(len(tris)), "formats": results}, f, indent=2)
+        print(f"[INFO] results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# File: particles.py
+# Сверка GPU-симуляции частиц (kursach/gpu_particles.py, transform feedback)
+# с эталонным CPU-движком kursach и замер шага обоих. Работает без GPU -
+# на Mesa llvmpipe через EGL.
+#
+# Оба движка получают одни и те же запросы рождения. float32 на GPU против
+# float64 на CPU изредка сдвигает отражение от плоскости или гибель частицы
+# на шаг, поэтому допускается доля --outliers частиц с ошибкой больше --tolerance.
+#
+#   python -m bench.particles [--particles 8000] [--steps 400] [--tolerance 1e-3]
+import argparse
+import json
+import time
+
+import numpy as np
+
+from bench.headless import SimClock, create_context  # до OpenGL: выбирает EGL-платформу
+from bench.scenes import load_lab
+from OpenGL.GL import glFinish
+
+
+def compare(cpu, gpu, tolerance):
+    """Расхождения по активным частицам: маска, позиции, скорости, возраст."""
+    state = gpu.read_state()
+    gpu_active = state["pos_life"][:, 3] < state["vel_max_life"][:, 3]
+    both = cpu.active & gpu_active
+    pos_error = np.abs(state["pos_life"][both, :3] - cpu.pos[both]).max(axis=1, initial=0.0)
+    return {
+        "active_cpu": int(cpu.active.sum()),
+        "active_mismatch": int((cpu.active != gpu_active).sum()),
+        "bookkeeping_mismatch": int((gpu.active != gpu_active).sum()),
+        "max_pos_error": float(pos_error.max(initial=0.0)),
+        "outliers": int((pos_error > tolerance).sum()),
+        "max_vel_error": float(np.abs(state["vel_max_life"][both, :3] - cpu.vel[both]).max(initial=0.0)),
+        "max_life_error": float(np.abs(state["pos_life"][both, 3] - cpu.life[both]).max(initial=0.0)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GPU vs CPU particle engine")
+    parser.add_argument("--particles", type=int, default=8000)
+    parser.add_argument("--steps", type=int, default=400)
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="max position error")
+    parser.add_argument("--outliers", type=float, default=1e-3, help="allowed fraction over tolerance")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--out", help="save results as JSON")
+    args = parser.parse_args(argv)
+
+    create_context(64, 64)
+    mod = load_lab("kursach", SimClock())
+    rate = max(1, args.particles // 60)
+    cpu = mod.Particles(args.particles)
+    world = mod.make_collisions()
+    gpu = mod.GPUParticles(args.particles, mod.CONE_APEX, mod.CONE_HEIGHT, mod.CONE_RADIUS, mod.PLANE_X_POS,
+                           mod.COLOR_START, mod.COLOR_END, mod.GRAVITY_VECTOR)
+
+    cpu_ms, gpu_ms = [], []
+    for step in range(args.steps):
+        # Одни и те же запросы рождения для обоих движков
+        np.random.seed(args.seed + step)
+        idx, params = mod.spawn_requests(cpu.active, rate)
+        t0 = time.perf_counter()
+        cpu.emit(idx, params)
+        cpu.update(mod.TIME_STEP, world)
+        cpu_ms.append((time.perf_counter() - t0) * 1000.0)
+
+        t0 = time.perf_counter()
+        gpu.step(idx, params, mod.TIME_STEP)
+        glFinish()
+        gpu_ms.append((time.perf_counter() - t0) * 1000.0)
+
+    results = compare(cpu, gpu, args.tolerance)
+    results.update({"particles": args.particles, "steps": args.steps,
+                    "cpu_step_ms": float(np.median(cpu_ms)), "gpu_step_ms": float(np.median(gpu_ms))})
+    print(f"[INFO] {args.particles} particles, {args.steps} steps: active {results['active_cpu']}, "
+          f"mask mismatch {results['active_mismatch']}, max error pos {results['max_pos_error']:.2e} "
+          f"({results['outliers']} over {args.tolerance:g}) "
+          f"vel {results['max_vel_error']:.2e} life {results['max_life_error']:.2e}")
+    print(f"[INFO] step: CPU {results['cpu_step_ms']:.2f} ms, GPU {results['gpu_step_ms']:.2f} ms (median)")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    allowed = args.outliers * max(results["active_cpu"], 1)
+    ok = results["outliers"] <= allowed and results["active_mismatch"] <= allowed
+    print("[INFO] GPU matches CPU reference" if ok else "[ERROR] GPU result differs from CPU reference")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
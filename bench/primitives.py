@@ -0,0 +1,56 @@
+# File: primitives.py
+# Замер генерации примитивов geometry/primitives.py: пачка из N наборов
+# параметров одним вызовом против N отдельных вызовов.
+#
+#   python -m bench.primitives [--count 1000] [--out primitives.json]
+import argparse
+import json
+
+import numpy as np
+
+from bench.meshes import timed
+from geometry import primitives
+
+# (имя, параметры-размеры, параметры тесселяции)
+CASES = (
+    ("cone", ("radius", "height"), {"slices": 64}),
+    ("cylinder", ("radius", "height"), {"slices": 64}),
+    ("sphere", ("radius",), {"slices": 64, "stacks": 32}),
+    ("torus", ("radius_major", "radius_minor"), {"radial_segments": 48, "tubular_segments": 32}),
+    ("wire_cone", ("radius", "height"), {"slices": 32}),
+    ("wire_torus", ("radius_major", "radius_minor"), {"radial_segments": 48, "tubular_segments": 32}),
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="procedural primitive benchmark")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--out", help="save results as JSON")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for name, sizes, tess in CASES:
+        values = {k: rng.uniform(1.0, 4.0, args.count) for k in sizes}
+        mesh, batch_ms = timed(primitives.generate, name, **values, **tess)
+        _, single_ms = timed(lambda: [primitives.generate(name, **{k: v[i] for k, v in values.items()}, **tess)
+                                      for i in range(args.count)])
+        results[name] = {
+            "vertices": mesh.vertex_count,
+            "indices": len(mesh.indices),
+            "batch_ms": batch_ms,
+            "single_ms": single_ms,
+            "speedup": single_ms / batch_ms,
+        }
+        r = results[name]
+        print(f"{name:<11} {r['vertices']:6d} verts  batch {batch_ms:8.1f} ms  "
+              f"one by one {single_ms:8.1f} ms  x{r['speedup']:.1f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"count": args.count, "primitives": results}, f, indent=2)
+        print(f"[INFO] results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
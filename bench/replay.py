@@ -0,0 +1,240 @@
+# File: replay.py
+# Запись и воспроизведение ввода: клавиши, мышь, тики анимации, перерисовки.
+# Лог - массив записей фиксированного размера (18 байт), воспроизведение
+# идёт по записанному времени, поэтому прогоны совпадают бит в бит.
+#
+# Запись в живой лабе:   python main.py --record session.rpl [--seed N]
+# Просмотр лога:         python -m bench.replay dump session.rpl
+# Прогон на стенде:      python -m bench run --scenes lab1.scene1 --replay session.rpl
+import atexit
+import random
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b"RPL1"
+HEADER = struct.Struct("<4sII")  # magic, seed, число записей
+
+# Порядок важен: индекс хранится в логе (новые - только в конец)
+CALLBACKS = ("display", "reshape", "keyboard", "special", "idle", "timer", "mouse")
+CB_INDEX = {name: i for i, name in enumerate(CALLBACKS)}
+
+ARG_NONE, ARG_BYTES, ARG_INT = 0, 1, 2
+
+EVENT_DTYPE = np.dtype([
+    ("frame", "<u4"),  # номер кадра (число display до события)
+    ("t_ms", "<u4"),   # время GLUT_ELAPSED_TIME
+    ("cb", "u1"),      # индекс в CALLBACKS
+    ("kind", "i1"),    # тип аргумента
+    ("arg", "<i4"),    # клавиша / значение таймера / кнопка | состояние << 8
+    ("x", "<i2"),
+    ("y", "<i2"),
+])
+
+# Функции регистрации GLUT -> имя колбэка в логе
+GLUT_REGISTRARS = {
+    "glutDisplayFunc": "display",
+    "glutReshapeFunc": "reshape",
+    "glutKeyboardFunc": "keyboard",
+    "glutSpecialFunc": "special",
+    "glutIdleFunc": "idle",
+    "glutMouseFunc": "mouse",
+}
+
+
+class InputLog:
+    def __init__(self, seed=0, events=None):
+        self.seed = seed
+        self.events = events if events is not None else np.zeros(0, dtype=EVENT_DTYPE)
+        self._pending = []
+        self._frame = 0
+
+    def add(self, t_ms, cb, arg=None, x=0, y=0):
+        if isinstance(arg, (bytes, bytearray)):
+            kind, value = ARG_BYTES, arg[0]
+        elif arg is None:
+            kind, value = ARG_NONE, 0
+        else:
+            kind, value = ARG_INT, int(arg)
+        self._pending.append((self._frame, int(t_ms), CB_INDEX[cb], kind, value, x, y))
+        if cb == "display":
+            self._frame += 1
+
+    # Сценарии без живой сессии собираются теми же вызовами
+    def key(self, t_ms, key):
+        self.add(t_ms, "keyboard", key)
+
+    def special(self, t_ms, key):
+        self.add(t_ms, "special", key)
+
+    def mouse(self, t_ms, button, state, x, y):
+        self.add(t_ms, "mouse", button | state << 8, x, y)
+
+    def tick(self, t_ms, cb="idle", value=0):
+        self.add(t_ms, cb, None if cb == "idle" else value)
+
+    def display(self, t_ms):
+        self.add(t_ms, "display")
+
+    def flush(self):
+        if self._pending:
+            new = np.array(self._pending, dtype=EVENT_DTYPE)
+            self.events = np.concatenate([self.events, new])
+            self._pending = []
+        return self.events
+
+    @property
+    def frame_count(self):
+        events = self.flush()
+        return int(np.count_nonzero(events["cb"] == CB_INDEX["display"]))
+
+    def save(self, path):
+        events = self.flush()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.seed, len(events)))
+            f.write(events.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, seed, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a replay log")
+            events = np.frombuffer(f.read(count * EVENT_DTYPE.itemsize), dtype=EVENT_DTYPE)
+        log = cls(seed, events.copy())
+        log._frame = int(np.count_nonzero(events["cb"] == CB_INDEX["display"]))
+        return log
+
+
+def decode_args(event):
+    cb = CALLBACKS[event["cb"]]
+    if cb == "reshape":
+        return (int(event["x"]), int(event["y"]))
+    kind, value = int(event["kind"]), int(event["arg"])
+    if cb in ("keyboard", "special"):
+        key = bytes([value]) if kind == ARG_BYTES else value
+        return (key, int(event["x"]), int(event["y"]))
+    if cb == "mouse":
+        return (value & 0xFF, value >> 8, int(event["x"]), int(event["y"]))
+    if cb == "timer":
+        return (value,)
+    return ()
+
+
+# --- Запись ---
+class InputRecorder:
+    def __init__(self, path, seed, time_func):
+        self.path = path
+        self.log = InputLog(seed)
+        self.time_func = time_func
+
+    def wrap(self, cb, func):
+        def recorded(*args):
+            t = self.time_func()
+            if cb == "reshape":
+                self.log.add(t, cb, None, *args)
+            elif cb in ("keyboard", "special"):
+                key, x, y = args
+                self.log.add(t, cb, key, x, y)
+            elif cb == "mouse":
+                button, state, x, y = args
+                self.log.add(t, cb, button | state << 8, x, y)
+            elif cb == "timer":
+                self.log.add(t, cb, args[0])
+            else:
+                self.log.add(t, cb)
+            return func(*args)
+        return recorded
+
+    def save(self):
+        self.log.save(self.path)
+        print(f"[INFO] recorded {len(self.log.events)} events ({self.log.frame_count} frames) to {self.path}")
+
+
+def _pop_option(argv, name):
+    if name in argv:
+        i = argv.index(name)
+        value = argv[i + 1]
+        del argv[i:i + 2]
+        return value
+    return None
+
+
+def install_recorder(module_globals, argv=None):
+    """Если в argv есть --record PATH, подменяет glut*Func в пространстве имён
+    лабы так, что все регистрируемые колбэки пишутся в лог (включая таймеры,
+    которые перерегистрируют сами себя). Без --record ничего не делает."""
+    argv = sys.argv if argv is None else argv
+    path = _pop_option(argv, "--record")
+    seed = int(_pop_option(argv, "--seed") or 0)
+    if path is None:
+        return None
+
+    # Частицы курсовой используют random - фиксируем зерно и пишем его в лог
+    random.seed(seed)
+    np.random.seed(seed)
+
+    glut_get = module_globals["glutGet"]
+    elapsed = module_globals["GLUT_ELAPSED_TIME"]
+    recorder = InputRecorder(path, seed, lambda: glut_get(elapsed))
+
+    for registrar, cb in GLUT_REGISTRARS.items():
+        original = module_globals.get(registrar)
+        if original is not None:
+            module_globals[registrar] = (lambda orig, name: lambda func: orig(recorder.wrap(name, func)))(original, cb)
+
+    timer_func = module_globals.get("glutTimerFunc")
+    if timer_func is not None:
+        module_globals["glutTimerFunc"] = lambda ms, func, value: timer_func(ms, recorder.wrap("timer", func), value)
+
+    atexit.register(recorder.save)
+    print(f"[INFO] recording input to {path} (seed {seed})")
+    return recorder
+
+
+# --- Воспроизведение ---
+class Replayer:
+    """Вызывает колбэки из лога, выставляя симулированное время на записанное."""
+    def __init__(self, log, callbacks, clock):
+        self.log = log
+        self.events = log.flush()
+        self.callbacks = callbacks
+        self.clock = clock
+        self.cursor = 0
+
+    @property
+    def done(self):
+        return self.cursor >= len(self.events)
+
+    def step_frame(self):
+        """Проигрывает события до ближайшей перерисовки включительно.
+        Возвращает False, если лог закончился."""
+        while self.cursor < len(self.events):
+            event = self.events[self.cursor]
+            self.cursor += 1
+            cb = CALLBACKS[event["cb"]]
+            self.clock.ms = int(event["t_ms"])
+            func = self.callbacks.get(cb)
+            if func is not None:
+                func(*decode_args(event))
+            if cb == "display":
+                return True
+        return False
+
+
+def dump(path):
+    log = InputLog.load(path)
+    print(f"seed {log.seed}, {len(log.events)} events, {log.frame_count} frames")
+    for event in log.events:
+        cb = CALLBACKS[event["cb"]]
+        if cb in ("display", "idle"):
+            continue
+        print(f"frame {event['frame']:6d}  t {event['t_ms']:8d} ms  {cb:<9} {decode_args(event)}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "dump":
+        dump(sys.argv[2])
+    else:
+        print("usage: python -m bench.replay dump <log.rpl>")
@@ -0,0 +1,278 @@
+# File: scenes.py
+# Описание сцен для стенда: как загрузить лабу, подготовить GL-состояние
+# (то, что делает main() после создания окна) и продвинуть один кадр.
+import os
+import sys
+import random
+import importlib.util
+import numpy as np
+
+from bench.headless import install_glut_shim  # до OpenGL: выбирает EGL-платформу
+from bench.replay import InputLog, Replayer
+from OpenGL.GL import *
+from OpenGL.GLUT import GLUT_DOWN, GLUT_KEY_LEFT, GLUT_KEY_RIGHT, GLUT_LEFT_BUTTON
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FRAME_MS = 16  # шаг симулированного времени на кадр
+DEFAULT_PARTICLE_COUNTS = (500, 2000, 8000)
+SHADOW_FILTERS = ("pcf3x3", "hw2x2", "hw3x3", "poisson", "pcss")  # lab3_new/main.py SHADOW_FILTERS
+POINT_LIGHT_COUNTS = (1, 4, 16, 64, 256, 1024)
+
+
+def load_lab(lab, clock):
+    """Импортирует <lab>/main.py как отдельный модуль, рабочий каталог - каталог лабы
+    (текстуры грузятся по относительным путям)."""
+    lab_dir = os.path.join(ROOT, lab)
+    os.chdir(lab_dir)
+    if lab_dir not in sys.path:
+        sys.path.insert(0, lab_dir)
+    spec = importlib.util.spec_from_file_location(f"{lab}_main", os.path.join(lab_dir, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    install_glut_shim(module, clock)
+    return module
+
+
+class BenchScene:
+    lab = None
+    size = (800, 600)
+
+    def __init__(self, name, clock, **params):
+        self.name = name
+        self.clock = clock
+        self.params = params
+        self.mod = None
+        self.replayer = None
+
+    def setup(self):
+        self.mod = load_lab(self.lab, self.clock)
+
+    def callbacks(self):
+        """Те же колбэки, что main() регистрирует в GLUT."""
+        raise NotImplementedError
+
+    def attach_replay(self, log):
+        self.replayer = Replayer(log, self.callbacks(), self.clock)
+
+    def step(self, frame):
+        """Один кадр. False - лог воспроизведения закончился."""
+        if self.replayer is not None:
+            return self.replayer.step_frame()
+        self.advance(frame)
+        return True
+
+    def advance(self, frame):
+        raise NotImplementedError
+
+
+# --- lab1: каркасные примитивы ---
+class Lab1Scene(BenchScene):
+    lab = "lab1"
+    size = (800, 600)
+
+    def setup(self):
+        super().setup()
+        self.mod.init()
+        self.mod.reshape(*self.size)
+        key = str(self.params["scene"]).encode()
+        self.mod.keyboard(key, 0, 0)
+
+    def callbacks(self):
+        return {"display": self.mod.display, "reshape": self.mod.reshape,
+                "keyboard": self.mod.keyboard, "idle": self.mod.idle}
+
+    def advance(self, frame):
+        self.clock.advance(FRAME_MS)
+        self.mod.idle()
+        self.mod.display()
+
+
+def lab1_switch_script(frames, period=40):
+    """Переключение сцен 1-4 клавишами каждые period кадров."""
+    log = InputLog()
+    for frame in range(frames):
+        t = (frame + 1) * FRAME_MS
+        if frame % period == 0:
+            log.key(t, str(frame // period % 4 + 1).encode())
+        log.tick(t, "idle")
+        log.display(t)
+    return log
+
+
+class Lab1SwitchScene(Lab1Scene):
+    def setup(self):
+        super().setup()
+        self.attach_replay(lab1_switch_script(self.params["frames"]))
+
+
+# --- lab2 / lab3: освещение, текстуры, плоские тени ---
+class LitScene(BenchScene):
+    size = (960, 720)
+
+    def setup(self):
+        super().setup()
+        self.mod.init()
+        self.mod.reshape(*self.size)
+        # Переключатели режимов (T - текстура, B - bump-mapping) до первого кадра
+        for key in self.params.get("keys", b""):
+            self.mod.keyboard(bytes([key]), 0, 0)
+
+    def callbacks(self):
+        return {"display": self.mod.display, "reshape": self.mod.reshape,
+                "keyboard": self.mod.keyboard, "timer": self.mod.update}
+
+    def advance(self, frame):
+        self.clock.advance(FRAME_MS)
+        self.mod.update(0)
+        self.mod.display()
+
+
+class Lab2Scene(LitScene):
+    lab = "lab2"
+
+
+class Lab3Scene(LitScene):
+    lab = "lab3"
+
+
+# --- lab3_new: карта теней ---
+class Lab3NewScene(BenchScene):
+    lab = "lab3_new"
+    size = (1200, 800)
+
+    def setup(self):
+        super().setup()
+        scene_path = self.params.get("scene_file")
+        self.scene = self.mod.Scene(os.path.join(ROOT, "lab3_new", scene_path)) if scene_path else self.mod.Scene()
+        self.scene.window_width, self.scene.window_height = self.size
+        self.scene.transparency = self.params.get("transparency", self.scene.transparency)
+        self.scene.shadow_filter = self.params.get("shadow_filter", self.scene.shadow_filter)
+        self.scene.shading = self.params.get("shading", self.scene.shading)
+        self.scene.render_scale = self.params.get("render_scale", self.scene.render_scale)
+        self.scene.upscale_filter = self.params.get("upscale", self.scene.upscale_filter)
+        self.scene.target_frame_ms = self.params.get("target_ms", self.scene.target_frame_ms)
+        if "point_lights" in self.params:
+            self.scene.point_lights = {"count": self.params["point_lights"], "seed": 7}
+        self.scene.init()
+        self.scene.reshape(*self.size)
+        self.start_rot_y = self.scene.cam_rot_y
+
+    def callbacks(self):
+        scene = self.scene
+        return {"display": scene.display, "reshape": scene.reshape,
+                "keyboard": lambda k, x, y: (scene.keyboard(k, x, y), scene.keyboard_motion(k, x, y)),
+                "special": scene.special, "mouse": scene.mouse}
+
+    def advance(self, frame):
+        # Фиксированная траектория: облёт камеры по 1.5 градуса за кадр
+        self.clock.advance(FRAME_MS)
+        self.scene.cam_rot_y = self.start_rot_y + 1.5 * frame
+        self.scene.display()
+
+
+def lab3_new_interactive_script(frames):
+    """Облёт камеры стрелками, движение света по кругу клавишами WASD и раз
+    в 120 кадров - выбор объекта в центре окна мышью с поворотом его клавишей y."""
+    log = InputLog()
+    light_keys = (b"d", b"s", b"a", b"w")
+    for frame in range(frames):
+        t = (frame + 1) * FRAME_MS
+        log.special(t, GLUT_KEY_RIGHT if frame % 240 < 120 else GLUT_KEY_LEFT)
+        log.key(t, light_keys[frame // 10 % 4])
+        if frame % 60 == 59:
+            log.key(t, str(frame // 60 % 6 + 1).encode())
+        if frame % 120 == 30:
+            w, h = Lab3NewScene.size
+            log.mouse(t, GLUT_LEFT_BUTTON, GLUT_DOWN, w // 2, h // 2)
+            log.key(t, b"y")
+        log.display(t)
+    return log
+
+
+class Lab3NewInteractiveScene(Lab3NewScene):
+    def setup(self):
+        super().setup()
+        self.attach_replay(lab3_new_interactive_script(self.params["frames"]))
+
+
+# --- kursach: система частиц ---
+class KursachScene(BenchScene):
+    lab = "kursach"
+    size = (800, 600)
+
+    def setup(self):
+        super().setup()
+        count = self.params["particles"]
+        self.mod.MAX_PARTICLES = count
+        # Эмиттер заполняет пул примерно за секунду симуляции
+        self.mod.EMISSION_RATE = max(1, count // 60)
+        # Препятствия lab3_new: SDF строятся в init(), до первого кадра
+        self.mod.obstacles_enabled = self.params.get("obstacles", False)
+        self.mod.interaction_enabled = self.params.get("interaction", False)
+        self.mod.transparency = self.params.get("transparency", "opaque")
+        self.mod.backend = self.params.get("backend", "cpu")
+        self.mod.init()
+        self.mod.reshape(*self.size)
+
+    def callbacks(self):
+        return {"display": self.mod.display, "reshape": self.mod.reshape,
+                "keyboard": self.mod.keyboard, "timer": self.mod.timer}
+
+    def advance(self, frame):
+        self.clock.advance(FRAME_MS)
+        self.mod.timer(0)
+        self.mod.display()
+
+
+def build_registry(particle_counts=DEFAULT_PARTICLE_COUNTS):
+    registry = {}
+    for n in range(1, 5):
+        registry[f"lab1.scene{n}"] = (Lab1Scene, {"scene": n})
+    registry["lab1.switch"] = (Lab1SwitchScene, {"scene": 1})
+    registry["lab2"] = (Lab2Scene, {})
+    registry["lab2.bump"] = (Lab2Scene, {"keys": b"b"})
+    registry["lab2.notexture"] = (Lab2Scene, {"keys": b"t"})
+    registry["lab3"] = (Lab3Scene, {})
+    registry["lab3_new"] = (Lab3NewScene, {})
+    registry["lab3_new.interactive"] = (Lab3NewInteractiveScene, {})
+    # Прозрачность: 25 полупрозрачных экземпляров, сортировка или OIT
+    registry["lab3_new.glass"] = (Lab3NewScene, {"scene_file": "scenes/glass.json"})
+    registry["lab3_new.glass.oit"] = (Lab3NewScene, {"scene_file": "scenes/glass.json", "transparency": "oit"})
+    # Отложенное освещение: та же сцена, стекло поверх и много источников
+    registry["lab3_new.deferred"] = (Lab3NewScene, {"shading": "deferred"})
+    registry["lab3_new.glass.deferred"] = (Lab3NewScene, {"scene_file": "scenes/glass.json", "shading": "deferred"})
+    # Пониженное разрешение кадра и контроллер по целевому времени кадра
+    registry["lab3_new.scale.75"] = (Lab3NewScene, {"render_scale": 0.75})
+    registry["lab3_new.scale.50"] = (Lab3NewScene, {"render_scale": 0.5})
+    registry["lab3_new.scale.50.sharpen"] = (Lab3NewScene, {"render_scale": 0.5, "upscale": "sharpen"})
+    registry["lab3_new.dynamic"] = (Lab3NewScene, {"target_ms": 40.0})
+    for name in SHADOW_FILTERS:
+        registry[f"lab3_new.shadow.{name}"] = (Lab3NewScene, {"shadow_filter": name})
+    # Точечные источники с кластерным отбором: масштабирование по их числу
+    for count in POINT_LIGHT_COUNTS:
+        registry[f"lab3_new.lights.{count}"] = (Lab3NewScene, {"point_lights": count})
+        registry[f"lab3_new.lights.{count}.deferred"] = (Lab3NewScene, {"point_lights": count, "shading": "deferred"})
+    for count in particle_counts:
+        registry[f"kursach.p{count}"] = (KursachScene, {"particles": count})
+    registry["kursach.obstacles"] = (KursachScene, {"particles": 8000, "obstacles": True})
+    registry["kursach.sorted"] = (KursachScene, {"particles": 8000, "transparency": "sorted"})
+    registry["kursach.oit"] = (KursachScene, {"particles": 8000, "transparency": "oit"})
+    registry["kursach.gpu"] = (KursachScene, {"particles": 8000, "backend": "gpu"})
+    registry["kursach.interaction"] = (KursachScene, {"particles": 20000, "interaction": True})
+    return registry
+
+
+def resolve_scene(name):
+    """Имя сцены -> (класс, параметры). Для частиц допускается любое kursach.p<N>."""
+    if name.startswith("kursach.p"):
+        return KursachScene, {"particles": int(name[len("kursach.p"):])}
+    registry = build_registry(())
+    if name not in registry:
+        raise KeyError(f"unknown scene '{name}'")
+    return registry[name]
+
+
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
@@ -0,0 +1,184 @@
+# File: spatial.py
+# Замер BVH (spatial/bvh.py): построение, refit, пакеты лучей и запрос пирамидой
+# на миллионе примитивов - треугольники плотного тора и AABB экземпляров.
+# Плюс пространственный хэш (spatial/hash.py): соседи и отталкивание частиц,
+# и сортировка по глубине (spatial/depth_sort.py) при вращении камеры.
+# Кластерное распределение источников света (spatial/clusters.py) от 1 до 1024.
+# Иерархия преобразований (spatial/scene_graph.py): полный пересчёт, сдвиг 1%
+# поддеревьев и кадр без движения.
+#
+#   python -m bench.spatial [--prims 1000000] [--rays 100000] [--particles 100000] [--out spatial.json]
+import argparse
+import json
+
+import numpy as np
+
+from bench.meshes import dense_torus, timed
+from spatial.bvh import BVH, TriangleBVH, frustum_planes
+from spatial.hash import SpatialHash, separation
+from spatial.depth_sort import SORT_MODES, DepthSorter
+from spatial.clusters import ClusterGrid
+from spatial.scene_graph import SceneGraph
+
+LIGHT_COUNTS = (1, 4, 16, 64, 256, 1024)
+
+
+def perspective_view(fov_deg, aspect, near, far, eye, center):
+    """Матрица проекция * вид (строки - как в математике) для запроса пирамидой."""
+    f = 1.0 / np.tan(np.radians(fov_deg) / 2.0)
+    proj = np.array([[f / aspect, 0, 0, 0], [0, f, 0, 0],
+                     [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)], [0, 0, -1, 0]])
+    eye, center = np.asarray(eye, dtype=np.float64), np.asarray(center, dtype=np.float64)
+    fwd = (center - eye) / np.linalg.norm(center - eye)
+    right = np.cross(fwd, [0.0, 1.0, 0.0])
+    right /= np.linalg.norm(right)
+    up = np.cross(right, fwd)
+    view = np.eye(4)
+    view[0, :3], view[1, :3], view[2, :3] = right, up, -fwd
+    view[:3, 3] = -view[:3, :3] @ eye
+    return proj @ view
+
+
+def instance_boxes(count, rng, extent=1000.0):
+    centers = rng.random((count, 3)) * extent - extent / 2
+    half = rng.random((count, 3)) * 2.0 + 0.5
+    return centers - half, centers + half
+
+
+def run_case(name, bvh, build_ms, origins, dirs, planes, moved):
+    results = {"primitives": len(bvh.order), "nodes": int(bvh.node_count), "depth": bvh.depth, "build_ms": build_ms}
+    (t, hit), results["rays_ms"] = timed(bvh.intersect_rays, origins, dirs)
+    results["rays_per_s"] = len(origins) / results["rays_ms"] * 1000.0
+    results["ray_hits"] = int((hit >= 0).sum())
+    visible, results["frustum_ms"] = timed(bvh.query_frustum, planes)
+    results["frustum_visible"] = int(len(visible))
+    _, results["refit_ms"] = timed(moved)
+    print(f"{name:<10} nodes {results['nodes']:8d} depth {results['depth']:3d}  "
+          f"build {results['build_ms']:8.1f} ms  refit {results['refit_ms']:7.1f} ms  "
+          f"rays {results['rays_per_s'] / 1e3:7.1f} Krays/s ({results['ray_hits']} hits)  "
+          f"frustum {results['frustum_ms']:7.1f} ms ({results['frustum_visible']} visible)")
+    return results
+
+
+def run_hash(count, rng, neighbors=8.0):
+    """Частицы в кубе; радиус взаимодействия подобран под среднее число соседей."""
+    pos = rng.random((count, 3)) * 20.0 - 10.0
+    radius = (neighbors * 8000.0 / count * 3.0 / (4.0 * np.pi)) ** (1.0 / 3.0)
+    grid, build_ms = timed(SpatialHash(radius).build, pos)
+    (i, _, _, _), pairs_ms = timed(grid.pairs, pos, radius)
+    _, forces_ms = timed(separation, pos, grid, radius, 1.0)
+    results = {"particles": count, "radius": radius, "build_ms": build_ms, "pairs_ms": pairs_ms,
+               "separation_ms": forces_ms, "neighbors": 2.0 * len(i) / count}
+    print(f"{'hash':<10} particles {count:8d}  build {build_ms:7.1f} ms  pairs {pairs_ms:7.1f} ms  "
+          f"separation {forces_ms:7.1f} ms  ({results['neighbors']:.1f} neighbors/particle)")
+    return results
+
+
+def run_sort(count, rng, frames=30, step_deg=0.5):
+    """Облако частиц, камера поворачивается на step_deg за кадр; медиана по кадрам."""
+    pos = rng.normal(size=(count, 3)) * 5.0
+    results = {}
+    for mode in SORT_MODES:
+        sorter, times = DepthSorter(mode), []
+        for frame in range(frames):
+            a = np.radians(step_deg * frame)
+            depth = pos[:, 0] * np.sin(a) + pos[:, 2] * np.cos(a)
+            times.append(timed(sorter.sort, depth)[1])
+        results[mode] = float(np.median(times[1:]))
+    print(f"{'sort':<10} particles {count:8d}  " +
+          "  ".join(f"{mode} {ms:6.2f} ms" for mode, ms in results.items()))
+    return results
+
+
+def run_clusters(rng, width=1200, height=800, radius=250.0):
+    """Источники в пирамиде камеры (пространство вида), сетка 16x9x24."""
+    grid = ClusterGrid()
+    # Камера в начале координат смотрит вдоль -Z: произведение равно проекции
+    grid.configure(perspective_view(50.0, width / height, 1.0, 5000.0, (0.0, 0.0, 0.0), (0.0, 0.0, -1.0)),
+                   width, height)
+    results = {}
+    for count in LIGHT_COUNTS:
+        depth = rng.uniform(100.0, 3000.0, count)
+        centers = np.column_stack([rng.uniform(-0.5, 0.5, (count, 2)) * depth[:, None], -depth])
+        radii = np.full(count, radius)
+        times = [timed(grid.assign, centers, radii)[1] for _ in range(5)]
+        clusters, indices = grid.assign(centers, radii)
+        results[count] = {"assign_ms": float(np.median(times)), "pairs": int(len(indices)),
+                          "max_per_cluster": int(clusters[:, 1].max())}
+    print(f"{'clusters':<10} " + "  ".join(f"{n}: {r['assign_ms']:5.2f} ms/{r['pairs']}" for n, r in results.items()))
+    return results
+
+
+def random_rigid(count, rng):
+    """Случайные повороты со сдвигом (N, 4, 4)."""
+    q, r = np.linalg.qr(rng.normal(size=(count, 3, 3)))
+    m = np.tile(np.eye(4), (count, 1, 1))
+    m[:, :3, :3] = q * np.sign(np.diagonal(r, axis1=1, axis2=2))[:, None, :]
+    m[:, :3, 3] = rng.uniform(-10.0, 10.0, (count, 3))
+    return m
+
+
+def run_scene_graph(count, rng, moved=0.01):
+    """Лес из count узлов (родитель - случайный из предыдущих, 1% корней)."""
+    parents = np.floor(rng.random(count) * np.arange(count)).astype(np.int64)
+    parents[rng.random(count) < 0.01] = -1
+    parents[0] = -1
+    graph = SceneGraph(count)
+    graph.add_many(parents, random_rigid(count, rng))
+    _, full_ms = timed(graph.update)
+    nodes = rng.choice(count, max(1, int(count * moved)), replace=False)
+    graph.set_local(nodes, random_rigid(len(nodes), rng))
+    changed, moved_ms = timed(graph.update)
+    _, idle_ms = timed(graph.update)
+    r = {"levels": len(graph.levels), "full_ms": full_ms, "moved_ms": moved_ms,
+         "recomputed": int(len(changed)), "idle_ms": idle_ms}
+    print(f"{'graph':<10} {count} nodes, {r['levels']} levels  full {full_ms:7.2f} ms  "
+          f"move {len(nodes)} -> {r['recomputed']} nodes {moved_ms:7.2f} ms  idle {idle_ms:6.3f} ms")
+    return r
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BVH benchmark")
+    parser.add_argument("--prims", type=int, default=1000000)
+    parser.add_argument("--rays", type=int, default=100000)
+    parser.add_argument("--particles", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--out", help="save results as JSON")
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    results = {}
+
+    # --- Экземпляры: случайные AABB в кубе 1000^3 ---
+    bmin, bmax = instance_boxes(args.prims, rng)
+    bvh, build_ms = timed(BVH, bmin, bmax)
+    origins = rng.random((args.rays, 3)) * 1000.0 - 500.0
+    dirs = rng.normal(size=(args.rays, 3))
+    planes = frustum_planes(perspective_view(50.0, 1.5, 1.0, 600.0, (0.0, 0.0, 700.0), (0.0, 0.0, 0.0)))
+    shift = rng.normal(size=(args.prims, 3)).astype(np.float32)
+    results["instances"] = run_case("instances", bvh, build_ms, origins, dirs, planes,
+                                    lambda: bvh.refit(bmin + shift, bmax + shift))
+
+    # --- Треугольники меша ---
+    vertices, tris = dense_torus(args.prims)
+    tri_bvh, build_ms = timed(TriangleBVH, vertices, tris)
+    # Лучи снаружи в сторону тора, часть промахивается через дырку
+    origins = rng.normal(size=(args.rays, 3)) * 300.0
+    dirs = rng.normal(size=(args.rays, 3)) * 60.0 - origins
+    planes = frustum_planes(perspective_view(30.0, 1.5, 1.0, 1000.0, (0.0, 100.0, 500.0), (100.0, 0.0, 0.0)))
+    wobble = vertices.copy()
+    wobble[:, :3] += vertices[:, 3:6] * 2.0
+    results["triangles"] = run_case("triangles", tri_bvh, build_ms, origins, dirs, planes,
+                                    lambda: tri_bvh.update_positions(wobble))
+    results["hash"] = run_hash(args.particles, rng)
+    results["sort"] = run_sort(args.particles, rng)
+    results["clusters"] = run_clusters(rng)
+    results["scene_graph"] = run_scene_graph(args.particles, rng)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"prims": args.prims, "rays": args.rays, "particles": args.particles, "cases": results}, f, indent=2)
+        print(f"[INFO] results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
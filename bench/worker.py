@@ -0,0 +1,118 @@
+# File: worker.py
+# Прогон одной сцены в отдельном процессе (чтобы пиковый RSS относился к сцене).
+# Результат - одна JSON-строка в stdout.
+import argparse
+import gc
+import hashlib
+import json
+import resource
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from bench.headless import SimClock, create_context, gl_info, read_pixels
+from bench.replay import InputLog
+from bench.scenes import resolve_scene, seed_everything
+
+
+def frame_time_stats(times_ms):
+    t = np.asarray(times_ms, dtype=np.float64)
+    total_s = t.sum() / 1000.0
+    return {
+        "fps": len(t) / total_s if total_s > 0 else 0.0,
+        "frame_ms_mean": float(t.mean()),
+        "frame_ms_p50": float(np.percentile(t, 50)),
+        "frame_ms_p95": float(np.percentile(t, 95)),
+        "frame_ms_p99": float(np.percentile(t, 99)),
+        "frame_ms_max": float(t.max()),
+    }
+
+
+def run_scene(name, frames, warmup=10, seed=1234, alloc_frames=20, replay=None, frame_out=None):
+    log = InputLog.load(replay) if replay else None
+    if log is not None:
+        seed = log.seed
+    seed_everything(seed)
+    clock = SimClock()
+    cls, params = resolve_scene(name)
+    scene = cls(name, clock, frames=warmup + frames + alloc_frames, **params)
+    create_context(*cls.size)
+    scene.setup()
+    if log is not None:
+        scene.attach_replay(log)
+
+    frame = 0
+    for _ in range(warmup):
+        scene.step(frame)
+        frame += 1
+
+    # --- Время кадра ---
+    gc.collect()
+    gc_before = [s["collections"] for s in gc.get_stats()]
+    blocks_before = sys.getallocatedblocks()
+    times_ms = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        if scene.step(frame) is False:
+            break
+        times_ms.append((time.perf_counter() - t0) * 1000.0)
+        frame += 1
+    gc_after = [s["collections"] for s in gc.get_stats()]
+    blocks_after = sys.getallocatedblocks()
+
+    # --- Python-аллокации (отдельный проход: tracemalloc сильно замедляет кадр) ---
+    transient = []
+    tracemalloc.start()
+    for _ in range(alloc_frames):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        if scene.step(frame) is False:
+            break
+        _, peak = tracemalloc.get_traced_memory()
+        transient.append(peak - current)
+        frame += 1
+    tracemalloc.stop()
+
+    w, h = cls.size
+    pixels = read_pixels(w, h)
+    if frame_out:
+        Image.fromarray(pixels).save(frame_out)
+    result = {
+        "scene": name,
+        "frames": len(times_ms),
+        "warmup": warmup,
+        "seed": seed,
+        "replay": replay,
+        "size": [w, h],
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "gc_collections": [a - b for a, b in zip(gc_after, gc_before)],
+        "py_blocks_retained": blocks_after - blocks_before,
+        "py_alloc_bytes_per_frame": float(np.mean(transient)) if transient else 0.0,
+        "frame_hash": hashlib.sha1(pixels.tobytes()).hexdigest(),
+        "gl": gl_info(),
+    }
+    result.update(frame_time_stats(times_ms))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="run one benchmark scene")
+    parser.add_argument("scene")
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--alloc-frames", type=int, default=20)
+    parser.add_argument("--replay", help="input log recorded with --record")
+    parser.add_argument("--frame-out", help="save the last frame as PNG")
+    args = parser.parse_args(argv)
+    result = run_scene(args.scene, args.frames, args.warmup, args.seed, args.alloc_frames, args.replay,
+                       args.frame_out)
+    # Лабы печатают в stdout, поэтому результат идёт последней строкой с маркером
+    sys.stdout.write("\nBENCH_RESULT " + json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# File: gpu.py
+# Кэш примитивов на GPU: меш из primitives.py загружается один раз (VBO + EBO)
+# и дальше только рисуется. Пачка из B наборов параметров лежит в одном
+# буфере; набор выбирается базовой вершиной b * V без копирования индексов.
+# draw() - для фиксированного конвейера (lab1-lab3): указатели клиентских
+# массивов на раскладку (позиция, нормаль, uv) с шагом 32 байта.
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+
+from geometry.primitives import FLOATS_PER_VERTEX, generate
+
+STRIDE = FLOATS_PER_VERTEX * 4
+MODES = {"triangles": GL_TRIANGLES, "lines": GL_LINES}
+
+
+class GpuMesh:
+    def __init__(self, mesh):
+        self.mode = MODES[mesh.mode]
+        self.members = len(mesh)
+        self.vertex_count = mesh.vertex_count
+        self.index_count = len(mesh.indices)
+        self.vbo, self.ebo = glGenBuffers(2)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, mesh.vertices.nbytes, mesh.vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, mesh.indices.nbytes, mesh.indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def draw(self, member=0, normals=True, texcoords=False):
+        """Набор member пачки через клиентские массивы фиксированного конвейера."""
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, STRIDE, ctypes.c_void_p(0))
+        if normals:
+            glEnableClientState(GL_NORMAL_ARRAY)
+            glNormalPointer(GL_FLOAT, STRIDE, ctypes.c_void_p(12))
+        if texcoords:
+            glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+            glTexCoordPointer(2, GL_FLOAT, STRIDE, ctypes.c_void_p(24))
+        glDrawElementsBaseVertex(self.mode, self.index_count, GL_UNSIGNED_INT, None,
+                                 member * self.vertex_count)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def delete(self):
+        glDeleteBuffers(2, [self.vbo, self.ebo])
+
+
+def _key(name, params):
+    return name, tuple(sorted((k, tuple(np.ravel(v).tolist())) for k, v in params.items()))
+
+
+class MeshCache:
+    """GpuMesh по имени примитива и параметрам; создаётся при первом запросе
+    (нужен текущий контекст GL)."""
+    def __init__(self):
+        self.meshes = {}
+
+    def get(self, name, **params):
+        key = _key(name, params)
+        mesh = self.meshes.get(key)
+        if mesh is None:
+            mesh = self.meshes[key] = GpuMesh(generate(name, **params))
+        return mesh
+
+    def clear(self):
+        for mesh in self.meshes.values():
+            mesh.delete()
+        self.meshes = {}
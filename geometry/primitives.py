@@ -0,0 +1,297 @@
+# File: primitives.py
+# Процедурные примитивы без циклов по вершинам. Каждая функция строит сразу
+# пачку мешей одной топологии: размеры (радиусы, высоты) - скаляры или
+# массивы длины B, число сегментов общее. Результат - Mesh с вершинами
+# (B, V, 8) в раскладке lab3_new (позиция, нормаль, uv) и общими индексами.
+#
+# Оси - как у GLU/GLUT: тела вращения вокруг Z от z = 0, точка окружности
+# x = r * sin(угол), y = r * cos(угол). Сплошные варианты - треугольники
+# с нормалями наружу; каркасные (wire_*) - отрезки (mode "lines"):
+# wire_cylinder / wire_cone повторяют gluCylinder с GLU_LINE, wire_torus -
+# glutWireTorus (freeglut 3) вплоть до округления float32.
+import numpy as np
+
+FLOATS_PER_VERTEX = 8
+
+
+class Mesh:
+    """Пачка мешей одной топологии: vertices (B, V, 8) float32, indices (I,)
+    uint32 - локальные номера вершин, общие для всех B; mode - "triangles"
+    или "lines"."""
+    def __init__(self, vertices, indices, mode="triangles"):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        self.indices = np.ascontiguousarray(indices, dtype=np.uint32).reshape(-1)
+        self.mode = mode
+
+    def __len__(self):
+        return len(self.vertices)
+
+    def __getitem__(self, i):
+        """(vertices (V, 8), indices) одного набора параметров."""
+        return self.vertices[i], self.indices
+
+    @property
+    def vertex_count(self):
+        return self.vertices.shape[1]
+
+    def concatenate(self):
+        """Все наборы одним буфером: индексы набора b сдвинуты на b * V."""
+        b, v = self.vertices.shape[:2]
+        offsets = (np.arange(b, dtype=np.uint32) * np.uint32(v))[:, None]
+        return self.vertices.reshape(-1, FLOATS_PER_VERTEX), (self.indices[None] + offsets).reshape(-1)
+
+
+def _params(*values):
+    """Размеры -> массивы (B, 1, 1) float64 общей длины B."""
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in values])
+    return [a.reshape(-1, 1, 1) for a in arrays]
+
+
+def _pack(pos, normal, uv):
+    """(B, R, C, 3), (.., 3), (.., 2) с broadcasting -> (B, R * C, 8)."""
+    shape = np.broadcast_shapes(pos.shape[:-1], normal.shape[:-1], uv.shape[:-1])
+    out = np.empty(shape + (FLOATS_PER_VERTEX,), dtype=np.float32)
+    out[..., 0:3] = pos
+    out[..., 3:6] = normal
+    out[..., 6:8] = uv
+    return out.reshape(shape[0], -1, FLOATS_PER_VERTEX)
+
+
+def _circle(slices):
+    """sin и cos углов 2*pi*i/slices для i = 0..slices (последний равен первому).
+    Угол округляется до float32 до синуса - как в GLU."""
+    angle = (2.0 * np.pi * np.arange(slices) / slices).astype(np.float32).astype(np.float64)
+    s, c = np.sin(angle).astype(np.float32), np.cos(angle).astype(np.float32)
+    return np.append(s, s[0]), np.append(c, c[0])
+
+
+def _grid_triangles(rows, cols, first_pole=False, last_pole=False, flip=False):
+    """Треугольники сетки rows x cols вершин (номер = строка * cols + столбец).
+    Для строк-полюсов (все вершины в одной точке) вырожденные треугольники
+    не строятся. Обход - по правилу (строка+1) x (столбец+1) наружу."""
+    r, c = np.meshgrid(np.arange(rows - 1), np.arange(cols - 1), indexing="ij")
+    a = r * cols + c
+    b = a + cols
+    upper = np.stack([a, b, b + 1], axis=-1)
+    lower = np.stack([a, b + 1, a + 1], axis=-1)
+    parts = [upper[:-1] if last_pole else upper, lower[1:] if first_pole else lower]
+    tris = np.concatenate([p.reshape(-1, 3) for p in parts])
+    return tris[:, ::-1] if flip else tris
+
+
+def _grid_lines(rows, cols, wrap_rows=False, wrap_cols=False, ring_rows=None, line_cols=None):
+    """Отрезки сетки: вдоль строк (кольца ring_rows) и вдоль столбцов
+    (линии line_cols); wrap_* замыкает последний элемент на первый."""
+    ring_rows = np.arange(rows) if ring_rows is None else np.asarray(ring_rows)
+    line_cols = np.arange(cols) if line_cols is None else np.asarray(line_cols)
+    c0 = np.arange(cols if wrap_rows else cols - 1)
+    rings = np.stack(np.broadcast_arrays(ring_rows[:, None] * cols + c0, ring_rows[:, None] * cols + (c0 + 1) % cols), -1)
+    r0 = np.arange(rows if wrap_cols else rows - 1)
+    lines = np.stack(np.broadcast_arrays(line_cols[:, None] + r0 * cols, line_cols[:, None] + (r0 + 1) % rows * cols), -1)
+    return np.concatenate([rings.reshape(-1, 2), lines.reshape(-1, 2)])
+
+
+def _merge(parts, mode="triangles"):
+    """Части одной пачки [(vertices (B, V, 8), indices)] -> один Mesh."""
+    vertices, indices, offset = [], [], 0
+    for v, i in parts:
+        vertices.append(v)
+        indices.append(np.asarray(i).reshape(-1) + offset)
+        offset += v.shape[1]
+    return Mesh(np.concatenate(vertices, axis=1), np.concatenate(indices), mode)
+
+
+# --- Сплошные ---
+def _tube(base_radius, top_radius, height, slices, stacks, z0=0.0):
+    """Боковая поверхность усечённого конуса: (stacks + 1) x (slices + 1) вершин."""
+    base, top, h, z0 = _params(base_radius, top_radius, height, z0)
+    s, c = _circle(slices)
+    t = np.linspace(0.0, 1.0, stacks + 1)[None, :, None]
+    radius = base + (top - base) * t
+    z = z0 + h * t
+    # Нормаль наклонной стенки: (h * радиальное направление, base - top)
+    length = np.sqrt(h * h + (base - top) ** 2)
+    pos = np.stack(np.broadcast_arrays(radius * s, radius * c, z), -1)
+    normal = np.stack(np.broadcast_arrays((h / length) * s, (h / length) * c, (base - top) / length), -1)
+    uv = np.stack(np.broadcast_arrays(np.arange(slices + 1)[None, None, :] / slices, t), -1)
+    pole = bool(np.all(top == 0.0))
+    return _pack(pos, normal, uv), _grid_triangles(stacks + 1, slices + 1, last_pole=pole)
+
+
+def _disk(inner_radius, outer_radius, slices, loops, z=0.0, facing=1.0):
+    """Кольцо в плоскости z, нормаль (0, 0, facing); uv - проекция на квадрат."""
+    inner, outer, z = _params(inner_radius, outer_radius, z)
+    s, c = _circle(slices)
+    t = np.linspace(0.0, 1.0, loops + 1)[None, :, None]
+    radius = inner + (outer - inner) * t
+    x, y = radius * s, radius * c
+    pos = np.stack(np.broadcast_arrays(x, y, z + 0 * x), -1)
+    normal = np.broadcast_to(np.array([0.0, 0.0, facing]), pos.shape)
+    uv = np.stack([0.5 + x / (2.0 * outer), 0.5 + y / (2.0 * outer)], -1)
+    pole = bool(np.all(inner == 0.0))
+    return _pack(pos, normal, uv), _grid_triangles(loops + 1, slices + 1, first_pole=pole, flip=facing > 0)
+
+
+def disk(inner_radius, outer_radius, slices=32, loops=1):
+    """Диск (кольцо) в плоскости z = 0 с нормалью +Z, как gluDisk."""
+    return _merge([_disk(inner_radius, outer_radius, slices, loops)])
+
+
+def cylinder(radius, height, slices=32, stacks=1, caps=True, center=False, top_radius=None):
+    """Цилиндр вдоль Z от 0 до height (center - от -height/2), с крышками.
+    top_radius - радиус верхнего торца (усечённый конус), по умолчанию radius."""
+    radius = np.asarray(radius, dtype=np.float64)
+    top = radius if top_radius is None else np.asarray(top_radius, dtype=np.float64)
+    z0 = -np.asarray(height, dtype=np.float64) / 2.0 if center else 0.0
+    parts = [_tube(radius, top, height, slices, stacks, z0)]
+    if caps:
+        parts.append(_disk(0.0, radius, slices, 1, z0, -1.0))
+        if not np.all(top == 0.0):
+            parts.append(_disk(0.0, top, slices, 1, np.asarray(z0) + height, 1.0))
+    return _merge(parts)
+
+
+def cone(radius, height, slices=32, stacks=1, caps=True):
+    """Конус вдоль Z: основание в z = 0, вершина в z = height."""
+    return cylinder(radius, height, slices, stacks, caps, top_radius=0.0)
+
+
+def sphere(radius, slices=32, stacks=16):
+    """Сфера с полюсами на оси Z."""
+    (r,) = _params(radius)
+    s, c = _circle(slices)
+    phi = np.pi * np.arange(stacks + 1) / stacks
+    ring, z = np.sin(phi)[None, :, None], -np.cos(phi)[None, :, None]
+    normal = np.stack(np.broadcast_arrays(ring * s, ring * c, z), -1)
+    uv = np.stack(np.broadcast_arrays(np.arange(slices + 1)[None, None, :] / slices,
+                                      (np.arange(stacks + 1) / stacks)[None, :, None]), -1)
+    tris = _grid_triangles(stacks + 1, slices + 1, first_pole=True, last_pole=True)
+    return _merge([(_pack(r[..., None] * normal, normal, uv), tris)])
+
+
+def _torus_grid(radius_major, radius_minor, radial_segments, tubular_segments, axis):
+    major, minor = _params(radius_major, radius_minor)
+    a = 2.0 * np.pi * np.arange(radial_segments + 1)[None, :, None] / radial_segments
+    b = 2.0 * np.pi * np.arange(tubular_segments + 1)[None, None, :] / tubular_segments
+    normal = np.stack(np.broadcast_arrays(np.cos(a) * np.cos(b), np.sin(a) * np.cos(b), np.sin(b)), -1)
+    center = np.stack(np.broadcast_arrays(np.cos(a) * major, np.sin(a) * major, 0.0 * b), -1)
+    pos = center + minor[..., None] * normal
+    if axis == "y":
+        # Поворот на -90 градусов вокруг X: ось тора Z -> Y
+        pos, normal = (p[..., [0, 2, 1]] * np.array([1.0, 1.0, -1.0]) for p in (pos, normal))
+    uv = np.stack(np.broadcast_arrays(a / (2.0 * np.pi), b / (2.0 * np.pi)), -1)
+    return _pack(pos, normal, uv)
+
+
+def torus(radius_major, radius_minor, radial_segments=48, tubular_segments=32, axis="z"):
+    """Тор вокруг оси axis ("z" - как glutSolidTorus, "y" - лежит в плоскости XZ);
+    u - по большой окружности, v - по сечению."""
+    vertices = _torus_grid(radius_major, radius_minor, radial_segments, tubular_segments, axis)
+    return _merge([(vertices, _grid_triangles(radial_segments + 1, tubular_segments + 1))])
+
+
+def _plane_grid(size_x, size_z, segments_x, segments_z, repeat_tex):
+    sx, sz, repeat = _params(size_x, size_x if size_z is None else size_z, repeat_tex)
+    u = np.linspace(0.0, 1.0, segments_x + 1)[None, None, :]
+    v = np.linspace(0.0, 1.0, segments_z + 1)[None, :, None]
+    pos = np.stack(np.broadcast_arrays((u - 0.5) * sx, 0.0 * u * v, (v - 0.5) * sz), -1)
+    normal = np.broadcast_to(np.array([0.0, 1.0, 0.0]), pos.shape)
+    uv = np.stack(np.broadcast_arrays(u * repeat, (1.0 - v) * repeat), -1)
+    return _pack(pos, normal, uv)
+
+
+def plane(size_x, size_z=None, segments_x=1, segments_z=1, repeat_tex=1.0):
+    """Прямоугольная сетка в плоскости XZ с центром в начале координат, нормаль +Y;
+    текстура повторяется repeat_tex раз."""
+    vertices = _plane_grid(size_x, size_z, segments_x, segments_z, repeat_tex)
+    return _merge([(vertices, _grid_triangles(segments_z + 1, segments_x + 1))])
+
+
+# --- Каркасные ---
+def wire_cylinder(base_radius, top_radius, height, slices=32, stacks=1):
+    """Линии gluCylinder в режиме GLU_LINE: stacks + 1 колец и slices образующих.
+    Промежуточные значения округляются до float32 в том же порядке, что в GLU."""
+    base, top, h = _params(base_radius, top_radius, height)
+    s, c = _circle(slices)
+    delta = (base - top).astype(np.float32)
+    t = (np.arange(stacks + 1, dtype=np.float32) / np.float32(stacks))[None, :, None]
+    radius = (base - (delta * t).astype(np.float64)).astype(np.float32)
+    z = (np.arange(stacks + 1)[None, :, None] * h / stacks).astype(np.float32)
+    pos = np.stack(np.broadcast_arrays(radius * s, radius * c, z), -1)
+    length = np.sqrt(h * h + (base - top) ** 2)
+    normal = np.stack(np.broadcast_arrays((h / length) * s, (h / length) * c, (base - top) / length), -1)
+    uv = np.stack(np.broadcast_arrays(np.arange(slices + 1)[None, None, :] / slices, t), -1)
+    lines = _grid_lines(stacks + 1, slices + 1, line_cols=np.arange(slices))
+    return Mesh(_pack(pos, normal, uv), lines, "lines")
+
+
+def wire_cone(radius, height, slices=32, stacks=1):
+    """Каркас конуса - gluCylinder с нулевым верхним радиусом."""
+    return wire_cylinder(radius, 0.0, height, slices, stacks)
+
+
+def _glut_circle(n):
+    """fghCircleTable из freeglut: шаг угла в float32, синус в double."""
+    angle = np.float32(2.0) * np.float32(np.pi) / np.float32(n)
+    steps = (angle * np.arange(abs(n), dtype=np.float32)).astype(np.float64)
+    s, c = np.sin(steps).astype(np.float32), np.cos(steps).astype(np.float32)
+    s[0], c[0] = 0.0, 1.0
+    return s, c
+
+
+def wire_torus(radius_major, radius_minor, radial_segments=48, tubular_segments=32):
+    """Каркас glutWireTorus(radius_minor, radius_major, tubular_segments,
+    radial_segments): кольца по сечению и по большой окружности, ось Z."""
+    major, minor = (p.astype(np.float32) for p in _params(radius_major, radius_minor))
+    spsi, cpsi = (a[None, :, None] for a in _glut_circle(radial_segments))
+    sphi, cphi = (a[None, None, :] for a in _glut_circle(-tubular_segments))
+    ring = major + cphi * minor
+    pos = np.stack(np.broadcast_arrays(cpsi * ring, spsi * ring, sphi * minor), -1)
+    normal = np.stack(np.broadcast_arrays(cpsi * cphi, spsi * cphi, sphi + 0 * cpsi), -1)
+    uv = np.stack(np.broadcast_arrays(np.arange(radial_segments)[None, :, None] / radial_segments,
+                                      np.arange(tubular_segments)[None, None, :] / tubular_segments), -1)
+    lines = _grid_lines(radial_segments, tubular_segments, wrap_rows=True, wrap_cols=True)
+    return Mesh(_pack(pos, normal, uv), lines, "lines")
+
+
+def wire_sphere(radius, slices=32, stacks=16):
+    """Параллели и меридианы сферы (полюса на оси Z)."""
+    mesh = sphere(radius, slices, stacks)
+    lines = _grid_lines(stacks + 1, slices + 1, ring_rows=np.arange(1, stacks), line_cols=np.arange(slices))
+    return Mesh(mesh.vertices, lines, "lines")
+
+
+def wire_disk(inner_radius, outer_radius, slices=32, loops=1):
+    """Окружности и радиальные отрезки диска."""
+    vertices, _ = _disk(inner_radius, outer_radius, slices, loops)
+    lines = _grid_lines(loops + 1, slices + 1, line_cols=np.arange(slices))
+    return Mesh(vertices, lines, "lines")
+
+
+def wire_plane(size_x, size_z=None, segments_x=1, segments_z=1, repeat_tex=1.0):
+    """Линии сетки в плоскости XZ."""
+    vertices = _plane_grid(size_x, size_z, segments_x, segments_z, repeat_tex)
+    return Mesh(vertices, _grid_lines(segments_z + 1, segments_x + 1), "lines")
+
+
+PRIMITIVES = {
+    "cone": cone,
+    "cylinder": cylinder,
+    "disk": disk,
+    "sphere": sphere,
+    "torus": torus,
+    "plane": plane,
+    "wire_cone": wire_cone,
+    "wire_cylinder": wire_cylinder,
+    "wire_disk": wire_disk,
+    "wire_sphere": wire_sphere,
+    "wire_torus": wire_torus,
+    "wire_plane": wire_plane,
+}
+
+
+def generate(name, **params):
+    """Примитив по имени из PRIMITIVES; размеры - скаляры или массивы (пачка)."""
+    if name not in PRIMITIVES:
+        raise KeyError(f"unknown primitive '{name}'")
+    return PRIMITIVES[name](**params)
@@ -0,0 +1,233 @@
+# File: gpu_particles.py
+# Симуляция частиц на GPU через transform feedback.
+# Состояние частицы - два vec4: (позиция, возраст) и (скорость, срок жизни);
+# два буфера меняются ролями каждый шаг (ping-pong). Вершинный шейдер
+# рождает частицы по запросам, интегрирует движение и отражает их от
+# плоскости x = PLANE_X_POS; цвет по возрасту считается при отрисовке.
+# С CPU передаются только запросы рождения: номера слотов и параметры
+# (доля высоты, угол, скорость, срок жизни). Какие слоты свободны, CPU знает
+# сам - возраст ведётся параллельно в float32, как и на GPU.
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+
+STATE_DTYPE = np.dtype([("pos_life", "<f4", 4), ("vel_max_life", "<f4", 4)])
+
+UPDATE_VS = """\
+#version 330 core
+layout (location = 0) in vec4 inPosLife;
+layout (location = 1) in vec4 inVelMaxLife;
+out vec4 outPosLife;
+out vec4 outVelMaxLife;
+
+uniform isamplerBuffer spawnSlots;   // номера слотов по возрастанию
+uniform samplerBuffer spawnParams;   // (доля высоты, угол, скорость, срок жизни)
+uniform int spawnCount;
+uniform float dt;
+uniform vec3 gravity;
+uniform vec3 coneApex;
+uniform float coneHeight;
+uniform float coneRadius;
+uniform float planeX;
+
+int findSpawn(int id) {
+    int lo = 0, hi = spawnCount;
+    while (lo < hi) {
+        int mid = (lo + hi) / 2;
+        if (texelFetch(spawnSlots, mid).r < id) lo = mid + 1; else hi = mid;
+    }
+    return (lo < spawnCount && texelFetch(spawnSlots, lo).r == id) ? lo : -1;
+}
+
+void main() {
+    vec3 pos = inPosLife.xyz;
+    float life = inPosLife.w;
+    vec3 vel = inVelMaxLife.xyz;
+    float maxLife = inVelMaxLife.w;
+
+    int s = findSpawn(gl_VertexID);
+    if (s >= 0) {
+        // Точка на боковой поверхности конуса, скорость - по её нормали
+        vec4 p = texelFetch(spawnParams, s);
+        vec2 dir = vec2(cos(p.y), sin(p.y));
+        pos = coneApex + vec3(p.x * coneRadius * dir.x, -p.x * coneHeight, p.x * coneRadius * dir.y);
+        float slant = length(vec2(coneRadius, coneHeight));
+        vel = vec3(dir.x * coneHeight / slant, coneRadius / slant, dir.y * coneHeight / slant) * p.z;
+        life = 0.0;
+        maxLife = p.w;
+    }
+    if (life < maxLife) {
+        vel += gravity * dt;
+        pos += vel * dt;
+        if (pos.x >= planeX) {
+            pos.x = planeX - 0.01;
+            if (vel.x > 0.0)
+                vel.x = -0.8 * vel.x;
+        }
+        life += dt;
+    }
+    outPosLife = vec4(pos, life);
+    outVelMaxLife = vec4(vel, maxLife);
+}
+"""
+
+# Фрагментный шейдер пустой - при обновлении растеризация отключена
+UPDATE_FS = """\
+#version 330 core
+void main() { }
+"""
+
+DRAW_VS = """\
+#version 330 compatibility
+layout (location = 0) in vec4 posLife;
+layout (location = 1) in vec4 velMaxLife;
+uniform vec3 colorStart;
+uniform vec3 colorEnd;
+out vec3 vColor;
+void main() {
+    float t = posLife.w / velMaxLife.w;
+    vColor = mix(colorStart, colorEnd, t);
+    // Неактивные частицы уводятся за пределы отсечения
+    gl_Position = posLife.w < velMaxLife.w ? gl_ModelViewProjectionMatrix * vec4(posLife.xyz, 1.0)
+                                           : vec4(2.0, 2.0, 2.0, 1.0);
+}
+"""
+
+DRAW_FS = """\
+#version 330 compatibility
+in vec3 vColor;
+void main() { gl_FragColor = vec4(vColor, 1.0); }
+"""
+
+
+def _compile(source, shader_type):
+    shader = glCreateShader(shader_type)
+    glShaderSource(shader, source)
+    glCompileShader(shader)
+    if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+        raise RuntimeError(glGetShaderInfoLog(shader).decode())
+    return shader
+
+
+def link_program(vs_source, fs_source, varyings=()):
+    """Программа с выходами transform feedback (задаются до линковки)."""
+    program = glCreateProgram()
+    shaders = [_compile(vs_source, GL_VERTEX_SHADER), _compile(fs_source, GL_FRAGMENT_SHADER)]
+    for shader in shaders:
+        glAttachShader(program, shader)
+    if varyings:
+        names = (ctypes.c_char_p * len(varyings))(*[v.encode() for v in varyings])
+        glTransformFeedbackVaryings(program, len(varyings),
+                                    ctypes.cast(names, ctypes.POINTER(ctypes.POINTER(GLchar))),
+                                    GL_INTERLEAVED_ATTRIBS)
+    glLinkProgram(program)
+    if not glGetProgramiv(program, GL_LINK_STATUS):
+        raise RuntimeError(glGetProgramInfoLog(program).decode())
+    for shader in shaders:
+        glDeleteShader(shader)
+    return program
+
+
+class GPUParticles:
+    def __init__(self, count, cone_apex, cone_height, cone_radius, plane_x,
+                 color_start, color_end, gravity=(0.0, 0.0, 0.0)):
+        self.count = count
+        # Учёт свободных слотов на CPU - той же арифметикой float32, что в шейдере
+        self.active = np.zeros(count, dtype=bool)
+        self.life = np.zeros(count, dtype=np.float32)
+        self.max_life = np.zeros(count, dtype=np.float32)
+
+        self.update_program = link_program(UPDATE_VS, UPDATE_FS, ("outPosLife", "outVelMaxLife"))
+        self.draw_program = link_program(DRAW_VS, DRAW_FS)
+        self.buffers = glGenBuffers(2)
+        self.vaos = glGenVertexArrays(2)
+        zeros = np.zeros(count, dtype=STATE_DTYPE)
+        for vao, vbo in zip(self.vaos, self.buffers):
+            glBindVertexArray(vao)
+            glBindBuffer(GL_ARRAY_BUFFER, vbo)
+            glBufferData(GL_ARRAY_BUFFER, zeros.nbytes, zeros, GL_DYNAMIC_COPY)
+            for location in range(2):
+                glEnableVertexAttribArray(location)
+                glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, STATE_DTYPE.itemsize,
+                                      ctypes.c_void_p(location * 16))
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.current = 0
+
+        # Запросы рождения - буферные текстуры
+        self.spawn_buffers = glGenBuffers(2)
+        self.spawn_textures = glGenTextures(2)
+        for tex, buf, fmt in zip(self.spawn_textures, self.spawn_buffers, (GL_R32I, GL_RGBA32F)):
+            glBindBuffer(GL_TEXTURE_BUFFER, buf)
+            glBufferData(GL_TEXTURE_BUFFER, 16, None, GL_STREAM_DRAW)
+            glBindTexture(GL_TEXTURE_BUFFER, tex)
+            glTexBuffer(GL_TEXTURE_BUFFER, fmt, buf)
+        glBindTexture(GL_TEXTURE_BUFFER, 0)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+        p = self.update_program
+        glUseProgram(p)
+        glUniform1i(glGetUniformLocation(p, "spawnSlots"), 0)
+        glUniform1i(glGetUniformLocation(p, "spawnParams"), 1)
+        glUniform3fv(glGetUniformLocation(p, "gravity"), 1, np.asarray(gravity, dtype=np.float32))
+        glUniform3fv(glGetUniformLocation(p, "coneApex"), 1, np.asarray(cone_apex, dtype=np.float32))
+        glUniform1f(glGetUniformLocation(p, "coneHeight"), cone_height)
+        glUniform1f(glGetUniformLocation(p, "coneRadius"), cone_radius)
+        glUniform1f(glGetUniformLocation(p, "planeX"), plane_x)
+        glUseProgram(self.draw_program)
+        glUniform3fv(glGetUniformLocation(self.draw_program, "colorStart"), 1, np.asarray(color_start, dtype=np.float32))
+        glUniform3fv(glGetUniformLocation(self.draw_program, "colorEnd"), 1, np.asarray(color_end, dtype=np.float32))
+        glUseProgram(0)
+
+    def step(self, slots, params, dt):
+        """Рождение в слотах slots (по возрастанию) с параметрами params (k x 4), затем шаг dt."""
+        slots = np.asarray(slots, dtype=np.int32)
+        params = np.asarray(params, dtype=np.float32).reshape(-1, 4)
+        if len(slots):
+            glBindBuffer(GL_TEXTURE_BUFFER, self.spawn_buffers[0])
+            glBufferData(GL_TEXTURE_BUFFER, slots.nbytes, slots, GL_STREAM_DRAW)
+            glBindBuffer(GL_TEXTURE_BUFFER, self.spawn_buffers[1])
+            glBufferData(GL_TEXTURE_BUFFER, params.nbytes, params, GL_STREAM_DRAW)
+            glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+        glUseProgram(self.update_program)
+        glUniform1i(glGetUniformLocation(self.update_program, "spawnCount"), len(slots))
+        glUniform1f(glGetUniformLocation(self.update_program, "dt"), dt)
+        for unit, tex in enumerate(self.spawn_textures):
+            glActiveTexture(GL_TEXTURE0 + unit)
+            glBindTexture(GL_TEXTURE_BUFFER, tex)
+        glActiveTexture(GL_TEXTURE0)
+
+        glEnable(GL_RASTERIZER_DISCARD)
+        glBindVertexArray(self.vaos[self.current])
+        glBindBufferBase(GL_TRANSFORM_FEEDBACK_BUFFER, 0, self.buffers[1 - self.current])
+        glBeginTransformFeedback(GL_POINTS)
+        glDrawArrays(GL_POINTS, 0, self.count)
+        glEndTransformFeedback()
+        glBindBufferBase(GL_TRANSFORM_FEEDBACK_BUFFER, 0, 0)
+        glBindVertexArray(0)
+        glDisable(GL_RASTERIZER_DISCARD)
+        glUseProgram(0)
+        self.current = 1 - self.current
+
+        # Тот же учёт возраста на CPU
+        dt32 = np.float32(dt)
+        self.active[slots] = True
+        self.life[slots] = 0.0
+        self.max_life[slots] = params[:, 3]
+        self.life[self.active] += dt32
+        self.active &= self.life < self.max_life
+
+    def draw(self):
+        glUseProgram(self.draw_program)
+        glBindVertexArray(self.vaos[self.current])
+        glDrawArrays(GL_POINTS, 0, self.count)
+        glBindVertexArray(0)
+        glUseProgram(0)
+
+    def read_state(self):
+        """Состояние с GPU (для сверки с CPU): массив STATE_DTYPE."""
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffers[self.current])
+        data = glGetBufferSubData(GL_ARRAY_BUFFER, 0, self.count * STATE_DTYPE.itemsize)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        return np.frombuffer(bytes(data), dtype=STATE_DTYPE).copy()
@@ -1,11 +1,25 @@
+import os
 import sys
-import random
+import json
 import math
 import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLU import *
 from OpenGL.GLUT import *
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench.replay import install_recorder
+from spatial.collision import CollisionWorld, MeshCollider, PlaneColliders, SDFGrid
+from spatial.hash import SpatialHash, separation
+from spatial.depth_sort import DepthSorter, view_depth
+
+# Общий код с lab3_new: генераторы мешей препятствий и буферы OIT
+LAB3_NEW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab3_new")
+sys.path.append(LAB3_NEW_DIR)
+from shaders import OIT_OUTPUT, create_program
+from oit import WeightedBlendedOIT
+from gpu_particles import GPUParticles
+
 # --- Константы ---
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
@@ -27,72 +41,188 @@ PLANE_X_POS = 3.0
 COLOR_START = np.array([0.0, 1.0, 1.0]) 
 COLOR_END = np.array([1.0, 0.0, 1.0])   
 
+# Препятствия: примитивы lab3_new (масштаб 1:100) и пол - плоскость
+OBSTACLE_SCENE = os.path.join(LAB3_NEW_DIR, "scenes", "default.json")
+OBSTACLES = [
+    # (меш из OBSTACLE_SCENE, преобразование как в scene_format)
+    ("cone", [["translate", -4.5, -2.5, 0.0], ["rotate", -90.0, 1, 0, 0], ["scale", 0.01, 0.01, 0.01]]),
+    ("cylinder", [["translate", 0.0, -1.4, -4.5], ["rotate", -90.0, 1, 0, 0], ["scale", 0.01, 0.01, 0.01]]),
+    ("torus", [["translate", 0.0, 0.6, 0.0], ["scale", 0.01, 0.01, 0.01]]),
+]
+FLOOR_Y = -2.5
+SDF_RESOLUTION = 48
+
+# Взаимодействие частиц: мягкое отталкивание ближе INTERACTION_RADIUS
+INTERACTION_RADIUS = 0.15
+INTERACTION_STIFFNESS = 2.0
+
+# Прозрачность частиц: "opaque" - как раньше, с записью глубины;
+# "sorted" - альфа-смешивание от дальних к ближним; "oit" - weighted blended OIT
+TRANSPARENCY_MODES = ("opaque", "sorted", "oit")
+PARTICLE_ALPHA = 0.5
+PARTICLE_SORT = "radix"
+
+PARTICLE_OIT_VS = """\
+#version 330 compatibility
+out vec4 vColor;
+void main() {
+    vColor = gl_Color;
+    gl_Position = gl_ModelViewProjectionMatrix * gl_Vertex;
+}
+"""
+
+PARTICLE_OIT_FS = """\
+#version 330 compatibility
+in vec4 vColor;
+""" + OIT_OUTPUT + """
+void main() { writeOIT(vColor); }
+"""
+
 # Глобальные переменные
-particles = []
+particles = None
+collisions = None
+obstacles = None
+obstacles_enabled = False
+interaction_enabled = False
+neighbor_grid = SpatialHash(INTERACTION_RADIUS)
+transparency = "opaque"
+particle_sorter = DepthSorter(PARTICLE_SORT)
+oit_buffers = None
+oit_program = None
+# Симуляция: "cpu" - массивы NumPy, "gpu" - transform feedback (только
+# базовая сцена: без препятствий, взаимодействия и прозрачности)
+backend = "cpu"
+gpu_particles = None
+window_size = (WINDOW_WIDTH, WINDOW_HEIGHT)
 view_rot_x = 20.0
 view_rot_y = 0.0
 is_top_view = False
 
-class Particle:
-    def __init__(self):
-        self.active = False
-        self.pos = np.zeros(3)
-        self.vel = np.zeros(3)
-        self.life = 0.0
-        self.max_life = 1.0
-        self.color = np.zeros(3)
-
-    def spawn(self):
-        self.active = True
-        self.life = 0.0
-        self.max_life = random.uniform(5.0, 8.0)
-        
-        h_factor = random.random() 
-        current_h = h_factor * CONE_HEIGHT
-        current_r = h_factor * CONE_RADIUS
-        angle = random.uniform(0, 2 * math.pi)
-        
-        lx = current_r * math.cos(angle)
-        ly = -current_h 
-        lz = current_r * math.sin(angle)
-        
-        self.pos = CONE_APEX + np.array([lx, ly, lz])
-        
+def spawn_requests(active, count):
+    """Первые count свободных слотов и параметры рождения
+    (доля высоты конуса, угол, скорость, срок жизни) - общие для CPU и GPU."""
+    idx = np.flatnonzero(~active)[:count]
+    n = len(idx)
+    max_life = np.random.uniform(5.0, 8.0, n)
+    h_factor = np.random.random(n)
+    angle = np.random.uniform(0, 2 * math.pi, n)
+    speed = np.random.uniform(0.5, 1.5, n)
+    return idx, np.stack([h_factor, angle, speed, max_life], axis=1)
+
+class Particles:
+    """Пул частиц в виде массивов (по строке на частицу); все шаги - пакетом."""
+    def __init__(self, count):
+        self.active = np.zeros(count, dtype=bool)
+        self.pos = np.zeros((count, 3))
+        self.vel = np.zeros((count, 3))
+        self.life = np.zeros(count)
+        self.max_life = np.ones(count)
+        self.color = np.zeros((count, 3))
+
+    def spawn(self, count):
+        self.emit(*spawn_requests(self.active, count))
+
+    def emit(self, idx, params):
+        h_factor, angle, speed, max_life = params.T
+        self.active[idx] = True
+        self.life[idx] = 0.0
+        self.max_life[idx] = max_life
+
+        # Точка на боковой поверхности конуса и скорость по её нормали
+        c, s = np.cos(angle), np.sin(angle)
+        r = h_factor * CONE_RADIUS
+        self.pos[idx] = CONE_APEX + np.stack([r * c, -h_factor * CONE_HEIGHT, r * s], axis=1)
+
         slant_len = math.hypot(CONE_RADIUS, CONE_HEIGHT)
         cos_slope = CONE_HEIGHT / slant_len
         sin_slope = CONE_RADIUS / slant_len
-        
-        nx = math.cos(angle) * cos_slope
-        ny = sin_slope 
-        nz = math.sin(angle) * cos_slope
-        
-        normal = np.array([nx, ny, nz])
-        speed = random.uniform(0.5, 1.5)
-        self.vel = normal * speed
-
-    def update(self, dt):
-        if not self.active: return
-
-        self.vel += GRAVITY_VECTOR * dt
-        self.pos += self.vel * dt
-        
-        if self.pos[0] >= PLANE_X_POS:
-             self.pos[0] = PLANE_X_POS - 0.01
-             self.vel[0] = -self.vel[0] * 0.8 
-
-        self.life += dt
-        t = self.life / self.max_life
-        self.color = (1 - t) * COLOR_START + t * COLOR_END
-
-        if self.life >= self.max_life:
-            self.active = False
+        normal = np.stack([c * cos_slope, np.full(len(idx), sin_slope), s * cos_slope], axis=1)
+        self.vel[idx] = normal * speed[:, None]
+
+    def update(self, dt, world, grid=None):
+        a = self.active
+        self.vel[a] += GRAVITY_VECTOR * dt
+        if grid is not None:
+            pos = self.pos[a]
+            force = separation(pos, grid.build(pos), INTERACTION_RADIUS, INTERACTION_STIFFNESS)
+            self.vel[a] += force * dt
+        self.pos[a] += self.vel[a] * dt
+        world.collide(self.pos, self.vel, a)
+
+        self.life[a] += dt
+        t = (self.life[a] / self.max_life[a])[:, None]
+        self.color[a] = (1 - t) * COLOR_START + t * COLOR_END
+        self.active &= self.life < self.max_life
+
+    def draw(self, view=None, alpha=None):
+        """view - матрица вида: частицы рисуются от дальних к ближним;
+        alpha - полупрозрачный цвет (RGBA)."""
+        idx = np.flatnonzero(self.active)
+        if not len(idx):
+            return
+        if view is not None:
+            idx = idx[particle_sorter.sort(view_depth(self.pos[idx], view))]
+        pos = np.ascontiguousarray(self.pos[idx], dtype=np.float32)
+        color = self.color[idx].astype(np.float32)
+        if alpha is not None:
+            color = np.hstack([color, np.full((len(idx), 1), alpha, dtype=np.float32)])
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, pos)
+        glColorPointer(color.shape[1], GL_FLOAT, 0, color)
+        glDrawArrays(GL_POINTS, 0, len(pos))
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+class Obstacle:
+    """Статический меш: SDF для столкновений и каркас для отрисовки."""
+    def __init__(self, vertices, indices, model):
+        self.model = model
+        self.positions = np.ascontiguousarray(vertices[:, :3], dtype=np.float32)
+        self.indices = np.ascontiguousarray(indices, dtype=np.uint32)
+        self.collider = MeshCollider(SDFGrid(vertices, indices, SDF_RESOLUTION), model)
+
+    def draw(self):
+        glPushMatrix()
+        glMultMatrixf(np.ascontiguousarray(self.model.T, dtype=np.float32))
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, self.positions)
+        glDrawElements(GL_TRIANGLES, len(self.indices), GL_UNSIGNED_INT, self.indices)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glPopMatrix()
+
+def load_obstacles():
+    """Меши препятствий из сцены lab3_new (генераторы scene_format)."""
+    from scene_format import build_mesh, transform_matrix
+    with open(OBSTACLE_SCENE, encoding="utf-8") as f:
+        meshes = json.load(f)["meshes"]
+    result = []
+    for name, transform in OBSTACLES:
+        spec = {k: v for k, v in meshes[name].items() if k != "lod_levels"}
+        vertices, indices = build_mesh(dict(spec, optimize=False), os.path.dirname(OBSTACLE_SCENE))
+        result.append(Obstacle(vertices, indices, transform_matrix(transform)))
+    return result
+
+def make_collisions():
+    """Боковая плоскость x <= PLANE_X_POS: n = (-1, 0, 0), d = PLANE_X_POS;
+    с препятствиями - ещё пол и меши (SDF строятся при первом включении)."""
+    global obstacles
+    planes = [(-1.0, 0.0, 0.0, PLANE_X_POS)]
+    meshes = []
+    if obstacles_enabled:
+        if obstacles is None:
+            obstacles = load_obstacles()
+        planes.append((0.0, 1.0, 0.0, -FLOOR_Y))
+        meshes = [o.collider for o in obstacles]
+    return CollisionWorld(PlaneColliders(planes, restitution=0.8), meshes)
 
 def init():
     glClearColor(0.05, 0.05, 0.1, 1.0)
     glEnable(GL_DEPTH_TEST)
     glPointSize(3.0)
-    global particles
-    particles = [Particle() for _ in range(MAX_PARTICLES)]
+    global particles, collisions
+    particles = Particles(MAX_PARTICLES)
+    collisions = make_collisions()
 
 def draw_emitter_wireframe():
     glColor3f(0.5, 0.5, 0.5)
@@ -118,8 +248,45 @@ def draw_vertical_plane():
     glEnd()
     glPopMatrix()
 
+def draw_obstacles():
+    glColor3f(0.3, 0.5, 0.3)
+    glPolygonMode(GL_FRONT_AND_BACK, GL_LINE)
+    for o in obstacles:
+        o.draw()
+    glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
+
+def gpu_enabled():
+    return backend == "gpu" and transparency == "opaque" and not obstacles_enabled and not interaction_enabled
+
+def draw_particles():
+    if gpu_enabled():
+        gpu_particles.draw()
+    elif transparency == "opaque":
+        particles.draw()
+    elif transparency == "sorted":
+        view = np.array(glGetFloatv(GL_MODELVIEW_MATRIX)).T
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glDepthMask(GL_FALSE)
+        particles.draw(view, PARTICLE_ALPHA)
+        glDepthMask(GL_TRUE)
+        glDisable(GL_BLEND)
+    else:
+        oit_buffers.begin_transparent()
+        glUseProgram(oit_program)
+        particles.draw(alpha=PARTICLE_ALPHA)
+        glUseProgram(0)
+        oit_buffers.resolve()
+
 def display():
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    global oit_buffers, oit_program
+    if transparency == "oit":
+        if oit_buffers is None:
+            oit_buffers = WeightedBlendedOIT(*window_size)
+            oit_program = create_program(PARTICLE_OIT_VS, PARTICLE_OIT_FS)
+        oit_buffers.begin_opaque()
+    else:
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
     
     if is_top_view:
@@ -132,25 +299,23 @@ def display():
 
     draw_emitter_wireframe()
     draw_vertical_plane()
+    if obstacles_enabled:
+        draw_obstacles()
 
-    glBegin(GL_POINTS)
-    for p in particles:
-        if p.active:
-            glColor3fv(p.color)
-            glVertex3fv(p.pos)
-    glEnd()
+    draw_particles()
 
     glutSwapBuffers()
 
 def timer(value):
-    spawn_count = 0
-    for p in particles:
-        if not p.active and spawn_count < EMISSION_RATE:
-            p.spawn()
-            spawn_count += 1
-    
-    for p in particles:
-        p.update(TIME_STEP)
+    global gpu_particles
+    if gpu_enabled():
+        if gpu_particles is None:
+            gpu_particles = GPUParticles(MAX_PARTICLES, CONE_APEX, CONE_HEIGHT, CONE_RADIUS, PLANE_X_POS,
+                                         COLOR_START, COLOR_END, GRAVITY_VECTOR)
+        gpu_particles.step(*spawn_requests(gpu_particles.active, EMISSION_RATE), TIME_STEP)
+    else:
+        particles.spawn(EMISSION_RATE)
+        particles.update(TIME_STEP, collisions, neighbor_grid if interaction_enabled else None)
     
     global view_rot_y
     view_rot_y += 0.1 
@@ -161,27 +326,50 @@ def timer(value):
 def reshape(w, h):
     if h == 0: h = 1
     glViewport(0, 0, w, h)
+    global window_size
+    window_size = (w, h)
+    if oit_buffers is not None:
+        oit_buffers.resize(w, h)
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
     gluPerspective(45, w / h, 0.1, 100.0)
     glMatrixMode(GL_MODELVIEW)
 
 def keyboard(key, x, y):
-    global is_top_view
+    global is_top_view, obstacles_enabled, collisions, interaction_enabled, transparency, backend
 
     if key == b't' or key == b'T':
         is_top_view = not is_top_view
         view_mode = "Top-Down" if is_top_view else "Perspective"
         print(f"View mode: {view_mode}")
 
+    elif key == b'o' or key == b'O':
+        obstacles_enabled = not obstacles_enabled
+        collisions = make_collisions()
+        print(f"Obstacles: {'on' if obstacles_enabled else 'off'}")
+
+    elif key == b'i' or key == b'I':
+        interaction_enabled = not interaction_enabled
+        print(f"Particle interaction: {'on' if interaction_enabled else 'off'}")
+
+    elif key == b'b' or key == b'B':
+        transparency = TRANSPARENCY_MODES[(TRANSPARENCY_MODES.index(transparency) + 1) % len(TRANSPARENCY_MODES)]
+        print(f"Transparency: {transparency}")
+
+    elif key == b'g' or key == b'G':
+        backend = "gpu" if backend == "cpu" else "cpu"
+        note = "" if backend == "cpu" or gpu_enabled() else " (CPU until obstacles/interaction/blending are off)"
+        print(f"Simulation: {backend}{note}")
+
     elif key == b'\x1b':
         sys.exit()
 
 def main():
+    install_recorder(globals())  # --record <файл> пишет ввод для bench
     glutInit(sys.argv)
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
     glutInitWindowSize(WINDOW_WIDTH, WINDOW_HEIGHT)
-    glutCreateWindow(b"Particle System: Press 'T' for Top View")
+    glutCreateWindow(b"Particle System: Press 'T' for Top View, 'O' Obstacles, 'I' Interaction, 'B' Blending, 'G' GPU")
     
     init()
     
@@ -1,8 +1,15 @@
+import os
 import sys
 from OpenGL.GL import *
 from OpenGL.GLU import *
 from OpenGL.GLUT import *
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench.replay import install_recorder
+from geometry.primitives import wire_cone, wire_cylinder, wire_torus
+from geometry.gpu import GpuMesh
+from animation.keyframes import Timeline, Track
+
 # Параметры фигур и анимации
 cone_radius = 150
 cone1_height = 250
@@ -23,122 +30,83 @@ animation_duration = 3000
 # Переменные состояния
 scene_state = 1
 rotation_angle = 0
-start_time_anim = 0
-start_time_anim_scene4 = 0
+start_time_anim = 0  # момент выбора сцены: от него отсчитывается её анимация
 window_width = 800
 window_height = 600
 is_rotation_enabled = True
 
-# Функции отрисовки
-def draw_cone(radius, height, segments):
-    quad = gluNewQuadric()
-    gluQuadricDrawStyle(quad, GLU_LINE)
-    gluCylinder(quad, radius, 0, height, segments, 1)
-    gluDeleteQuadric(quad)
+# Каркасы на GPU (init): линии строятся один раз, кадр только рисует буферы.
+# Оба конуса - одна пачка (общие индексы, член 0 - малый, 1 - большой)
+meshes = {}
 
-def draw_torus(inner_radius, outer_radius, sides, rings):
-    glutWireTorus(inner_radius, outer_radius, sides, rings)
+RED, GREEN, BLUE, YELLOW = (1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 0)
 
-def draw_cylinder(radius, height, segments):
-    quad = gluNewQuadric()
-    gluQuadricDrawStyle(quad, GLU_LINE)
-    gluCylinder(quad, radius, radius, height, segments, 1)
-    gluDeleteQuadric(quad)
+def init():
+    glEnable(GL_DEPTH_TEST)
+    meshes["cone"] = GpuMesh(wire_cone(cone_radius, [cone1_height, cone2_height], num_segments))
+    meshes["torus"] = GpuMesh(wire_torus(torus_outer_radius, torus_inner_radius, torus_num_rings, torus_num_sides))
+    meshes["cylinder"] = GpuMesh(wire_cylinder(cylinder_radius, cylinder_radius, cylinder_height,
+                                               cylinder_num_segments))
+
+# Источник времени анимации, мс. Стенд подменяет glutGet симулированными часами;
+# для повторяемых замеров подойдёт и animation.keyframes.FixedStepClock
+time_source = lambda: glutGet(GLUT_ELAPSED_TIME)
+
+# Сцены как данные: (меш, член пачки, цвет, преобразования). Преобразование -
+# ("translate", xyz) или ("rotate", угол, ось) - вызовы glTranslatef / glRotatef
+# по порядку; строка вместо значения - канал временной шкалы сцены
+X_AXIS = (1, 0, 0)
+SCENES = {
+    1: [("cone", 0, RED, [("rotate", -90, X_AXIS)]),
+        ("cone", 1, BLUE, [("rotate", -90, X_AXIS)])],
+    # Малый конус поворачивается на 90 градусов
+    2: [("cone", 0, RED, [("rotate", "cone1_rotation_x", X_AXIS), ("rotate", -90, X_AXIS)]),
+        ("cone", 1, BLUE, [("rotate", -90, X_AXIS)])],
+    3: [("torus", 0, GREEN, [("translate", (-200, 100, 0))]),
+        ("cylinder", 0, YELLOW, [("translate", (200, 100, 0)), ("rotate", 90, X_AXIS)])],
+    # Тор и цилиндр съезжаются из положений сцены 3 и пересекаются
+    4: [("torus", 0, GREEN, [("translate", "torus_position")]),
+        ("cylinder", 0, YELLOW, [("translate", "cylinder_position"), ("rotate", 90, X_AXIS)])],
+}
+
+# Временные шкалы сцен (время - мс от выбора сцены)
+TIMELINES = {
+    1: Timeline({}),
+    2: Timeline({"cone1_rotation_x": Track([0, animation_duration], [0, 90])}),
+    3: Timeline({}),
+    4: Timeline({
+        "torus_position": Track([0, animation_duration], [(-200, 100, 0), (-60, 100, 0)], "vec3"),
+        "cylinder_position": Track([0, animation_duration], [(200, 100, 0), (60, 100, 0)], "vec3"),
+    }),
+}
+
+def apply_transform(op, value, axis=None):
+    if op == "translate":
+        glTranslatef(*value)
+    else:
+        glRotatef(value, *axis)
 
 # Основная функция отрисовки
 def display():
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
 
-    # Настройка камеры
-    gluPerspective(50, (window_width / window_height), 0.1, 1500.0)
+    # Камера; проекция задаётся в reshape
     glTranslatef(0.0, -150.0, -1000) # Чуть смещаем для лучшего обзора
     glRotatef(25, 1, 0, 0)
 
     # Общее вращение всей сцены
-    glPushMatrix()
     glRotatef(rotation_angle, 0, 1, 0)
 
-    # Логика отрисовки для каждой сцены
-    if scene_state == 1:
-        glPushMatrix()
-        glRotatef(-90, 1, 0, 0)
-        glColor3f(1, 0, 0)  # Красный
-        draw_cone(cone_radius, cone1_height, num_segments)
-        glColor3f(0, 0, 1)  # Синий
-        draw_cone(cone_radius, cone2_height, num_segments)
-        glPopMatrix()
-
-    elif scene_state == 2:
-        current_time = glutGet(GLUT_ELAPSED_TIME) - start_time_anim
-        cone1_rotation_x = 0
-        if current_time < animation_duration:
-            cone1_rotation_x = 90 * (current_time / animation_duration)
-        else:
-            cone1_rotation_x = 90
-
-        # Анимированный конус (маленький)
+    channels = TIMELINES[scene_state].sample(time_source() - start_time_anim)
+    for name, member, color, transforms in SCENES[scene_state]:
         glPushMatrix()
-        glRotatef(cone1_rotation_x, 1, 0, 0)
-        glRotatef(-90, 1, 0, 0)
-        glColor3f(1, 0, 0)  # Красный
-        draw_cone(cone_radius, cone1_height, num_segments)
+        for op, value, *axis in transforms:
+            apply_transform(op, channels[value] if isinstance(value, str) else value, *axis)
+        glColor3f(*color)
+        meshes[name].draw(member, normals=False)
         glPopMatrix()
 
-        # Статичный конус (большой)
-        glPushMatrix()
-        glRotatef(-90, 1, 0, 0)
-        glColor3f(0, 0, 1)  # Синий
-        draw_cone(cone_radius, cone2_height, num_segments)
-        glPopMatrix()
-
-    elif scene_state == 3:
-        glPushMatrix()
-        glTranslatef(-200, 100, 0)
-        glColor3f(0, 1, 0)  # Зелёный
-        draw_torus(torus_inner_radius, torus_outer_radius, torus_num_sides, torus_num_rings)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(200, 100, 0)
-        glRotatef(90, 1, 0, 0)
-        glColor3f(1, 1, 0)  # Желтый
-        draw_cylinder(cylinder_radius, cylinder_height, cylinder_num_segments)
-        glPopMatrix()
-
-    elif scene_state == 4:
-        # Расчет анимации для 4-й сцены
-        current_time = glutGet(GLUT_ELAPSED_TIME) - start_time_anim_scene4
-        progress = min(current_time / animation_duration, 1.0) # Прогресс от 0.0 до 1.0
-
-        # Начальные позиции (как в сцене 3)
-        start_x_torus = -200.0
-        start_x_cylinder = 200.0
-        
-        # Конечные позиции для пересечения
-        end_x_torus = -60.0
-        end_x_cylinder = 60.0
-
-        # Интерполяция позиций для обеих фигур
-        torus_x = start_x_torus + (end_x_torus - start_x_torus) * progress
-        cylinder_x = start_x_cylinder + (end_x_cylinder - start_x_cylinder) * progress
-
-        # Анимированный тор
-        glPushMatrix()
-        glTranslatef(torus_x, 100, 0)
-        glColor3f(0, 1, 0)  # Зелёный
-        draw_torus(torus_inner_radius, torus_outer_radius, torus_num_sides, torus_num_rings)
-        glPopMatrix()
-
-        # Анимированный цилиндр
-        glPushMatrix()
-        glTranslatef(cylinder_x, 100, 0)
-        glRotatef(90, 1, 0, 0)
-        glColor3f(1, 1, 0)  # Желтый
-        draw_cylinder(cylinder_radius, cylinder_height, cylinder_num_segments)
-        glPopMatrix()
-
-    glPopMatrix()
     glutSwapBuffers()
 
 # Функция для анимации и обновления
@@ -150,18 +118,11 @@ def idle():
 
 # Функция обработки клавиатуры
 def keyboard(key, x, y):
-    global scene_state, start_time_anim, start_time_anim_scene4, is_rotation_enabled
+    global scene_state, start_time_anim, is_rotation_enabled
     key = key.decode("utf-8")
-    if key == '1':
-        scene_state = 1
-    elif key == '2':
-        scene_state = 2
-        start_time_anim = glutGet(GLUT_ELAPSED_TIME)
-    elif key == '3':
-        scene_state = 3
-    elif key == '4':
-        scene_state = 4
-        start_time_anim_scene4 = glutGet(GLUT_ELAPSED_TIME)
+    if key in ('1', '2', '3', '4'):
+        scene_state = int(key)
+        start_time_anim = time_source()
     elif key == '5':
         is_rotation_enabled = not is_rotation_enabled
     elif key == '\x1b':  # Клавиша ESC
@@ -177,15 +138,20 @@ def reshape(w, h):
     if h == 0:
         h = 1
     glViewport(0, 0, w, h)
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(50, w / h, 0.1, 1500.0)
+    glMatrixMode(GL_MODELVIEW)
 
 
 def main():
+    install_recorder(globals())  # --record <файл> пишет ввод для bench
     glutInit(sys.argv)
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
     glutInitWindowSize(window_width, window_height)
     glutCreateWindow(b"Lab 1")
 
-    glEnable(GL_DEPTH_TEST)
+    init()
 
     glutDisplayFunc(display)
     glutReshapeFunc(reshape)
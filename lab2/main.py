@@ -1,10 +1,17 @@
+import os
 import sys
 import math
+import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLU import *
 from OpenGL.GLUT import *
 from PIL import Image
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench.replay import install_recorder
+from geometry.gpu import GpuMesh, MeshCache
+from geometry.primitives import FLOATS_PER_VERTEX, Mesh
+
 
 # Глобальные параметры и переключатели
 light_pos = [4.0, 6.0, 4.0, 1.0]
@@ -19,6 +26,10 @@ is_bump_enabled = False     # B - вкл/выкл bump-mapping
 
 texture_id = None
 
+# Меши на GPU: строятся при первом запросе, кадр только рисует буферы
+mesh_cache = MeshCache()
+cone_meshes = {}   # (радиус, высота, сегменты, bump) -> GpuMesh
+
 # Функции управления светом
 def move_light(dx, dy, dz):
     light_pos[0] += dx
@@ -40,7 +51,7 @@ def draw_light_gizmo():
 
     glPushMatrix()
     glTranslatef(light_pos[0], light_pos[1], light_pos[2])
-    glutSolidSphere(0.2, 16, 16)
+    mesh_cache.get("sphere", radius=0.2, slices=16, stacks=16).draw(normals=False)
     glPopMatrix()
     glPopAttrib()
 
@@ -130,7 +141,7 @@ def display():
     glMaterialfv(GL_FRONT, GL_AMBIENT_AND_DIFFUSE, [0.8, 0.8, 0.8, 1.0])
     glMaterialfv(GL_FRONT, GL_SPECULAR, [1.0, 1.0, 1.0, 1.0])
     glMaterialf(GL_FRONT, GL_SHININESS, 128.0)
-    glutSolidTorus(0.8, 2.0, 32, 64)
+    mesh_cache.get("torus", radius_major=2.0, radius_minor=0.8, radial_segments=64, tubular_segments=32).draw()
     glPopMatrix()
 
     # 3. Полупрозрачный цилиндр
@@ -141,11 +152,7 @@ def display():
     glMaterialf(GL_FRONT, GL_SHININESS, 50.0)
     glEnable(GL_BLEND)
     glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-    q = gluNewQuadric()
-    gluCylinder(q, 1.0, 1.0, 4.0, 32, 1)
-    glPushMatrix(); glRotatef(180.0, 1, 0, 0); gluDisk(q, 0, 1, 32, 1); glPopMatrix()
-    glTranslatef(0, 0, 4); gluDisk(q, 0, 1, 32, 1)
-    gluDeleteQuadric(q)
+    mesh_cache.get("cylinder", radius=1.0, height=4.0, slices=32).draw()  # с крышками, как gluCylinder + gluDisk
     glDisable(GL_BLEND)
     glPopMatrix()
 
@@ -153,34 +160,33 @@ def display():
 
 
 # Отрисовка конуса с bump-mapping
+def textured_cone(radius, height, slices, bump):
+    """Конус вдоль Y: веер боковой поверхности из вершины и веер основания.
+    bump - нормали боковой поверхности возмущены синусом по углу."""
+    angle = 2.0 * np.pi * np.arange(slices + 1) / slices
+    x, z = np.cos(angle), np.sin(angle)
+    vertices = np.zeros((1, 2 * (slices + 2), FLOATS_PER_VERTEX), dtype=np.float32)
+    side, base = vertices[0, :slices + 2], vertices[0, slices + 2:]
+    side[0] = (0.0, height, 0.0, 0.0, 1.0, 0.0, 0.5, 0.5)
+    side[1:, 0], side[1:, 2] = radius * x, radius * z
+    perturb = 0.15 * np.sin(20.0 * angle) if bump else 0.0
+    side[1:, 3], side[1:, 5] = x + perturb, z + perturb
+    side[1:, 6] = np.arange(slices + 1) / slices
+    base[0] = (0.0, 0.0, 0.0, 0.0, -1.0, 0.0, 0.5, 0.5)
+    base[1:, 0], base[1:, 2] = radius * x, radius * z
+    base[1:, 4] = -1.0
+    base[1:, 6], base[1:, 7] = 0.5 + 0.5 * x, 0.5 + 0.5 * z
+    ring = np.arange(1, slices + 1)
+    fan = np.stack([np.zeros_like(ring), ring, ring + 1], axis=1)
+    return Mesh(vertices, np.concatenate([fan, fan + slices + 2]))
+
+
 def draw_textured_cone(radius, height, slices):
-    v_scale = 0.5
-    glBegin(GL_TRIANGLE_FAN)
-    glNormal3f(0.0, 1.0, 0.0)
-    glTexCoord2f(0.5, v_scale)
-    glVertex3f(0.0, height, 0.0)
-    for i in range(slices + 1):
-        angle = 2.0 * math.pi * i / slices
-        nx, nz = math.cos(angle), math.sin(angle)
-        if is_bump_enabled:
-            perturb = 0.15 * math.sin(20.0 * angle)
-            glNormal3f(nx + perturb, 0.0, nz + perturb)
-        else:
-            glNormal3f(nx, 0.0, nz)
-        glTexCoord2f(i / slices, 0.0)
-        glVertex3f(radius * nx, 0.0, radius * nz)
-    glEnd()
-
-    glBegin(GL_TRIANGLE_FAN)
-    glNormal3f(0.0, -1.0, 0.0)
-    glTexCoord2f(0.5, 0.5)
-    glVertex3f(0.0, 0.0, 0.0)
-    for i in range(slices + 1):
-        angle = 2.0 * math.pi * i / slices
-        x, z = math.cos(angle), math.sin(angle)
-        glTexCoord2f(0.5 + 0.5 * x, 0.5 + 0.5 * z)
-        glVertex3f(radius * x, 0.0, radius * z)
-    glEnd()
+    key = (radius, height, slices, is_bump_enabled)
+    mesh = cone_meshes.get(key)
+    if mesh is None:
+        mesh = cone_meshes[key] = GpuMesh(textured_cone(radius, height, slices, is_bump_enabled))
+    mesh.draw(texcoords=True)
 
 # Служебные функции GLUT
 def reshape(w, h):
@@ -229,6 +235,7 @@ def update(value):
 
 # Точка входа
 def main():
+    install_recorder(globals())  # --record <файл> пишет ввод для bench
     glutInit(sys.argv)
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGBA | GLUT_DEPTH)
     glutInitWindowSize(960, 720)
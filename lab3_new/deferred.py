@@ -0,0 +1,66 @@
+# File: deferred.py
+# Отложенное освещение (deferred shading). Непрозрачные объекты рисуются в
+# G-буфер без освещения (gbuffer.frag): диффузный и зеркальный цвет материала
+# с текстурой, блеск, нормаль и глубина. Затем один полноэкранный треугольник
+# (deferred.frag) считает свет, тень и точечные источники для каждого пикселя
+# один раз - цена освещения не зависит от перерисовки. Прозрачные объекты
+# остаются в прямом проходе поверх (глубина переносится в целевой буфер).
+from OpenGL.GL import *
+
+# Текстурные блоки G-буфера в проходе освещения (0-5 заняты сценой, тенью и светом)
+GBUFFER_UNITS = {"gDiffuse": 6, "gSpecular": 7, "gNormal": 8, "gDepth": 9}
+
+
+class GBuffer:
+    def __init__(self, width, height):
+        self.width = self.height = 0
+        self.fbo = glGenFramebuffers(1)
+        self.diffuse, self.specular, self.normal, self.depth = glGenTextures(4)
+        self.empty_vao = glGenVertexArrays(1)
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        if (width, height) == (self.width, self.height):
+            return
+        self.width, self.height = width, height
+        for tex, internal, fmt in ((self.diffuse, GL_RGBA16F, GL_RGBA),
+                                   (self.specular, GL_RGBA16F, GL_RGBA),
+                                   (self.normal, GL_RGBA16F, GL_RGBA),
+                                   (self.depth, GL_DEPTH_COMPONENT32F, GL_DEPTH_COMPONENT)):
+            glBindTexture(GL_TEXTURE_2D, tex)
+            glTexImage2D(GL_TEXTURE_2D, 0, internal, width, height, 0, fmt, GL_FLOAT, None)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        for i, tex in enumerate((self.diffuse, self.specular, self.normal)):
+            glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0 + i, GL_TEXTURE_2D, tex, 0)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_TEXTURE_2D, self.depth, 0)
+        glDrawBuffers(3, [GL_COLOR_ATTACHMENT0, GL_COLOR_ATTACHMENT1, GL_COLOR_ATTACHMENT2])
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            print("[ERROR] G-buffer FBO incomplete")
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def begin(self):
+        """Проход G-буфера; возвращает кадровый буфер, куда потом пойдёт освещение."""
+        target = int(glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING))
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glDisable(GL_BLEND)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        return target
+
+    def light(self, prog, target):
+        """Полноэкранное освещение в target программой prog (uniform кадра уже заданы).
+        Глубина G-буфера пишется в target - прозрачный проход тестируется по ней."""
+        glBindFramebuffer(GL_FRAMEBUFFER, target)
+        for name, unit in GBUFFER_UNITS.items():
+            glActiveTexture(GL_TEXTURE0 + unit)
+            glBindTexture(GL_TEXTURE_2D, getattr(self, name[1:].lower()))
+            glUniform1i(glGetUniformLocation(prog, name), unit)
+        glActiveTexture(GL_TEXTURE0)
+        glUniform2f(glGetUniformLocation(prog, "screenSize"), self.width, self.height)
+        glDepthFunc(GL_ALWAYS)
+        glBindVertexArray(self.empty_vao)
+        glDrawArrays(GL_TRIANGLES, 0, 3)
+        glDepthFunc(GL_LESS)
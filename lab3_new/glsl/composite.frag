@@ -0,0 +1,12 @@
+#version 330 core
+uniform sampler2D accumTex;
+uniform sampler2D revealTex;
+out vec4 FragColor;
+void main() {
+    ivec2 p = ivec2(gl_FragCoord.xy);
+    float reveal = texelFetch(revealTex, p, 0).r;
+    if (reveal >= 1.0)
+        discard;  // прозрачных слоёв нет
+    vec4 accum = texelFetch(accumTex, p, 0);
+    FragColor = vec4(accum.rgb / max(accum.a, 1e-5), 1.0 - reveal);
+}
@@ -0,0 +1,62 @@
+#version 330 core
+// Полноэкранный проход освещения по G-буферу (deferred.py): основной свет с
+// тенью и точечные источники - ровно один раз на пиксель экрана, без
+// перерисовки перекрытых фрагментов. Позиция восстанавливается из глубины.
+// Перестановки - те же, что у scene.frag (shadow.glsl, CLUSTERED_LIGHTS).
+out vec4 FragColor;
+
+uniform sampler2D gDiffuse;
+uniform sampler2D gSpecular;
+uniform sampler2D gNormal;
+uniform sampler2D gDepth;
+uniform mat4 invViewProj;
+uniform vec2 screenSize;
+uniform mat4 lightSpaceMatrix;
+
+uniform vec3 viewPos;
+uniform vec3 lightPos;
+uniform vec3 lightColor;
+uniform float lightIntensity;
+uniform vec3 lightAmbient;
+
+// Входы shadow.glsl и point_lights.glsl: здесь они читаются из G-буфера
+vec3 FragPos;
+vec3 Normal;
+vec4 LightSpacePos;
+vec3 materialDiffuse;
+vec3 materialSpecular;
+float materialShininess;
+
+#include "shadow.glsl"
+#include "point_lights.glsl"
+
+void main() {
+    ivec2 p = ivec2(gl_FragCoord.xy);
+    float depth = texelFetch(gDepth, p, 0).r;
+    if (depth >= 1.0)
+        discard;  // фон
+    vec4 world = invViewProj * vec4(vec3(gl_FragCoord.xy / screenSize, depth) * 2.0 - 1.0, 1.0);
+    FragPos = world.xyz / world.w;
+    Normal = texelFetch(gNormal, p, 0).xyz;
+    LightSpacePos = lightSpaceMatrix * vec4(FragPos, 1.0);
+    materialDiffuse = texelFetch(gDiffuse, p, 0).rgb;
+    vec4 specular = texelFetch(gSpecular, p, 0);
+    materialSpecular = specular.rgb;
+    materialShininess = specular.a;
+
+    vec3 norm = normalize(Normal);
+    vec3 lightDir = normalize(lightPos - FragPos);
+    float diff = max(dot(norm, lightDir), 0.0);
+    vec3 viewDir = normalize(viewPos - FragPos);
+    float spec = 0.0;
+    if (diff > 0.0)
+        spec = pow(max(dot(viewDir, reflect(-lightDir, norm)), 0.0), materialShininess);
+    vec3 direct = lightColor * lightIntensity * (diff * materialDiffuse + spec * materialSpecular);
+
+    vec3 lighting = lightAmbient * materialDiffuse + (1.0 - calculateShadow()) * direct;
+#if CLUSTERED_LIGHTS
+    lighting += pointLighting(norm, viewDir);
+#endif
+    FragColor = vec4(lighting, 1.0);
+    gl_FragDepth = depth;  // глубина для прозрачного прохода поверх
+}
@@ -0,0 +1,33 @@
+#version 330 core
+// Проход G-буфера (deferred.py): только материал и нормаль, без освещения.
+// Текстура умножается сразу, поэтому свет в deferred.frag - те же формулы,
+// что в scene.frag, но с цветами материала, уже умноженными на текстуру.
+#ifndef USE_TEXTURE
+#define USE_TEXTURE 0
+#endif
+
+layout (location = 0) out vec4 gDiffuse;   // rgb - диффузный цвет
+layout (location = 1) out vec4 gSpecular;  // rgb - зеркальный цвет, a - блеск
+layout (location = 2) out vec4 gNormal;    // xyz - нормаль в мировых координатах
+
+in vec3 FragPos;
+in vec3 Normal;
+in vec2 TexCoords;
+in vec4 LightSpacePos;
+
+uniform sampler2D diffuseTexture;
+
+uniform float materialShininess;
+uniform vec3 materialDiffuse;
+uniform vec3 materialSpecular;
+
+void main() {
+#if USE_TEXTURE
+    vec3 texColor = texture(diffuseTexture, TexCoords).rgb;
+#else
+    vec3 texColor = materialDiffuse;
+#endif
+    gDiffuse = vec4(materialDiffuse * texColor, 1.0);
+    gSpecular = vec4(materialSpecular * texColor, materialShininess);
+    gNormal = vec4(normalize(Normal), 0.0);
+}
@@ -0,0 +1,10 @@
+layout (location = 0) out vec4 accum;
+layout (location = 1) out float reveal;
+
+void writeOIT(vec4 color) {
+    // Вес убывает с глубиной: ближние слои доминируют в среднем
+    float w = clamp(pow(min(1.0, color.a * 10.0) + 0.01, 3.0) * 1e8 *
+                    pow(1.0 - gl_FragCoord.z * 0.9, 3.0), 1e-2, 3e3);
+    accum = vec4(color.rgb * color.a, color.a) * w;
+    reveal = color.a;
+}
@@ -0,0 +1,44 @@
+// Точечные источники с кластерным отбором (lights.py, spatial/clusters.py):
+// фрагмент перебирает только источники своего кластера. Без теней - тень
+// есть только у основного источника. Входы FragPos и uniform материала
+// объявляет включающий шейдер.
+#ifndef CLUSTERED_LIGHTS
+#define CLUSTERED_LIGHTS 0
+#endif
+
+#if CLUSTERED_LIGHTS
+uniform samplerBuffer lightData;     // на источник 2 текселя: (позиция, радиус), (цвет, яркость)
+uniform usamplerBuffer clusterData;  // на кластер: (смещение в lightIndex, число источников)
+uniform usamplerBuffer lightIndex;
+uniform ivec3 clusterDims;
+uniform vec2 clusterTile;            // размер тайла в пикселях
+uniform vec2 clusterDepth;           // слой = log(глубина) * x - y
+uniform mat4 view;
+
+vec3 pointLighting(vec3 norm, vec3 viewDir) {
+    float depth = -(view * vec4(FragPos, 1.0)).z;
+    ivec3 c = ivec3(vec3(gl_FragCoord.xy / clusterTile, log(max(depth, 1e-6)) * clusterDepth.x - clusterDepth.y));
+    c = clamp(c, ivec3(0), clusterDims - 1);
+    uvec2 range = texelFetch(clusterData, (c.z * clusterDims.y + c.y) * clusterDims.x + c.x).rg;
+    vec3 result = vec3(0.0);
+    for (uint i = 0u; i < range.y; ++i) {
+        int light = int(texelFetch(lightIndex, int(range.x + i)).r);
+        vec4 posRadius = texelFetch(lightData, 2 * light);
+        vec4 colorIntensity = texelFetch(lightData, 2 * light + 1);
+        vec3 toLight = posRadius.xyz - FragPos;
+        float dist2 = dot(toLight, toLight);
+        // Затухание до нуля на радиусе: (1 - d^2/r^2)^2
+        float falloff = clamp(1.0 - dist2 / (posRadius.w * posRadius.w), 0.0, 1.0);
+        if (falloff <= 0.0)
+            continue;
+        vec3 lightDir = toLight * inversesqrt(dist2);
+        float diff = max(dot(norm, lightDir), 0.0);
+        float spec = 0.0;
+        if (diff > 0.0)
+            spec = pow(max(dot(viewDir, reflect(-lightDir, norm)), 0.0), materialShininess);
+        result += colorIntensity.rgb * colorIntensity.a * falloff * falloff *
+                  (diff * materialDiffuse + spec * materialSpecular);
+    }
+    return result;
+}
+#endif
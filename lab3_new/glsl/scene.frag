@@ -0,0 +1,73 @@
+#version 330 core
+// Перестановки: USE_TEXTURE, TRANSPARENT, OIT (прозрачный проход в буферы OIT),
+// CLUSTERED_LIGHTS (point_lights.glsl) и параметры тени из shadow.glsl - вместо ветвлений по uniform в каждом фрагменте
+#ifndef USE_TEXTURE
+#define USE_TEXTURE 0
+#endif
+#ifndef TRANSPARENT
+#define TRANSPARENT 0
+#endif
+#ifdef OIT
+#include "oit_output.glsl"
+#else
+out vec4 FragColor;
+#endif
+
+in vec3 FragPos;
+in vec3 Normal;
+in vec2 TexCoords;
+in vec4 LightSpacePos;
+
+uniform sampler2D diffuseTexture;
+
+uniform vec3 viewPos;
+uniform vec3 lightPos;
+uniform vec3 lightColor;
+uniform float lightIntensity;
+uniform vec3 lightAmbient;
+
+uniform float materialShininess;
+uniform vec3 materialDiffuse;
+uniform vec3 materialSpecular;
+
+#include "shadow.glsl"
+#include "point_lights.glsl"
+
+void main() {
+    vec3 ambient = lightAmbient * materialDiffuse; // фоновое освещение
+
+    vec3 norm = normalize(Normal);
+    vec3 lightDir = normalize(lightPos - FragPos);
+    float diff = max(dot(norm, lightDir), 0.0);
+    vec3 diffuse = lightColor * diff * materialDiffuse * lightIntensity;
+
+    vec3 viewDir = normalize(viewPos - FragPos);
+    vec3 reflectDir = reflect(-lightDir, norm);
+    float spec = 0.0;
+    if (diff > 0.0)
+        spec = pow(max(dot(viewDir, reflectDir), 0.0), materialShininess);
+    vec3 specular = lightColor * spec * materialSpecular * lightIntensity;
+
+    float shadow = calculateShadow(); // вычисляем тень
+    vec3 lighting = ambient + (1.0 - shadow) * (diffuse + specular);
+#if CLUSTERED_LIGHTS
+    lighting += pointLighting(norm, viewDir);
+#endif
+
+#if USE_TEXTURE
+    vec4 texColor = texture(diffuseTexture, TexCoords);
+#else
+    vec4 texColor = vec4(materialDiffuse, 1.0);
+#endif
+
+    vec4 color = vec4(lighting, 1.0) * texColor;
+#if defined(OIT) && TRANSPARENT
+    writeOIT(vec4(color.rgb, 0.7));
+#elif defined(OIT)
+    writeOIT(vec4(color.rgb, 1.0));
+#elif TRANSPARENT
+    FragColor = vec4(color.rgb, 0.7);
+#else
+    FragColor = color;
+#endif
+}
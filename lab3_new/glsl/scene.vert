@@ -0,0 +1,22 @@
+#version 330 core
+layout (location = 0) in vec3 aPos;
+layout (location = 1) in vec3 aNormal;
+layout (location = 2) in vec2 aTexCoords;
+
+out vec3 FragPos;
+out vec3 Normal;
+out vec2 TexCoords;
+out vec4 LightSpacePos;
+
+uniform mat4 model;
+uniform mat4 view;
+uniform mat4 projection;
+uniform mat4 lightSpaceMatrix;
+
+void main() {
+    FragPos = vec3(model * vec4(aPos, 1.0));             // Позиция фрагмента в мировых координатах
+    Normal = mat3(transpose(inverse(model))) * aNormal;  // Трансформированная нормаль
+    TexCoords = aTexCoords;                               // Текстурные координаты
+    LightSpacePos = lightSpaceMatrix * model * vec4(aPos, 1.0); // Координаты для тени
+    gl_Position = projection * view * model * vec4(aPos, 1.0);
+}
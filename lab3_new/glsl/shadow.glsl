@@ -0,0 +1,112 @@
+// Функция расчета тени (входы LightSpacePos, Normal, FragPos и uniform
+// lightPos объявляет включающий шейдер).
+// Перестановки:
+//   PCF_KERNEL     1 - одна выборка, 3 - 3x3, 5 - 16 точек диска Пуассона в окне 5x5 текселей;
+//   SHADOW_COMPARE 1 - аппаратное сравнение (sampler2DShadow): с GL_LINEAR каждая
+//                  выборка - билинейный 2x2 PCF;
+//   POISSON_ROTATE 1 - диск Пуассона поворачивается в каждом пикселе (шум вместо полос);
+//   PCSS           1 - мягкие тени: поиск блокеров, ширина полутени по расстоянию до них;
+//   SHADOW_SIZE    размер карты теней: шаг текселя - константа, без textureSize().
+#ifndef PCF_KERNEL
+#define PCF_KERNEL 3
+#endif
+#ifndef SHADOW_COMPARE
+#define SHADOW_COMPARE 0
+#endif
+#ifndef POISSON_ROTATE
+#define POISSON_ROTATE 0
+#endif
+#ifndef PCSS
+#define PCSS 0
+#endif
+#ifndef SHADOW_SIZE
+#define SHADOW_SIZE 2048
+#endif
+#define PCSS_SEARCH 6.0     // радиус поиска блокеров, тексели
+#define PCSS_SCALE 400.0    // тексели полутени на единицу разницы глубин
+#define PCSS_MAX 8.0        // предельный радиус полутени, тексели
+
+const vec2 texelSize = vec2(1.0 / float(SHADOW_SIZE));
+
+#if SHADOW_COMPARE
+uniform sampler2DShadow shadowMap;
+uniform sampler2D shadowDepth;   // та же текстура без сравнения - для поиска блокеров
+float shadowTap(vec2 uv, float depth) { return 1.0 - texture(shadowMap, vec3(uv, depth)); }
+#else
+uniform sampler2D shadowMap;
+#define shadowDepth shadowMap
+float shadowTap(vec2 uv, float depth) { return depth > texture(shadowMap, uv).r ? 1.0 : 0.0; }
+#endif
+
+#if PCF_KERNEL == 5 || PCSS
+const vec2 poissonDisk[16] = vec2[](
+    vec2(-0.94201624, -0.39906216), vec2(0.94558609, -0.76890725),
+    vec2(-0.09418410, -0.92938870), vec2(0.34495938, 0.29387760),
+    vec2(-0.91588581, 0.45771432), vec2(-0.81544232, -0.87912464),
+    vec2(-0.38277543, 0.27676845), vec2(0.97484398, 0.75648379),
+    vec2(0.44323325, -0.97511554), vec2(0.53742981, -0.47373420),
+    vec2(-0.26496911, -0.41893023), vec2(0.79197514, 0.19090188),
+    vec2(-0.24188840, 0.99706507), vec2(-0.81409955, 0.91437590),
+    vec2(0.19984126, 0.78641367), vec2(0.14383161, -0.14100790));
+
+// Диск Пуассона радиусом radius текселей (повёрнутый, если POISSON_ROTATE)
+float poissonShadow(vec2 uv, float depth, float radius) {
+#if POISSON_ROTATE
+    // Interleaved gradient noise (Jimenez 2014): угол поворота на пиксель
+    float angle = 6.2831853 * fract(52.9829189 * fract(dot(gl_FragCoord.xy, vec2(0.06711056, 0.00583715))));
+    mat2 rot = mat2(cos(angle), sin(angle), -sin(angle), cos(angle));
+#else
+    mat2 rot = mat2(1.0);
+#endif
+    float shadow = 0.0;
+    for(int i = 0; i < 16; ++i)
+        shadow += shadowTap(uv + rot * poissonDisk[i] * radius * texelSize, depth);
+    return shadow / 16.0;
+}
+#endif
+
+#if PCSS
+// Средняя глубина блокеров в окрестности; -1, если их нет
+float averageBlocker(vec2 uv, float depth) {
+    float sum = 0.0;
+    float count = 0.0;
+    for(int i = 0; i < 16; ++i) {
+        float d = texture(shadowDepth, uv + poissonDisk[i] * PCSS_SEARCH * texelSize).r;
+        if (d < depth) {
+            sum += d;
+            count += 1.0;
+        }
+    }
+    return count > 0.0 ? sum / count : -1.0;
+}
+#endif
+
+float calculateShadow() {
+    vec3 projCoords = LightSpacePos.xyz / LightSpacePos.w;
+    projCoords = projCoords * 0.5 + 0.5;
+    if (projCoords.x < 0.0 || projCoords.x > 1.0 ||
+        projCoords.y < 0.0 || projCoords.y > 1.0) {
+        return 0.0; // фрагмент вне теневого квадрата
+    }
+    float bias = max(0.12 * (1.0 - dot(normalize(Normal), normalize(lightPos - FragPos))), 0.03);
+    float currentDepth = projCoords.z - bias;
+#if PCSS
+    // Свет направленный (орто): полутень растёт линейно с расстоянием до блокера
+    float blocker = averageBlocker(projCoords.xy, currentDepth);
+    if (blocker < 0.0)
+        return 0.0;
+    float radius = clamp((currentDepth - blocker) * PCSS_SCALE, 1.0, PCSS_MAX);
+    float shadow = poissonShadow(projCoords.xy, currentDepth, radius);
+#elif PCF_KERNEL == 1
+    float shadow = shadowTap(projCoords.xy, currentDepth);
+#elif PCF_KERNEL == 3
+    float shadow = 0.0;
+    for(int x = -1; x <= 1; ++x)
+        for(int y = -1; y <= 1; ++y)
+            shadow += shadowTap(projCoords.xy + vec2(x,y) * texelSize, currentDepth);
+    shadow /= 9.0;
+#else
+    float shadow = poissonShadow(projCoords.xy, currentDepth, 2.5);
+#endif
+    return clamp(shadow, 0.0, 1.0);
+}
@@ -0,0 +1,27 @@
+#version 330 core
+// Вывод кадра пониженного разрешения в окно (render_scale.py).
+// SHARPEN 0 - билинейная выборка; 1 - билинейная + нерезкое маскирование по
+// крестовине соседей, ограниченное их минимумом и максимумом (без ореолов).
+#ifndef SHARPEN
+#define SHARPEN 0
+#endif
+uniform sampler2D frame;
+uniform vec2 outputSize;
+uniform float sharpness;
+out vec4 FragColor;
+
+void main() {
+    vec2 uv = gl_FragCoord.xy / outputSize;
+    vec3 c = texture(frame, uv).rgb;
+#if SHARPEN
+    vec2 texel = 1.0 / vec2(textureSize(frame, 0));
+    vec3 n = texture(frame, uv + vec2(0.0, texel.y)).rgb;
+    vec3 s = texture(frame, uv - vec2(0.0, texel.y)).rgb;
+    vec3 e = texture(frame, uv + vec2(texel.x, 0.0)).rgb;
+    vec3 w = texture(frame, uv - vec2(texel.x, 0.0)).rgb;
+    vec3 lo = min(c, min(min(n, s), min(e, w)));
+    vec3 hi = max(c, max(max(n, s), max(e, w)));
+    c = clamp(c + sharpness * (4.0 * c - n - s - e - w), lo, hi);
+#endif
+    FragColor = vec4(c, 1.0);
+}
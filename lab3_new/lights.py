@@ -0,0 +1,104 @@
+# File: lights.py
+# Точечные источники света поверх основного (с тенью): описание из сцены,
+# движение по орбитам вокруг оси Y и кластерный отбор на CPU
+# (spatial/clusters.py). В шейдер уходят три буфера-текстуры (TBO):
+#   lightData   RGBA32F - на источник 2 текселя: (позиция, радиус), (цвет, яркость);
+#   clusterData RG32UI  - на кластер: (смещение в lightIndex, число источников);
+#   lightIndex  R32UI   - номера источников подряд по кластерам.
+# TBO, а не SSBO: сценовые шейдеры - GLSL 330. Пакет spatial в sys.path
+# добавляет main.py.
+import numpy as np
+from OpenGL.GL import *
+
+from spatial.clusters import ClusterGrid
+
+LIGHT_UNITS = (3, 4, 5)  # текстурные блоки lightData, clusterData, lightIndex
+
+
+def point_lights(spec):
+    """Источники из описания сцены: список {"position", "color", "radius",
+    "intensity", "orbit_speed"} или генератор {"count": N, "seed", "extent",
+    "height", "radius", "intensity", "orbit_speed"}.
+    Возвращает (pos_radius (N, 4), color_intensity (N, 4), orbit (N,) град/с)."""
+    if isinstance(spec, dict):
+        rng = np.random.default_rng(spec.get("seed", 0))
+        n = int(spec["count"])
+        extent = spec.get("extent", 900.0)
+        low, high = spec.get("height", (20.0, 200.0))
+        pos = np.column_stack([rng.uniform(-extent, extent, n), rng.uniform(low, high, n),
+                               rng.uniform(-extent, extent, n)])
+        color = rng.uniform(0.2, 1.0, (n, 3))
+        radius = np.full(n, spec.get("radius", 250.0))
+        intensity = np.full(n, spec.get("intensity", 1.0))
+        orbit = rng.uniform(-1.0, 1.0, n) * spec.get("orbit_speed", 20.0)
+    else:
+        pos = np.array([l["position"][:3] for l in spec], dtype=np.float64).reshape(-1, 3)
+        color = np.array([l.get("color", (1.0, 1.0, 1.0))[:3] for l in spec], dtype=np.float64).reshape(-1, 3)
+        radius = np.array([l.get("radius", 250.0) for l in spec], dtype=np.float64)
+        intensity = np.array([l.get("intensity", 1.0) for l in spec], dtype=np.float64)
+        orbit = np.array([l.get("orbit_speed", 0.0) for l in spec], dtype=np.float64)
+    pos_radius = np.column_stack([pos, radius]).astype(np.float32)
+    color_intensity = np.column_stack([color, intensity]).astype(np.float32)
+    return pos_radius, color_intensity, orbit
+
+
+class ClusteredLights:
+    def __init__(self, spec, grid=None):
+        self.pos_radius, self.color_intensity, self.orbit = point_lights(spec)
+        self.grid = grid or ClusterGrid()
+        self.light_data = np.empty((len(self.orbit), 2, 4), dtype=np.float32)
+        self.light_data[:, 1] = self.color_intensity
+        self.buffers = glGenBuffers(3)
+        self.textures = glGenTextures(3)
+        for buf, tex, fmt in zip(self.buffers, self.textures, (GL_RGBA32F, GL_RG32UI, GL_R32UI)):
+            glBindBuffer(GL_TEXTURE_BUFFER, buf)
+            glBufferData(GL_TEXTURE_BUFFER, 16, None, GL_DYNAMIC_DRAW)
+            glBindTexture(GL_TEXTURE_BUFFER, tex)
+            glTexBuffer(GL_TEXTURE_BUFFER, fmt, buf)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+        glBindTexture(GL_TEXTURE_BUFFER, 0)
+        self.pairs = 0
+
+    @property
+    def count(self):
+        return len(self.orbit)
+
+    def world_positions(self, seconds):
+        """Центры источников в момент seconds: поворот вокруг оси Y."""
+        angle = np.radians(self.orbit * seconds)
+        c, s = np.cos(angle), np.sin(angle)
+        x, y, z = self.pos_radius[:, 0], self.pos_radius[:, 1], self.pos_radius[:, 2]
+        return np.column_stack([c * x + s * z, y, c * z - s * x])
+
+    def update(self, view, proj, width, height, seconds):
+        """Распределение по кластерам для кадра: view, proj - матрицы numpy
+        (строки - как в математике)."""
+        world = self.world_positions(seconds)
+        self.grid.configure(proj, width, height)
+        view = np.asarray(view, dtype=np.float64)
+        centers = world @ view[:3, :3].T + view[:3, 3]
+        clusters, indices = self.grid.assign(centers, self.pos_radius[:, 3])
+        self.light_data[:, 0, :3] = world
+        self.light_data[:, 0, 3] = self.pos_radius[:, 3]
+        self.pairs = len(indices)
+        for buf, data in zip(self.buffers, (self.light_data, clusters, indices)):
+            # Пустой буфер недопустим - хотя бы один элемент
+            if not data.size:
+                data = np.zeros(4, dtype=data.dtype)
+            glBindBuffer(GL_TEXTURE_BUFFER, buf)
+            glBufferData(GL_TEXTURE_BUFFER, data.nbytes, data, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+    def bind(self):
+        for unit, tex in zip(LIGHT_UNITS, self.textures):
+            glActiveTexture(GL_TEXTURE0 + unit)
+            glBindTexture(GL_TEXTURE_BUFFER, tex)
+        glActiveTexture(GL_TEXTURE0)
+
+    def set_uniforms(self, prog):
+        for name, unit in zip(("lightData", "clusterData", "lightIndex"), LIGHT_UNITS):
+            glUniform1i(glGetUniformLocation(prog, name), unit)
+        grid = self.grid
+        glUniform3i(glGetUniformLocation(prog, "clusterDims"), *grid.dims)
+        glUniform2f(glGetUniformLocation(prog, "clusterTile"), *grid.tile_size())
+        glUniform2f(glGetUniformLocation(prog, "clusterDepth"), grid.depth_scale, grid.depth_bias)
@@ -0,0 +1,112 @@
+# File: lod.py
+# Уровни детализации (LOD) сгенерированных примитивов.
+# Генератор строит цепочку уровней, уменьшая число сегментов вдвое;
+# у каждого уровня есть геометрическая ошибка (насколько хорда отходит
+# от настоящей окружности). Уровень выбирается по ошибке в пикселях:
+# самый грубый, ошибка которого на экране не больше допуска.
+import math
+import numpy as np
+
+MAX_LODS = 4
+MOVE_CHUNK = 1 << 16  # экземпляров за порцию при начальном расчёте центров и ошибок
+
+# Параметры тесселяции каждого генератора: (имя, значение по умолчанию, минимум)
+LOD_PARAMS = {
+    "cone": (("slices", 64, 8),),
+    "cylinder": (("slices", 64, 8),),
+    "torus": (("radial_segments", 48, 8), ("tubular_segments", 32, 6)),
+    "sphere": (("slices", 64, 8), ("stacks", 32, 4)),
+    "disk": (("slices", 64, 8),),
+}
+
+
+def chord_error(radius, segments):
+    """Максимальное отклонение правильного многоугольника от окружности."""
+    return radius * (1.0 - math.cos(math.pi / segments))
+
+
+def _spec_error(spec):
+    gen = spec["generator"]
+    if gen in ("cone", "cylinder", "disk"):
+        return chord_error(spec["radius"], spec.get("slices", 64))
+    if gen == "torus":
+        outer = spec["radius_major"] + spec["radius_minor"]
+        return max(chord_error(outer, spec.get("radial_segments", 48)),
+                   chord_error(spec["radius_minor"], spec.get("tubular_segments", 32)))
+    if gen == "sphere":
+        return max(chord_error(spec["radius"], spec.get("slices", 64)),
+                   chord_error(spec["radius"], 2 * spec.get("stacks", 32)))
+    return 0.0
+
+
+def lod_chain(spec):
+    """Описания уровней [(spec, error), ...] от самого подробного к грубому.
+    Число уровней задаёт поле "lod_levels" (по умолчанию 1 - без LOD)."""
+    base = {k: v for k, v in spec.items() if k != "lod_levels"}
+    levels = min(int(spec.get("lod_levels", 1)), MAX_LODS)
+    params = LOD_PARAMS.get(base.get("generator"), ())
+    chain = [(base, _spec_error(base))]
+    for level in range(1, levels if params else 1):
+        coarse = dict(base)
+        for name, default, minimum in params:
+            coarse[name] = max(minimum, base.get(name, default) >> level)
+        if coarse == chain[-1][0]:
+            break
+        chain.append((coarse, _spec_error(coarse)))
+    return chain
+
+
+class LodSelector:
+    """Выбор уровней для всех экземпляров одного прохода.
+
+    tolerance  - допустимая ошибка в пикселях (текселях для карты теней);
+    hysteresis - запас при переходе на более грубый уровень: объект
+                 огрубляется, только если ошибка с запасом (1 + h) всё ещё
+                 в допуске, а уточняется сразу. Так уровень не "дрожит"
+                 на границе.
+    """
+    def __init__(self, ranges, objects, tolerance, hysteresis=0.25):
+        self.tolerance = tolerance
+        self.hysteresis = hysteresis
+        # (n_objects, MAX_LODS): номера диапазонов и ошибки в единицах мира
+        self.lod_ranges = ranges["lods"][objects["mesh"]]
+        self.level_errors = ranges["error"][self.lod_ranges]
+        bounds = ranges["bounds"][objects["mesh"]].astype(np.float64)
+        self.local_centers = (bounds[:, 0] + bounds[:, 1]) * 0.5
+        self.local_radii = np.linalg.norm(bounds[:, 1] - bounds[:, 0], axis=1) * 0.5
+        n = len(self.lod_ranges)
+        self.errors = np.zeros(self.level_errors.shape)
+        self.centers = np.zeros((n, 3))
+        self.radii = np.zeros(n)
+        # Матрицы - порциями: для .scnb это чтение отображённого файла по частям
+        for start in range(0, n, MOVE_CHUNK):
+            stop = min(start + MOVE_CHUNK, n)
+            self.move(np.arange(start, stop), objects["model"][start:stop])
+        self.levels = np.zeros(n, dtype=np.intp)
+
+    def move(self, indices, models):
+        """Новые мировые матрицы экземпляров indices: центры, радиусы и ошибки."""
+        models = np.asarray(models, dtype=np.float64)
+        scale = np.linalg.norm(models[:, :3, :3], axis=1).max(axis=1)
+        self.errors[indices] = self.level_errors[indices] * scale[:, None]
+        self.centers[indices] = np.einsum("nij,nj->ni", models[:, :3, :3], self.local_centers[indices]) + models[:, :3, 3]
+        self.radii[indices] = self.local_radii[indices] * scale
+
+    def _update(self, pixels_per_unit):
+        err = self.errors * pixels_per_unit[:, None]
+        fits = (err <= self.tolerance).sum(axis=1)
+        fits_margin = (err * (1.0 + self.hysteresis) <= self.tolerance).sum(axis=1)
+        desired = np.maximum(fits - 1, 0)
+        coarse_ok = np.maximum(fits_margin - 1, 0)
+        self.levels = np.minimum(np.maximum(self.levels, coarse_ok), desired)
+        return self.lod_ranges[np.arange(len(self.levels)), self.levels]
+
+    def select_perspective(self, cam_pos, fov_y_deg, viewport_height, near=1.0):
+        """Перспектива: пикселей на единицу мира у ближайшей точки объекта."""
+        focal = viewport_height * 0.5 / math.tan(math.radians(fov_y_deg) * 0.5)
+        dist = np.linalg.norm(self.centers - np.asarray(cam_pos, dtype=np.float64), axis=1) - self.radii
+        return self._update(focal / np.maximum(dist, near))
+
+    def select_ortho(self, extent, map_size):
+        """Ортографическая проекция (карта теней): масштаб одинаков для всех."""
+        return self._update(np.full(len(self.levels), map_size / (2.0 * extent)))
@@ -1,34 +1,79 @@
+import os
 import sys
+import time
+from collections import deque
+
 import numpy as np
 from pyglm import glm
 from OpenGL.GL import *
 from OpenGL.GLUT import *
-from shaders import DEPTH_VS, DEPTH_FS, SCENE_VS, SCENE_FS, create_program
-from utils import perspective, ortho, rotation_matrix
-from utils import set_mat4_uniform, draw_vao_elements, load_texture_file, print_controls
-from setup import generate_cone_data, generate_cylinder_data, generate_floor_data, setup_object_vao_vbo, generate_torus_data
+from shader_manager import ShaderManager
+from utils import perspective, ortho, rotation_matrix, GpuTimer, UniformBuffer, UniformLocations
+from utils import set_mat4_uniform, draw_mesh_range, load_texture_file, print_controls
+from setup import setup_object_vao_vbo, index_format, quantization_error, vertex_layout
+from scene_format import load_scene, rotate_m
+from lod import LodSelector
+from oit import WeightedBlendedOIT
+from deferred import GBuffer
+from render_scale import ScaledFramebuffer, ResolutionController, scaled_size, RENDER_SCALES, UPSCALE_FILTERS
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench.replay import install_recorder
+from spatial.bvh import BVH, frustum_planes
+from spatial.depth_sort import DepthSorter, view_depth
+from spatial.scene_graph import SceneGraph
+from lights import ClusteredLights
+
+SCENE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCENE = os.path.join(SCENE_DIR, "scenes", "default.json")
+
+# Прозрачность: "sorted" - экземпляры от дальних к ближним, "oit" - weighted blended OIT
+TRANSPARENCY_MODES = ("sorted", "oit")
+
+# Освещение непрозрачных: "forward" - в проходе объектов (перерисовка включена),
+# "deferred" - G-буфер и один полноэкранный проход (deferred.py)
+SHADING_MODES = ("forward", "deferred")
+
+DEFAULT_TARGET_MS = 1000.0 / 30.0  # цель контроллера разрешения, если сцена её не задала
+
+# Фильтры тени - перестановки shadow.glsl:
+#   pcf3x3  - 9 чтений глубины и сравнений в шейдере (исходный);
+#   hw2x2   - одна выборка sampler2DShadow: билинейный 2x2 PCF в текстурном блоке;
+#   hw3x3   - 3x3 аппаратных выборки;
+#   poisson - 16 аппаратных выборок по диску Пуассона, повёрнутому в каждом пикселе;
+#   pcss    - поиск блокеров + диск Пуассона переменного радиуса (мягкие тени)
+SHADOW_FILTERS = {
+    "pcf3x3": {"PCF_KERNEL": 3, "SHADOW_COMPARE": 0},
+    "hw2x2": {"PCF_KERNEL": 1, "SHADOW_COMPARE": 1},
+    "hw3x3": {"PCF_KERNEL": 3, "SHADOW_COMPARE": 1},
+    "poisson": {"PCF_KERNEL": 5, "SHADOW_COMPARE": 1, "POISSON_ROTATE": 1},
+    "pcss": {"PCF_KERNEL": 5, "SHADOW_COMPARE": 1, "POISSON_ROTATE": 1, "PCSS": 1},
+}
 
 class Scene:
-    def __init__(self):
+    def __init__(self, scene_path=DEFAULT_SCENE):
         self.window_width = 1200
         self.window_height = 800
-        self.cam_rot_x = 30.0
-        self.cam_rot_y = -30.0
-        self.cam_distance = 1000.0
-
-        self.cone_radius = 120.0
-        self.cone_height = 240.0
-        self.cyl_height = 220.0
-        self.cyl_radius = 70.0
-        self.torus_center = np.array([300.0, 125.0, 0.0], dtype=np.float32)
-        self.cone_center = np.array([-300.0, self.cone_height, 0.0], dtype=np.float32)
-        self.cyl_center = np.array([0.0, self.cyl_height/2.0, 0.0], dtype=np.float32)
-
-        self.light_enabled = True
-        self.light_pos = [500.0, 500.0, 800.0, 1.0]
-        self.light_intensity = 1.2
-        self.light_diffuse = [1.0, 1.0, 1.0, 1.0]
-        self.light_ambient = [0.08, 0.08, 0.08, 1.0]
+
+        # Описание сцены: объекты, материалы, камера и свет (JSON или .scnb)
+        self.scene_path = scene_path
+        self.data = load_scene(scene_path)
+
+        camera = self.data.camera
+        self.cam_rot_x = camera.get("rot_x", 30.0)
+        self.cam_rot_y = camera.get("rot_y", -30.0)
+        self.cam_distance = camera.get("distance", 1000.0)
+
+        light = self.data.light
+        self.light_enabled = light.get("enabled", True)
+        # xyz / rgb в float32 - меняются на месте и копируются в uniform без срезов
+        self.light_pos = np.array(light.get("position", [500.0, 500.0, 800.0, 1.0])[:3], dtype=np.float32)
+        self.light_intensity = light.get("intensity", 1.2)
+        self.light_diffuse = np.array(light.get("diffuse", [1.0, 1.0, 1.0, 1.0])[:3], dtype=np.float32)
+        self.light_ambient = np.array(light.get("ambient", [0.08, 0.08, 0.08, 1.0])[:3], dtype=np.float32)
+        # Точечные источники без теней с кластерным отбором (lights.py)
+        self.point_lights = self.data.meta.get("point_lights", [])
+        self.lights = None
 
         self.LIGHT_COLOR_PRESETS = [
             (1,0,0,1),
@@ -39,33 +84,108 @@ class Scene:
             (1, 1, 1, 1)
         ]
 
-        self.cone_texture_enabled = True
-        self.cone_texture_id = None
-
-        self.SHADOW_WIDTH, self.SHADOW_HEIGHT = 2048, 2048
+        self.textures_enabled = True
+        self.texture_ids = []
+
+        shadow = self.data.meta.get("shadow", {})
+        self.SHADOW_WIDTH = self.SHADOW_HEIGHT = shadow.get("size", 2048)
+        self.shadow_extent = shadow.get("extent", 1200.0)
+        self.shadow_near = shadow.get("near", 1.0)
+        self.shadow_far = shadow.get("far", 3000.0)
+        # Фильтр тени - перестановка шейдера (SHADOW_FILTERS), переключается клавишей h
+        self.shadow_filter = shadow.get("filter", "pcf3x3")
+        self.shadow_samplers = {}
+        self.scene_timer = None       # время основного прохода на GPU - цена фильтра
+        self.frame_times = deque()    # полное время последних кадров, окно - как у таймера
+        self.last_frame_time = None
+        self.cost_reported = False
         self.depthMapFBO = None
         self.depthMap = None
 
-        self.shaderProgram = None
+        # Динамическое разрешение (render_scale.py): доля окна, фильтр растяжения
+        # и, если задано target_ms, контроллер масштаба и размера карты теней
+        scaling = self.data.meta.get("render_scale", {})
+        self.render_scale = scaling.get("scale", 1.0)
+        self.upscale_filter = scaling.get("filter", "bilinear")
+        self.sharpness = scaling.get("sharpness", 0.25)
+        self.target_frame_ms = scaling.get("target_ms")
+        self.base_shadow_size = self.SHADOW_WIDTH
+        self.scaled_fb = None
+        self.resolution = None
+
+        self.shaders = None
         self.depthShader = None
-
-        self.cone_VAO = self.cone_VBO = self.cone_EBO = None
-        self.cone_num_indices = 0
-        self.cyl_VAO = self.cyl_VBO = self.cyl_EBO = None
-        self.cyl_num_indices = 0
-        self.floor_VAO = self.floor_VBO = self.floor_EBO = None
-        self.floor_num_indices = 0
-        self.torus_VAO = self.torus_VBO = self.torus_EBO = None
-        self.torus_num_indices = 0
+        self.material_programs = {}   # (материал, OIT) -> программа перестановки
+        self.frame_programs = set()   # программы, получившие uniform текущего кадра
+        # Uniform кадра готовятся один раз за кадр (stage_frame_uniforms) в буферы,
+        # созданные здесь, и раздаются программам без преобразований PyOpenGL;
+        # расположения - из кэша, векторы камеры и света меняются на месте
+        self.locations = UniformLocations()
+        self.u_view = UniformBuffer(4, 4)
+        self.u_projection = UniformBuffer(4, 4)
+        self.u_light_space = UniformBuffer(4, 4)
+        self.u_view_pos = UniformBuffer(3)
+        self.u_light_pos = UniformBuffer(3)
+        self.u_light_color = UniformBuffer(3)
+        self.u_light_ambient = UniformBuffer(3)
+        self.u_materials = [(UniformBuffer(3), UniformBuffer(3)) for _ in self.data.materials]
+        for (diffuse, specular), mat in zip(self.u_materials, self.data.materials):
+            diffuse.array[:] = mat["diffuse"]
+            specular.array[:] = mat["specular"]
+        self.cam_eye = glm.vec3(0.0, 400.0, 0.0)
+        self.cam_eye4 = glm.vec4(0.0, 400.0, 0.0, 1.0)
+        self.light_eye = glm.vec3(0.0)
+        self.origin = glm.vec3(0.0)
+        self.up = glm.vec3(0.0, 1.0, 0.0)
+        self.oit = None
+        self.shading = self.data.meta.get("shading", "forward")
+        self.gbuffer = None
+
+        # Все меши сцены лежат в одном VBO/EBO
+        self.scene_VAO = self.scene_VBO = self.scene_EBO = None
+        self.vertex_format = self.data.meta.get("vertex_format", "float32")
+        self.index_type = GL_UNSIGNED_INT
+        self.draw_order = self.data.draw_order()
+        transparent = self.data.materials["transparent"][self.data.objects["material"]][self.draw_order]
+        self.opaque_order = self.draw_order[~transparent.astype(bool)]
+        self.transparent_order = self.draw_order[transparent.astype(bool)]
+        self.transparency = "sorted"
+        self.transparent_sorter = DepthSorter("incremental")
+
+        # Уровни детализации: отдельно для камеры и для карты теней
+        lod = self.data.meta.get("lod", {})
+        self.lod_enabled = True
+        self.fov = 50.0
+        hysteresis = lod.get("hysteresis", 0.25)
+        self.view_lod = LodSelector(self.data.ranges, self.data.objects, lod.get("tolerance", 0.5), hysteresis)
+        self.shadow_lod = LodSelector(self.data.ranges, self.data.objects, lod.get("shadow_tolerance", 1.5), hysteresis)
+        self.view_ranges = self.shadow_ranges = np.asarray(self.data.objects["mesh"])
+
+        # Иерархия экземпляров: мировые матрицы считаются один раз за кадр и только
+        # у сдвинутых поддеревьев; тени, G-буфер и прямой проход берут их из world32
+        # Граф строится порциями экземпляров (родитель всегда в этой или прошлой)
+        self.graph = SceneGraph(max(len(self.data.objects), 1))
+        for _, block in self.data.iter_objects():
+            self.graph.add_world(block["parent"], block["model"])
+        self.selected = -1
+
+        # BVH экземпляров: отсечение пирамидой камеры и света, выбор мышью
+        bounds = self.data.world_bounds()
+        self.object_bvh = BVH(*bounds)
+        self.object_centers = (bounds[0] + bounds[1]) * 0.5
+        self.view_visible = np.ones(len(self.data.objects), dtype=bool)
+        self.shadow_visible = np.ones(len(self.data.objects), dtype=bool)
+        self.view_proj = None
 
     def init(self):
         glClearColor(0.6,0.6,0.6,1.0)
         glEnable(GL_DEPTH_TEST)
         glDisable(GL_CULL_FACE)
 
-        self.depthShader = create_program(DEPTH_VS, DEPTH_FS)
-        self.shaderProgram = create_program(SCENE_VS, SCENE_FS)
-        print("[INFO] Shaders compiled.")
+        self.shaders = ShaderManager()
+        self.load_shaders()
+        stats = self.shaders.stats
+        print(f"[INFO] Shaders ready: {stats['compiled']} compiled, {stats['cached']} from cache.")
 
         self.depthMapFBO = glGenFramebuffers(1)
         self.depthMap = glGenTextures(1)
@@ -79,6 +199,19 @@ class Scene:
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_BORDER)
         border = (GLfloat*4)(1.0,1.0,1.0,1.0)
         glTexParameterfv(GL_TEXTURE_2D, GL_TEXTURE_BORDER_COLOR, border)
+        # Та же текстура читается двумя способами: глубина (sampler2D) или
+        # аппаратное сравнение (sampler2DShadow) - режим задают объекты-сэмплеры
+        for compare in (False, True):
+            sampler = glGenSamplers(1)
+            glSamplerParameteri(sampler, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+            glSamplerParameteri(sampler, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+            glSamplerParameteri(sampler, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_BORDER)
+            glSamplerParameteri(sampler, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_BORDER)
+            glSamplerParameterfv(sampler, GL_TEXTURE_BORDER_COLOR, border)
+            if compare:
+                glSamplerParameteri(sampler, GL_TEXTURE_COMPARE_MODE, GL_COMPARE_REF_TO_TEXTURE)
+                glSamplerParameteri(sampler, GL_TEXTURE_COMPARE_FUNC, GL_LEQUAL)
+            self.shadow_samplers[compare] = sampler
         glBindFramebuffer(GL_FRAMEBUFFER, self.depthMapFBO)
         glFramebufferTexture2D(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_TEXTURE_2D, self.depthMap, 0)
         glDrawBuffer(GL_NONE)
@@ -89,120 +222,287 @@ class Scene:
             print("[INFO] Depth FBO OK")
         glBindFramebuffer(GL_FRAMEBUFFER, 0)
 
-        cone_verts, cone_inds, cone_count = generate_cone_data(self.cone_radius, self.cone_height, 64)
-        self.cone_VAO, self.cone_VBO, self.cone_EBO = setup_object_vao_vbo(cone_verts, cone_inds)
-        self.cone_num_indices = cone_count
-
-        cyl_verts, cyl_inds, cyl_count = generate_cylinder_data(self.cyl_radius, self.cyl_height, 64)
-        self.cyl_VAO, self.cyl_VBO, self.cyl_EBO = setup_object_vao_vbo(cyl_verts, cyl_inds)
-        self.cyl_num_indices = cyl_count
-
-        torus_verts, torus_inds, torus_count = generate_torus_data(120, 40, 48, 32)
-        self.torus_VAO, self.torus_VBO, self.torus_EBO = setup_object_vao_vbo(torus_verts, torus_inds)
-        self.torus_num_indices = torus_count
-
-        floor_verts, floor_inds, floor_count = generate_floor_data(2000, 10)
-        self.floor_VAO, self.floor_VBO, self.floor_EBO = setup_object_vao_vbo(floor_verts, floor_inds)
-        self.floor_num_indices = floor_count
-
-        self.cone_texture_id = load_texture_file("sphere_texture.jpg")
+        # Геометрия всех объектов - в один VBO/EBO, порциями прямо из данных сцены
+        index_dtype, self.index_type = index_format(self.data.indices)
+        self.scene_VAO, self.scene_VBO, self.scene_EBO = setup_object_vao_vbo(
+            self.data.vertices, self.data.indices, self.vertex_format, index_dtype)
+        if self.vertex_format != "float32":
+            err = quantization_error(self.data.vertices, self.vertex_format)
+            print(f"[INFO] Vertex format '{self.vertex_format}': {vertex_layout(self.vertex_format)[0].itemsize} B/vertex, "
+                  f"max error: position {err['position']:.4f}, normal {err['normal_deg']:.2f} deg, uv {err['uv']:.5f}")
+        print(f"[INFO] Scene '{os.path.basename(self.scene_path)}': {len(self.data.ranges)} meshes, "
+              f"{len(self.data.objects)} objects")
+
+        self.texture_ids = [load_texture_file(path) for path in self.data.textures]
+        self.oit = WeightedBlendedOIT(self.window_width, self.window_height)
+        self.gbuffer = GBuffer(self.window_width, self.window_height)
+        self.scaled_fb = ScaledFramebuffer()
+        if self.target_frame_ms:
+            self.resolution = ResolutionController(self.target_frame_ms)
+        if self.point_lights:
+            self.lights = ClusteredLights(self.point_lights)
+            print(f"[INFO] Point lights: {self.lights.count}, clusters {'x'.join(map(str, self.lights.grid.dims))}")
+        self.scene_timer = GpuTimer()
+        self.frame_times = deque(maxlen=self.scene_timer.window)
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
         print_controls()
 
+    def load_shaders(self):
+        """id программ из менеджера (после перезагрузки без кэша бинарей они меняются).
+        Перестановки сцены собираются лениво, при первой встрече материала."""
+        self.depthShader = self.shaders.program("depth.vert", "depth.frag")
+        self.material_programs = {}
+        self.locations.clear()
+
+    def lighting_defines(self):
+        defines = {"SHADOW_SIZE": self.SHADOW_WIDTH, "CLUSTERED_LIGHTS": int(self.lights is not None)}
+        defines.update(SHADOW_FILTERS[self.shadow_filter])
+        return defines
+
+    def material_program(self, mat_id, output="forward"):
+        """Перестановка под материал: scene.frag с текущими настройками тени
+        (output "forward" или "oit") либо gbuffer.frag (output "gbuffer")."""
+        key = (mat_id, output)
+        prog = self.material_programs.get(key)
+        if prog is None:
+            mat = self.data.materials[mat_id]
+            defines = {"USE_TEXTURE": int(mat["texture"] >= 0 and self.textures_enabled)}
+            if output == "gbuffer":
+                prog = self.shaders.program("scene.vert", "gbuffer.frag", defines)
+            else:
+                defines["TRANSPARENT"] = int(mat["transparent"])
+                defines.update(self.lighting_defines())
+                if output == "oit":
+                    defines["OIT"] = 1
+                prog = self.shaders.program("scene.vert", "scene.frag", defines)
+            self.material_programs[key] = prog
+        return prog
+
+    def deferred_program(self):
+        """Полноэкранное освещение G-буфера с теми же перестановками тени и света."""
+        prog = self.material_programs.get("deferred")
+        if prog is None:
+            prog = self.material_programs["deferred"] = self.shaders.program(
+                "composite.vert", "deferred.frag", self.lighting_defines())
+        return prog
+
+    def upscale_program(self):
+        return self.shaders.program("composite.vert", "upscale.frag",
+                                    {"SHARPEN": int(self.upscale_filter == "sharpen")})
+
+    def resize_shadow_map(self, size):
+        """Новый размер карты теней: та же текстура (FBO не меняется), перестановки
+        сцены пересобираются - размер входит в них константой."""
+        self.SHADOW_WIDTH = self.SHADOW_HEIGHT = size
+        glBindTexture(GL_TEXTURE_2D, self.depthMap)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_DEPTH_COMPONENT24, size, size, 0, GL_DEPTH_COMPONENT, GL_FLOAT, None)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        self.material_programs = {}
+
     def compute_light_space_matrix(self):
-        left, right, bottom, top = -1200.0, 1200.0, -1200.0, 1200.0
-        near, far = 1.0, 3000.0
+        e = self.shadow_extent
+        left, right, bottom, top = -e, e, -e, e
+        near, far = self.shadow_near, self.shadow_far
         lightProj = ortho(left, right, bottom, top, near, far)
-        eye = glm.vec3(*self.light_pos[:3])
-        center = glm.vec3(0.0, 0.0, 0.0)
-        up = glm.vec3(0.0, 1.0, 0.0)
-        lightView = glm.lookAt(eye, center, up)
+        eye = self.light_eye
+        eye.x, eye.y, eye.z = self.light_pos[0], self.light_pos[1], self.light_pos[2]
+        lightView = glm.lookAt(eye, self.origin, self.up)
         return lightProj * lightView
 
-    def render_depth(self, prog):
-        set_mat4_uniform(prog, "model", glm.mat4(1.0))
-        draw_vao_elements(self.floor_VAO, self.floor_EBO, self.floor_num_indices)
-
-        model_cone = glm.translate(glm.mat4(1.0), glm.vec3(*self.cone_center))
-        model_cone = glm.rotate(model_cone, glm.radians(-90.0), glm.vec3(1.0, 0.0, 0.0))
-        model_cone = glm.translate(model_cone, glm.vec3(0.0, 0.0, -self.cone_height / 2.0))
-        set_mat4_uniform(prog, "model", model_cone)
-        draw_vao_elements(self.cone_VAO, self.cone_EBO, self.cone_num_indices)
-
-        set_mat4_uniform(prog, "model", glm.translate(glm.mat4(1.0), glm.vec3(*self.cyl_center)))
-        draw_vao_elements(self.cyl_VAO, self.cyl_EBO, self.cyl_num_indices)
+    def draw_object(self, range_id):
+        r = self.data.ranges[range_id]
+        draw_mesh_range(int(r["first_index"]), int(r["index_count"]), int(r["base_vertex"]), self.index_type)
+
+    def select_lods(self, view, height):
+        if not self.lod_enabled:
+            self.view_ranges = self.shadow_ranges = np.asarray(self.data.objects["mesh"])
+            return
+        cam_pos = glm.inverse(view) * glm.vec4(0.0, 0.0, 0.0, 1.0)
+        self.view_ranges = self.view_lod.select_perspective(
+            (cam_pos.x, cam_pos.y, cam_pos.z), self.fov, height)
+        self.shadow_ranges = self.shadow_lod.select_ortho(self.shadow_extent, self.SHADOW_WIDTH)
+
+    def cull(self, view_proj, lightSpace):
+        self.view_visible[:] = False
+        self.view_visible[self.object_bvh.query_frustum(frustum_planes(np.array(view_proj)))] = True
+        self.shadow_visible[:] = False
+        self.shadow_visible[self.object_bvh.query_frustum(frustum_planes(np.array(lightSpace)))] = True
+
+    def update_transforms(self):
+        """Пересчёт сдвинутых поддеревьев; BVH, центры для сортировки и LOD
+        следуют за ними. Без движения - ничего не делает."""
+        moved = self.graph.update()
+        if not len(moved):
+            return
+        world = self.graph.world[:len(self.data.objects)]
+        bounds = self.data.world_bounds(world)
+        self.object_bvh.refit(*bounds)
+        self.object_centers = (bounds[0] + bounds[1]) * 0.5
+        self.view_lod.move(moved, world[moved])
+        self.shadow_lod.move(moved, world[moved])
+
+    def pick(self, x, y):
+        """Объект под курсором: луч из камеры через пиксель (x, y) в BVH экземпляров."""
+        if self.view_proj is None:
+            return -1
+        inv = glm.inverse(self.view_proj)
+        ndc_x = 2.0 * x / self.window_width - 1.0
+        ndc_y = 1.0 - 2.0 * y / self.window_height
+        near = inv * glm.vec4(ndc_x, ndc_y, -1.0, 1.0)
+        far = inv * glm.vec4(ndc_x, ndc_y, 1.0, 1.0)
+        origin = np.array(near.xyz / near.w)
+        t, hit = self.object_bvh.intersect_rays(origin, np.array(far.xyz / far.w) - origin)
+        return int(hit[0])
 
-        set_mat4_uniform(prog, "model", glm.translate(glm.mat4(1.0), glm.vec3(*self.torus_center)))
-        draw_vao_elements(self.torus_VAO, self.torus_EBO, self.torus_num_indices)
-
-    def render_scene(self, prog, view_mat, proj_mat, lightSpace):
-        set_mat4_uniform(prog, "view", view_mat)
-        set_mat4_uniform(prog, "projection", proj_mat)
-        set_mat4_uniform(prog, "lightSpaceMatrix", lightSpace)
-
-        rot = rotation_matrix(self.cam_rot_x, self.cam_rot_y)
-        cam_pos = np.dot(rot, np.array([0.0, 400.0, self.cam_distance, 1.0], dtype=np.float32))[:3]
-        glUniform3fv(glGetUniformLocation(prog, "viewPos"), 1, cam_pos)
+    def render_depth(self, prog):
+        glBindVertexArray(self.scene_VAO)
+        model = self.locations(prog, "model")
+        for i in self.draw_order:
+            if not self.shadow_visible[i]:
+                continue
+            glUniformMatrix4fv(model, 1, GL_TRUE, self.graph.world32[i])
+            self.draw_object(self.shadow_ranges[i])
+        glBindVertexArray(0)
+
+    def apply_material(self, prog, mat_id):
+        mat = self.data.materials[mat_id]
+        diffuse, specular = self.u_materials[mat_id]
+        glUniform3fv(self.locations(prog, "materialDiffuse"), 1, diffuse.data)
+        glUniform3fv(self.locations(prog, "materialSpecular"), 1, specular.data)
+        glUniform1f(self.locations(prog, "materialShininess"), float(mat["shininess"]))
+        if mat["texture"] >= 0 and self.textures_enabled:
+            glActiveTexture(GL_TEXTURE0)
+            glBindTexture(GL_TEXTURE_2D, self.texture_ids[mat["texture"]])
+
+    def stage_frame_uniforms(self, view, proj, lightSpace, rot):
+        """Значения uniform кадра - в постоянные буферы, один раз за кадр."""
+        self.u_view.array[:] = view
+        self.u_projection.array[:] = proj
+        self.u_light_space.array[:] = lightSpace
+        self.cam_eye4.z = self.cam_distance
+        self.u_view_pos.array[:] = (rot * self.cam_eye4).xyz
+        self.u_light_pos.array[:] = self.light_pos
+        self.u_light_color.array[:] = self.light_diffuse if self.light_enabled else 0.0
+        self.u_light_ambient.array[:] = self.light_ambient
+
+    def set_frame_uniforms(self, prog):
+        loc = self.locations
+        glUniformMatrix4fv(loc(prog, "view"), 1, GL_TRUE, self.u_view.data)
+        glUniformMatrix4fv(loc(prog, "projection"), 1, GL_TRUE, self.u_projection.data)
+        glUniformMatrix4fv(loc(prog, "lightSpaceMatrix"), 1, GL_TRUE, self.u_light_space.data)
+        glUniform3fv(loc(prog, "viewPos"), 1, self.u_view_pos.data)
 
         eff_intensity = self.light_intensity if self.light_enabled else 0.0
-        eff_color = self.light_diffuse[:3] if self.light_enabled else [0.0, 0.0, 0.0]
-
-        glUniform3fv(glGetUniformLocation(prog, "lightPos"), 1, self.light_pos[:3])
-        glUniform3fv(glGetUniformLocation(prog, "lightColor"), 1, eff_color)
-        glUniform1f(glGetUniformLocation(prog, "lightIntensity"), eff_intensity)
-        glUniform3fv(glGetUniformLocation(prog, "lightAmbient"), 1, self.light_ambient[:3])
-
-        glActiveTexture(GL_TEXTURE1)
-        glBindTexture(GL_TEXTURE_2D, self.depthMap)
-        glUniform1i(glGetUniformLocation(prog, "shadowMap"), 1)
-
-        model = glm.mat4(1.0)
-        set_mat4_uniform(prog, "model", model)
-        glUniform3fv(glGetUniformLocation(prog, "materialDiffuse"), 1, [0.92, 0.92, 0.90])
-        glUniform3fv(glGetUniformLocation(prog, "materialSpecular"), 1, [0.02, 0.02, 0.02])
-        glUniform1f(glGetUniformLocation(prog, "materialShininess"), 1.0)
-        glUniform1i(glGetUniformLocation(prog, "useTexture"), 0)
-        glUniform1i(glGetUniformLocation(prog, "isTransparent"), 0)
-        draw_vao_elements(self.floor_VAO, self.floor_EBO, self.floor_num_indices)
-
-        model_cone = glm.translate(glm.mat4(1.0), glm.vec3(*self.cone_center))
-        model_cone = glm.rotate(model_cone, glm.radians(-90.0), glm.vec3(1.0, 0.0, 0.0))
-        model_cone = glm.translate(model_cone, glm.vec3(0.0, 0.0, -self.cone_height / 2.0))
-        set_mat4_uniform(prog, "model", model_cone)
-        glUniform3fv(glGetUniformLocation(prog, "materialSpecular"), 1, [0.05, 0.05, 0.05])
-        glUniform1f(glGetUniformLocation(prog, "materialShininess"), 2.0)
-        if self.cone_texture_enabled:
-            glActiveTexture(GL_TEXTURE0)
-            glBindTexture(GL_TEXTURE_2D, self.cone_texture_id)
-            glUniform1i(glGetUniformLocation(prog, "useTexture"), 1)
+        glUniform3fv(loc(prog, "lightPos"), 1, self.u_light_pos.data)
+        glUniform3fv(loc(prog, "lightColor"), 1, self.u_light_color.data)
+        glUniform1f(loc(prog, "lightIntensity"), eff_intensity)
+        glUniform3fv(loc(prog, "lightAmbient"), 1, self.u_light_ambient.data)
+        glUniform1i(loc(prog, "shadowMap"), 1)
+        glUniform1i(loc(prog, "shadowDepth"), 2)
+        if self.lights is not None:
+            self.lights.set_uniforms(prog)
+
+    def use_program(self, prog):
+        """Переключение перестановки; uniform кадра задаются при первом использовании за кадр."""
+        glUseProgram(prog)
+        if prog not in self.frame_programs:
+            self.set_frame_uniforms(prog)
+            self.frame_programs.add(prog)
+
+    def draw_objects(self, order, output="forward"):
+        """Видимые объекты в заданном порядке. Перестановка шейдера выбирается по
+        материалу; материал и программа переустанавливаются только при смене."""
+        current_material = current_program = None
+        for i in order:
+            if not self.view_visible[i]:
+                continue
+            obj = self.data.objects[i]
+            mat_id = int(obj["material"])
+            if mat_id != current_material:
+                prog = self.material_program(mat_id, output)
+                if prog != current_program:
+                    self.use_program(prog)
+                    current_program = prog
+                    model = self.locations(prog, "model")
+                self.apply_material(prog, mat_id)
+                current_material = mat_id
+            glUniformMatrix4fv(model, 1, GL_TRUE, self.graph.world32[i])
+            self.draw_object(self.view_ranges[i])
+
+    def sorted_transparent(self, order, view_mat):
+        """Прозрачные экземпляры от дальних к ближним (по центрам AABB)."""
+        if len(order) < 2:
+            return order
+        depth = view_depth(self.object_centers[order], np.array(view_mat))
+        return order[self.transparent_sorter.sort(depth)]
+
+    def render_scene(self, view_mat, proj_mat, lightSpace):
+        self.frame_programs.clear()
+        # Карта теней: unit 1 - с аппаратным сравнением или без (по фильтру),
+        # unit 2 - чистая глубина для поиска блокеров PCSS
+        compare = bool(SHADOW_FILTERS[self.shadow_filter]["SHADOW_COMPARE"])
+        for unit, sampler in ((1, self.shadow_samplers[compare]), (2, self.shadow_samplers[False])):
+            glActiveTexture(GL_TEXTURE0 + unit)
+            glBindTexture(GL_TEXTURE_2D, self.depthMap)
+            glBindSampler(unit, sampler)
+        glActiveTexture(GL_TEXTURE0)
+        if self.lights is not None:
+            self.lights.bind()
+
+        # Сначала непрозрачные (сгруппированы по материалам) - сразу с освещением
+        # или через G-буфер, затем прозрачные без записи глубины: отсортированные
+        # или в буферы OIT
+        glBindVertexArray(self.scene_VAO)
+        if self.shading == "deferred":
+            self.render_deferred(view_mat, proj_mat)
         else:
-            glUniform1i(glGetUniformLocation(prog, "useTexture"), 0)
-        glUniform1i(glGetUniformLocation(prog, "isTransparent"), 0)
-        draw_vao_elements(self.cone_VAO, self.cone_EBO, self.cone_num_indices)
-
-        set_mat4_uniform(prog, "model", glm.translate(glm.mat4(1.0), glm.vec3(*self.torus_center)))
-        glUniform3fv(glGetUniformLocation(prog, "materialDiffuse"), 1, [0.0, 1.0, 0.0])
-        glUniform3fv(glGetUniformLocation(prog, "materialSpecular"), 1, [0.6, 0.6, 0.6])
-        glUniform1f(glGetUniformLocation(prog, "materialShininess"), 64.0)
-        glUniform1i(glGetUniformLocation(prog, "useTexture"), 0)
-        glUniform1i(glGetUniformLocation(prog, "isTransparent"), 0)
-        draw_vao_elements(self.torus_VAO, self.torus_EBO, self.torus_num_indices)
-
-        glDepthMask(GL_FALSE)
-        glEnable(GL_BLEND)
-        set_mat4_uniform(prog, "model", glm.translate(glm.mat4(1.0), glm.vec3(*self.cyl_center)))
-        glUniform3fv(glGetUniformLocation(prog, "materialDiffuse"), 1, [0.9, 0.5, 1.0])
-        glUniform3fv(glGetUniformLocation(prog, "materialSpecular"), 1, [0.1, 0.1, 0.1])
-        glUniform1f(glGetUniformLocation(prog, "materialShininess"), 4.0)
-        glUniform1i(glGetUniformLocation(prog, "useTexture"), 0)
-        glUniform1i(glGetUniformLocation(prog, "isTransparent"), 1)
-        draw_vao_elements(self.cyl_VAO, self.cyl_EBO, self.cyl_num_indices)
-        glDepthMask(GL_TRUE)
-        glDisable(GL_BLEND)
+            self.draw_objects(self.opaque_order)
+        transparent = self.transparent_order[self.view_visible[self.transparent_order]]
+        if self.transparency == "oit":
+            self.oit.begin_transparent()
+            self.draw_objects(transparent, output="oit")
+        elif len(transparent):
+            glDepthMask(GL_FALSE)
+            glEnable(GL_BLEND)
+            self.draw_objects(self.sorted_transparent(transparent, view_mat))
+            glDepthMask(GL_TRUE)
+            glDisable(GL_BLEND)
+        glBindVertexArray(0)
+        glUseProgram(0)
+        glBindSampler(1, 0)
+        glBindSampler(2, 0)
+
+    def render_deferred(self, view_mat, proj_mat):
+        """Непрозрачные в G-буфер, затем освещение одним проходом в текущий буфер."""
+        target = self.gbuffer.begin()
+        self.draw_objects(self.opaque_order, output="gbuffer")
+        prog = self.deferred_program()
+        self.use_program(prog)
+        set_mat4_uniform(prog, "invViewProj", glm.inverse(self.view_proj))
+        self.gbuffer.light(prog, target)
+        glBindVertexArray(self.scene_VAO)
 
     def display(self):
+        if self.shaders.poll():
+            self.load_shaders()
+        self.cam_eye.z = self.cam_distance
+        rot = rotation_matrix(self.cam_rot_x, self.cam_rot_y)
+        view = glm.lookAt(self.cam_eye, self.origin, self.up) * rot
+        proj = perspective(self.fov, self.window_width / float(self.window_height), 1.0, 5000.0)
+        # Кадр рисуется в render_w x render_h; меньше окна - через ScaledFramebuffer
+        render_w, render_h = scaled_size(self.window_width, self.window_height, self.render_scale)
+        scaled = (render_w, render_h) != (self.window_width, self.window_height)
+        self.update_transforms()
+        self.select_lods(view, render_h)
+
         lightSpace = self.compute_light_space_matrix()
+        self.view_proj = proj * view
+        self.stage_frame_uniforms(view, proj, lightSpace, rot)
+        self.cull(self.view_proj, lightSpace)
+        if self.lights is not None:
+            self.lights.update(np.array(view), np.array(proj), render_w, render_h,
+                               glutGet(GLUT_ELAPSED_TIME) / 1000.0)
 
         glViewport(0, 0, self.SHADOW_WIDTH, self.SHADOW_HEIGHT)
         glBindFramebuffer(GL_FRAMEBUFFER, self.depthMapFBO)
@@ -210,26 +510,72 @@ class Scene:
         glEnable(GL_POLYGON_OFFSET_FILL)
         glPolygonOffset(8.0, 32.0)
         glUseProgram(self.depthShader)
-        set_mat4_uniform(self.depthShader, "lightSpaceMatrix", lightSpace)
+        glUniformMatrix4fv(self.locations(self.depthShader, "lightSpaceMatrix"), 1, GL_TRUE, self.u_light_space.data)
         self.render_depth(self.depthShader)
         glUseProgram(0)
         glDisable(GL_POLYGON_OFFSET_FILL)
         glBindFramebuffer(GL_FRAMEBUFFER, 0)
 
-        glViewport(0, 0, self.window_width, self.window_height)
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        glUseProgram(self.shaderProgram)
-
-        eye = glm.vec3(0.0, 400.0, self.cam_distance)
-        center = glm.vec3(0.0, 0.0, 0.0)
-        up = glm.vec3(0.0, 1.0, 0.0)
-        view = glm.lookAt(eye, center, up) * rotation_matrix(self.cam_rot_x, self.cam_rot_y)
-        proj = perspective(50.0, self.window_width / float(self.window_height), 1.0, 5000.0)
-
-        self.render_scene(self.shaderProgram, view, proj, lightSpace)
-        glUseProgram(0)
+        if scaled:
+            self.scaled_fb.begin(render_w, render_h)
+        else:
+            glViewport(0, 0, self.window_width, self.window_height)
+        self.oit.resize(render_w, render_h)
+        self.gbuffer.resize(render_w, render_h)
+        if self.transparency == "oit":
+            self.oit.begin_opaque()
+        else:
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        self.scene_timer.begin()
+        self.render_scene(view, proj, lightSpace)
+        self.scene_timer.end()
+        if self.transparency == "oit":
+            self.oit.resolve(self.scaled_fb.fbo if scaled else 0)
+        if scaled:
+            self.scaled_fb.present(self.upscale_program(), self.window_width, self.window_height, self.sharpness)
+        self.report_shadow_cost()
+        self.update_resolution()
         glutSwapBuffers()
 
+    def report_shadow_cost(self):
+        """Цена фильтра после window кадров с ним: время основного прохода по запросу
+        GL_TIME_ELAPSED и полное время кадра (программные драйверы вроде llvmpipe
+        растеризуют при сбросе конвейера, и запрос их почти не видит)."""
+        now = time.perf_counter()
+        if self.last_frame_time is not None:
+            self.frame_times.append((now - self.last_frame_time) * 1000.0)
+        self.last_frame_time = now
+        timer = self.scene_timer
+        if not self.cost_reported and len(timer.samples) == timer.window and len(self.frame_times) == timer.window:
+            print(f"[INFO] Shadow filter {self.shadow_filter}, {self.shading} shading: scene pass {timer.average_ms():.2f} ms (GPU), "
+                  f"frame {sum(self.frame_times) / len(self.frame_times):.2f} ms")
+            self.cost_reported = True
+
+    def update_resolution(self):
+        """Шаг контроллера динамического разрешения по времени последнего кадра."""
+        if self.resolution is None or not self.frame_times:
+            return
+        if self.resolution.update(self.frame_times[-1]):
+            self.apply_resolution_level()
+            print(f"[INFO] Render scale {self.render_scale:.2f}, shadow map {self.SHADOW_WIDTH} "
+                  f"(frame {self.frame_times[-1]:.1f} ms, target {self.resolution.target_ms:.1f} ms)")
+
+    def apply_resolution_level(self):
+        self.render_scale = self.resolution.scale
+        size = self.resolution.shadow_size(self.base_shadow_size)
+        if size != self.SHADOW_WIDTH:
+            self.resize_shadow_map(size)
+
+    def set_shadow_filter(self, name):
+        self.shadow_filter = name
+        self.material_programs = {}
+        self.reset_cost()
+
+    def reset_cost(self):
+        self.scene_timer.reset()
+        self.frame_times.clear()
+        self.cost_reported = False
+
     def reshape(self, w, h):
         self.window_width = w
         self.window_height = h
@@ -238,9 +584,10 @@ class Scene:
     def keyboard(self,key,x,y):
         k = key.decode() if isinstance(key, bytes) else key
         if k == '0':
-            self.cone_texture_enabled = not self.cone_texture_enabled
+            self.textures_enabled = not self.textures_enabled
+            self.material_programs = {}
         elif k in '123456':
-            self.light_diffuse = self.LIGHT_COLOR_PRESETS[int(k)-1]
+            self.light_diffuse[:] = self.LIGHT_COLOR_PRESETS[int(k)-1][:3]
         elif k in ('=', '+'):
             self.light_intensity = min(5.0, self.light_intensity+0.1)
         elif k == '-':
@@ -251,6 +598,48 @@ class Scene:
             self.cam_distance += 50.0
         elif k == ']':
             self.cam_distance = max(200.0,self.cam_distance-50.0)
+        elif k == 'l':
+            self.lod_enabled = not self.lod_enabled
+            print(f"[INFO] LOD {'on' if self.lod_enabled else 'off'}")
+        elif k == 'b':
+            modes = TRANSPARENCY_MODES
+            self.transparency = modes[(modes.index(self.transparency) + 1) % len(modes)]
+            print(f"[INFO] Transparency: {self.transparency}")
+        elif k == 'h':
+            names = list(SHADOW_FILTERS)
+            self.set_shadow_filter(names[(names.index(self.shadow_filter) + 1) % len(names)])
+            print(f"[INFO] Shadow filter: {self.shadow_filter}")
+        elif k == 'g':
+            self.shading = SHADING_MODES[(SHADING_MODES.index(self.shading) + 1) % len(SHADING_MODES)]
+            self.reset_cost()
+            print(f"[INFO] Shading: {self.shading}")
+        elif k == 'v':
+            # Ручной масштаб отключает контроллер
+            if self.resolution is not None:
+                self.resolution = None
+                self.resize_shadow_map(self.base_shadow_size)
+            scales = RENDER_SCALES
+            i = scales.index(self.render_scale) if self.render_scale in scales else -1
+            self.render_scale = scales[(i + 1) % len(scales)]
+            print(f"[INFO] Render scale: {self.render_scale:.2f}")
+        elif k == 'n':
+            filters = UPSCALE_FILTERS
+            self.upscale_filter = filters[(filters.index(self.upscale_filter) + 1) % len(filters)]
+            print(f"[INFO] Upscale filter: {self.upscale_filter}")
+        elif k == 'm':
+            if self.resolution is None:
+                self.resolution = ResolutionController(self.target_frame_ms or DEFAULT_TARGET_MS)
+                self.apply_resolution_level()
+            else:
+                self.resolution = None
+                self.render_scale = 1.0
+                self.resize_shadow_map(self.base_shadow_size)
+            print(f"[INFO] Dynamic resolution {'on' if self.resolution else 'off'}")
+        elif k == 'y':
+            # Поворот выбранного объекта вокруг его оси Y; дочерние следуют за ним
+            if self.selected >= 0:
+                i = self.selected
+                self.graph.set_local([i], self.graph.local[i] @ rotate_m(15.0, 0, 1, 0))
         glutPostRedisplay()
 
     def special(self, key, x, y):
@@ -264,6 +653,16 @@ class Scene:
             self.cam_rot_x += 5
         glutPostRedisplay()
 
+    def mouse(self, button, state, x, y):
+        if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
+            i = self.selected = self.pick(x, y)
+            names = self.data.meta.get("names", [])
+            if i < 0:
+                print("[INFO] Picked: nothing")
+            else:
+                name = names[i] if len(names) == len(self.data.objects) else f"#{i}"
+                print(f"[INFO] Picked: {name} (mesh {int(self.data.objects[i]['mesh'])})")
+
     def keyboard_motion(self, key, x, y):
         k = key.decode() if isinstance(key, bytes) else key
         step = 20.0
@@ -283,9 +682,11 @@ class Scene:
 
 def main():
     global scene
+    install_recorder(globals())  # --record <файл> пишет ввод для bench
     glutInit(sys.argv)
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGBA | GLUT_DEPTH)
-    scene = Scene()
+    # python main.py [scenes/xxx.json | xxx.scnb]
+    scene = Scene(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SCENE)
     glutInitWindowSize(scene.window_width, scene.window_height)
     glutCreateWindow(b"Lab3")
     scene.init()
@@ -293,6 +694,7 @@ def main():
     glutReshapeFunc(scene.reshape)
     glutKeyboardFunc(lambda k, x, y: (scene.keyboard(k, x, y), scene.keyboard_motion(k, x, y)))
     glutSpecialFunc(scene.special)
+    glutMouseFunc(scene.mouse)
     glutMainLoop()
 
 if __name__ == "__main__":
@@ -0,0 +1,652 @@
+# File: mesh_import.py
+# Импорт внешних мешей (OBJ / PLY / glTF) в формат setup_object_vao_vbo:
+# вершины N x 8 (позиция, нормаль, uv) float32 и индексы uint32.
+# Разбор векторизован: строки файла не обходятся циклом Python.
+#
+#   python mesh_import.py model.obj [--no-cache]
+import base64
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+import numpy as np
+
+FLOATS_PER_VERTEX = 8
+
+SPACE, NEWLINE, SLASH = ord(" "), ord("\n"), ord("/")
+
+
+# --- Общие операции над мешем ---
+def fan_triangulate(counts, corners):
+    """Многоугольники (counts[i] вершин подряд в corners) -> треугольники веером.
+    Возвращает индексы в corners формы T x 3."""
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    tri_per_face = np.maximum(counts - 2, 0)
+    total = int(tri_per_face.sum())
+    face = np.repeat(np.arange(len(counts)), tri_per_face)
+    first_tri = np.concatenate([[0], np.cumsum(tri_per_face)[:-1]])
+    j = np.arange(total) - np.repeat(first_tri, tri_per_face) + 1
+    base = offsets[face]
+    return np.stack([base, base + j, base + j + 1], axis=1)
+
+
+def unique_rows(rows):
+    """np.unique(rows, axis=0, return_index=True, return_inverse=True) для
+    целых >= -1 без сортировки строк как байтов: столбцы присоединяются по
+    одному, и после каждого ключ заменяется плотным номером (< числа строк),
+    так что следующее умножение не переполняет int64 даже на многомиллионных
+    индексах. Порядок - лексикографический по столбцам."""
+    key = rows[:, 0] + 1
+    for k in range(1, rows.shape[1]):
+        _, key = np.unique(key, return_inverse=True)
+        key = key * (int(rows[:, k].max(initial=-1)) + 2) + (rows[:, k] + 1)
+    return np.unique(key, return_index=True, return_inverse=True)
+
+
+def compute_normals(positions, triangles):
+    """Нормали вершин как сумма нормалей граней, взвешенных площадью."""
+    p0, p1, p2 = (positions[triangles[:, k]] for k in range(3))
+    face_n = np.cross(p1 - p0, p2 - p0)
+    normals = np.zeros((len(positions), 3), dtype=np.float64)
+    flat = triangles.ravel()
+    for axis in range(3):
+        w = np.repeat(face_n[:, axis], 3)
+        normals[:, axis] = np.bincount(flat, weights=w, minlength=len(positions))
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    length[length == 0] = 1.0
+    return (normals / length).astype(np.float32)
+
+
+def weld(vertices, indices, tolerance=0.0):
+    """Склеивает одинаковые вершины. При tolerance > 0 позиции сравниваются
+    по сетке с шагом tolerance, нормали и uv - с точностью 1e-4."""
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+    if tolerance > 0:
+        key = np.empty((len(vertices), FLOATS_PER_VERTEX), dtype=np.int64)
+        key[:, :3] = np.round(vertices[:, :3] / tolerance)
+        key[:, 3:] = np.round(vertices[:, 3:] * 1e4)
+    else:
+        key = vertices
+    row = np.ascontiguousarray(key).view(np.dtype((np.void, key.dtype.itemsize * key.shape[1]))).ravel()
+    _, first, inverse = np.unique(row, return_index=True, return_inverse=True)
+    # Порядок вершин - по первому появлению, чтобы не ломать локальность
+    order = np.argsort(first, kind="stable")
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    new_vertices = vertices[first[order]]
+    new_indices = remap[inverse.ravel()][np.asarray(indices, dtype=np.int64)]
+    return new_vertices, new_indices.astype(np.uint32)
+
+
+def drop_degenerate(indices):
+    tris = np.asarray(indices).reshape(-1, 3)
+    ok = (tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 0] != tris[:, 2])
+    return tris[ok].ravel()
+
+
+def assemble(positions, triangles, normals=None, uvs=None):
+    """Позиции/нормали/uv на вершинах + треугольники -> N x 8 и индексы."""
+    n = len(positions)
+    if normals is None:
+        normals = compute_normals(positions, triangles)
+    if uvs is None:
+        uvs = np.zeros((n, 2), dtype=np.float32)
+    vertices = np.empty((n, FLOATS_PER_VERTEX), dtype=np.float32)
+    vertices[:, 0:3] = positions
+    vertices[:, 3:6] = normals
+    vertices[:, 6:8] = uvs
+    return vertices, np.ascontiguousarray(triangles, dtype=np.uint32).ravel()
+
+
+# --- Разбор текста ---
+def _line_bounds(buf):
+    nl = np.flatnonzero(buf == NEWLINE)
+    starts = np.concatenate([[0], nl + 1])
+    ends = np.concatenate([nl, [len(buf)]])
+    keep = starts < ends
+    return starts[keep], ends[keep]
+
+
+def _select_lines(buf, starts, ends, skip):
+    """Байты выбранных строк одним массивом, первые skip символов каждой
+    строки заменены пробелами, каждая строка заканчивается переводом строки."""
+    stops = np.minimum(ends + 1, len(buf))
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    # Строки одного вида в OBJ обычно идут подряд - копируем непрерывными кусками
+    breaks = np.flatnonzero(starts[1:] != stops[:-1]) + 1
+    if len(breaks) < 4096:
+        run_starts = starts[np.concatenate([[0], breaks])]
+        run_stops = stops[np.concatenate([breaks - 1, [len(stops) - 1]])]
+        out = np.concatenate([buf[a:b] for a, b in zip(run_starts, run_stops)])
+    else:
+        mark = np.zeros(len(buf) + 1, dtype=np.int8)
+        mark[starts] += 1
+        mark[stops] -= 1
+        out = buf[np.cumsum(mark[:-1], dtype=np.int8).astype(bool)].copy()
+    lengths = stops - starts
+    line_pos = np.cumsum(lengths) - lengths
+    for k in range(skip):
+        out[line_pos + k] = SPACE
+    # Последняя строка файла может быть без перевода строки
+    if ends[-1] == len(buf):
+        out = np.concatenate([out, np.array([NEWLINE], dtype=np.uint8)])
+    return out
+
+
+def _tokens_per_line(text):
+    """Число токенов в каждой строке массива байтов text."""
+    is_space = (text == SPACE) | (text == NEWLINE) | (text == 9) | (text == 13)
+    token_start = np.empty(len(text), dtype=np.uint8)
+    token_start[0] = not is_space[0]
+    np.logical_and(~is_space[1:], is_space[:-1], out=token_start[1:].view(bool))
+    line_starts = np.concatenate([[0], np.flatnonzero(text == NEWLINE)[:-1] + 1])
+    return np.add.reduceat(token_start, line_starts, dtype=np.int64)
+
+
+def _line_count(text):
+    return int(np.count_nonzero(text == NEWLINE))
+
+
+def _parse_floats(text, width):
+    values = np.fromstring(text.tobytes(), dtype=np.float64, sep=" ")
+    if len(values) == _line_count(text) * width:
+        return values.reshape(-1, width)
+    # Лишние столбцы (например, цвет вершины) - берём первые width
+    counts = _tokens_per_line(text)
+    offsets = np.cumsum(counts) - counts
+    return values[offsets[:, None] + np.arange(width)]
+
+
+# --- OBJ ---
+def parse_obj(path):
+    with open(path, "rb") as f:
+        buf = np.frombuffer(f.read(), dtype=np.uint8)
+    starts, ends = _line_bounds(buf)
+    last = len(buf) - 1
+    c0 = buf[starts]
+    c1 = buf[np.minimum(starts + 1, last)]
+    blank1 = (c1 == SPACE) | (c1 == 9)
+
+    v_lines = (c0 == ord("v")) & blank1
+    vt_lines = (c0 == ord("v")) & (c1 == ord("t"))
+    vn_lines = (c0 == ord("v")) & (c1 == ord("n"))
+    f_lines = (c0 == ord("f")) & blank1
+
+    positions = _parse_floats(_select_lines(buf, starts[v_lines], ends[v_lines], 2), 3)
+    uvs = _parse_floats(_select_lines(buf, starts[vt_lines], ends[vt_lines], 3), 2) if vt_lines.any() else None
+    normals = _parse_floats(_select_lines(buf, starts[vn_lines], ends[vn_lines], 3), 3) if vn_lines.any() else None
+
+    text = _select_lines(buf, starts[f_lines], ends[f_lines], 2)
+    # Формат вершины грани по первой: v, v/vt, v//vn, v/vt/vn.
+    # Пропущенный индекс ("//") становится 0 - такого в OBJ не бывает
+    blob = text.tobytes()
+    if b"//" in blob:
+        blob = blob.replace(b"//", b"/0/")
+    first = blob[:256].split()[0]
+    layout = ("v", "vt", "vn")[:first.count(b"/") + 1]
+    blob = blob.replace(b"/", b" ")
+    ints = np.fromstring(blob, dtype=np.int64, sep=" ")
+    lines = _line_count(text)
+    if len(ints) == lines * 3 * len(layout):
+        counts = np.full(lines, 3)  # только треугольники
+    else:
+        text = np.frombuffer(blob, dtype=np.uint8)
+        counts = _tokens_per_line(text) // len(layout)
+    corners = ints.reshape(-1, len(layout))
+
+    sizes = {"v": len(positions), "vt": len(uvs) if uvs is not None else 0, "vn": len(normals) if normals is not None else 0}
+    # Индексы OBJ с единицы, отрицательные - от конца списка; -1 - индекса нет
+    for k, name in enumerate(layout):
+        col = corners[:, k]
+        corners[:, k] = np.where(col > 0, col - 1, np.where(col < 0, col + sizes[name], -1))
+
+    tri_corners = fan_triangulate(counts, corners)
+
+    # Уникальные углы (v, vt, vn) -> вершины
+    _, first_corner, inverse = unique_rows(corners[:, ::-1])
+    triangles = inverse.ravel()[tri_corners]
+    uniq = corners[first_corner]
+
+    col = {name: uniq[:, k] for k, name in enumerate(layout)}
+    pos = positions[col["v"]].astype(np.float32)
+    vert_uv = None
+    if "vt" in col and uvs is not None:
+        vert_uv = np.where(col["vt"][:, None] >= 0, uvs[col["vt"]], 0.0).astype(np.float32)
+    vert_n = None
+    if "vn" in col and normals is not None:
+        vert_n = normals[col["vn"]].astype(np.float32)
+    if vert_n is None or np.any(col["vn"] < 0):
+        # Нормали по исходным позициям, чтобы швы uv не давали излома
+        generated = compute_normals(positions, col["v"][triangles])[col["v"]]
+        vert_n = generated if vert_n is None else np.where(col["vn"][:, None] >= 0, vert_n, generated)
+    return assemble(pos, triangles, vert_n, vert_uv)
+
+
+# --- PLY ---
+PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8",
+}
+
+
+def _read_ply_header(f):
+    if f.readline().strip() != b"ply":
+        raise ValueError("not a PLY file")
+    fmt, elements = None, []
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError("PLY header is not terminated")
+        parts = line.decode("ascii").split()
+        if not parts or parts[0] in ("comment", "obj_info"):
+            continue
+        if parts[0] == "format":
+            fmt = parts[1]
+        elif parts[0] == "element":
+            elements.append({"name": parts[1], "count": int(parts[2]), "props": []})
+        elif parts[0] == "property":
+            if parts[1] == "list":
+                elements[-1]["props"].append((parts[4], "list", PLY_TYPES[parts[2]], PLY_TYPES[parts[3]]))
+            else:
+                elements[-1]["props"].append((parts[2], PLY_TYPES[parts[1]]))
+        elif parts[0] == "end_header":
+            return fmt, elements
+
+
+def _ply_columns(props, table):
+    names = [p[0] for p in props]
+    def cols(*want):
+        if all(w in names for w in want):
+            return np.stack([table[w] for w in want], axis=1).astype(np.float32)
+        return None
+    uv = cols("u", "v")
+    if uv is None:
+        uv = cols("s", "t")
+    if uv is None:
+        uv = cols("texture_u", "texture_v")
+    return cols("x", "y", "z"), cols("nx", "ny", "nz"), uv
+
+
+def _ply_list_layout(props, endian):
+    """Запись элемента с одним списком: (байт до счётчика, тип счётчика, тип
+    элемента списка, байт после списка); None - списков несколько. Для ASCII
+    (endian=None) до и после списка - число токенов строки."""
+    lists = [i for i, p in enumerate(props) if p[1] == "list"]
+    if len(lists) != 1:
+        return None
+    i = lists[0]
+    _, _, count_t, index_t = props[i]
+    if endian is None:
+        return i, np.dtype(count_t), np.dtype(index_t), len(props) - i - 1
+    head = sum(np.dtype(p[1]).itemsize for p in props[:i])
+    tail = sum(np.dtype(p[1]).itemsize for p in props[i + 1:])
+    return head, np.dtype(endian + count_t), np.dtype(endian + index_t), tail
+
+
+def _ply_face_layout(el, endian):
+    layout = _ply_list_layout(el["props"], endian)
+    if layout is None:
+        props = ", ".join(p[0] for p in el["props"])
+        raise ValueError(f"unsupported PLY face layout ({props}): only one list property is allowed")
+    return layout
+
+
+def _read_at(body, at, dtype):
+    """Значения dtype по произвольным (и невыровненным) смещениям в байтах."""
+    if not len(at):
+        return np.zeros(0, dtype=np.int64)
+    lo = int(at.min())
+    view = np.ndarray((int(at.max()) - lo + 1,), dtype=dtype, buffer=body, offset=lo, strides=(1,))
+    return view[at - lo].astype(np.int64)
+
+
+PLY_STRIDE_LOG2 = 4  # шаг грубого прохода по записям - 16
+
+
+def _ply_list_starts(body, offset, count, layout, chunk=1 << 20):
+    """Смещения count записей со списком переменной длины, начиная с offset.
+    Запись длиной head + счётчик + n * элемент + tail байт; n читается с каждого
+    байта окна, так что переход к следующей записи известен для любого байта.
+    Удвоением шага он превращается в переход через 16 записей, грубая цепочка
+    проходится циклом (одна итерация на 16 записей), промежуточные записи
+    добираются 15 сборами по её узлам. Окно - 1 МБ, смещения в нём - int32
+    (сборы упираются в память). Возвращает (смещения, конец)."""
+    head, count_t, index_t, tail = layout
+    found = []
+    while count:
+        end = min(len(body), offset + chunk)
+        width = end - offset
+        readable = max(width - head - count_t.itemsize + 1, 0)
+        n = np.ndarray((readable,), dtype=count_t, buffer=body, offset=offset + head, strides=(1,)).astype(np.int64)
+        size = np.arange(readable) + head + count_t.itemsize + np.maximum(n, 0) * index_t.itemsize + tail
+        # Переход к следующей записи; не поместившиеся в окно ведут в конец (width)
+        jump = np.full(width + 1, width, dtype=np.int32 if width < 2 ** 31 else np.int64)
+        fits = size <= width
+        jump[:readable][fits] = size[fits]
+        far = jump
+        for _ in range(PLY_STRIDE_LOG2):
+            far = far[far]
+        coarse, p = [], 0
+        while p < width and len(coarse) << PLY_STRIDE_LOG2 < count:
+            coarse.append(p)
+            p = int(far[p])
+        rows = [np.array(coarse, dtype=jump.dtype)]
+        for _ in range((1 << PLY_STRIDE_LOG2) - 1):
+            rows.append(jump[rows[-1]])
+        pos = np.stack(rows, axis=1).ravel().astype(np.int64)
+        pos = pos[pos < width]
+        ok = pos < readable
+        ok[ok] = fits[pos[ok]]
+        pos = pos[ok][:count]  # не поместиться в окно может только последняя запись цепочки
+        if not len(pos):
+            if end == len(body):
+                raise ValueError("PLY list element is truncated")
+            chunk *= 2  # запись длиннее окна
+            continue
+        if np.any(n[pos] < 0):
+            raise ValueError("negative PLY list length")
+        found.append(offset + pos)
+        offset += int(size[pos[-1]])
+        count -= len(pos)
+    return (np.concatenate(found) if found else np.zeros(0, dtype=np.int64)), offset
+
+
+def _ply_list_values(body, starts, layout):
+    """Длины списков и все их элементы подряд одним сбором по смещениям."""
+    head, count_t, index_t, _ = layout
+    counts = _read_at(body, starts + head, count_t)
+    first = np.cumsum(counts) - counts
+    k = np.arange(int(counts.sum())) - np.repeat(first, counts)
+    return counts, _read_at(body, np.repeat(starts + head + count_t.itemsize, counts) + k * index_t.itemsize, index_t)
+
+
+def parse_ply(path):
+    with open(path, "rb") as f:
+        fmt, elements = _read_ply_header(f)
+        body = f.read()
+    if fmt == "ascii":
+        return _parse_ply_ascii(body, elements)
+    endian = "<" if fmt == "binary_little_endian" else ">"
+
+    offset = 0
+    positions = normals = uvs = faces = counts = None
+    for el in elements:
+        lists = [p for p in el["props"] if p[1] == "list"]
+        if not lists:
+            dtype = np.dtype([(p[0], endian + p[1]) for p in el["props"]])
+            table = np.frombuffer(body, dtype=dtype, count=el["count"], offset=offset)
+            offset += dtype.itemsize * el["count"]
+            if el["name"] == "vertex":
+                positions, normals, uvs = _ply_columns(el["props"], table)
+            continue
+        layout = _ply_face_layout(el, endian) if el["name"] == "face" else _ply_list_layout(el["props"], endian)
+        if layout is None:
+            break  # размер записей с несколькими списками не вычислить - дальше не читаем
+        if el["name"] != "face":
+            _, offset = _ply_list_starts(body, offset, el["count"], layout)
+            continue
+        # Одинаковые многоугольники - одной структурой; прочие свойства грани пропускаются
+        head, count_t, index_t, tail = layout
+        k = int(np.frombuffer(body, dtype=count_t, count=1, offset=offset + head)[0]) if el["count"] else 0
+        fixed = np.dtype({"names": ["n", "idx"], "formats": [count_t, (index_t, (k,))],
+                          "offsets": [head, head + count_t.itemsize],
+                          "itemsize": head + count_t.itemsize + k * index_t.itemsize + tail})
+        block = np.frombuffer(body, dtype=fixed, count=el["count"], offset=offset) \
+            if offset + fixed.itemsize * el["count"] <= len(body) else None
+        if block is not None and np.all(block["n"] == k):
+            faces = block["idx"].astype(np.int64).ravel()
+            counts = np.full(el["count"], k)
+            offset += fixed.itemsize * el["count"]
+        else:
+            starts, offset = _ply_list_starts(body, offset, el["count"], layout)
+            counts, faces = _ply_list_values(body, starts, layout)
+    if faces is None:
+        raise ValueError("PLY file has no face element")
+    triangles = faces[fan_triangulate(counts, faces)]
+    return assemble(positions, triangles, normals, uvs)
+
+
+def _parse_ply_ascii(body, elements):
+    buf = np.frombuffer(body, dtype=np.uint8)
+    starts, ends = _line_bounds(buf)
+    line = 0
+    positions = normals = uvs = None
+    faces = counts = None
+    for el in elements:
+        n = el["count"]
+        text = _select_lines(buf, starts[line:line + n], ends[line:line + n], 0)
+        line += n
+        if el["name"] == "vertex":
+            table_arr = _parse_floats(text, len(el["props"]))
+            table = {p[0]: table_arr[:, i] for i, p in enumerate(el["props"])}
+            positions, normals, uvs = _ply_columns(el["props"], table)
+        elif el["name"] == "face":
+            # Скалярные свойства до и после списка пропускаются; они могут быть
+            # дробными, поэтому строка разбирается как float64
+            head, _, _, tail = _ply_face_layout(el, None)
+            values = np.fromstring(text.tobytes(), dtype=np.float64, sep=" ")
+            per_line = _tokens_per_line(text) if n else np.zeros(0, dtype=np.int64)
+            offsets = np.cumsum(per_line) - per_line
+            counts = values[offsets + head].astype(np.int64)
+            if np.any(counts < 0) or np.any(per_line != head + 1 + counts + tail):
+                raise ValueError("PLY face line does not match its element properties")
+            first = np.cumsum(counts) - counts
+            k = np.arange(int(counts.sum())) - np.repeat(first, counts)
+            faces = values[np.repeat(offsets + head + 1, counts) + k].astype(np.int64)
+    if faces is None:
+        raise ValueError("PLY file has no face element")
+    triangles = faces[fan_triangulate(counts, faces)]
+    return assemble(positions, triangles, normals, uvs)
+
+
+# --- glTF 2.0 (.gltf + .bin / .glb) ---
+GLTF_COMPONENTS = {5120: "i1", 5121: "u1", 5122: "i2", 5123: "u2", 5125: "u4", 5126: "f4"}
+GLTF_WIDTH = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT4": 16}
+GLTF_NORMALIZE = {"i1": 127.0, "u1": 255.0, "i2": 32767.0, "u2": 65535.0}
+
+
+def _gltf_load(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    base_dir = os.path.dirname(os.path.abspath(path))
+    glb_bin = None
+    if data[:4] == b"glTF":
+        _, _, length = struct.unpack_from("<4sII", data, 0)
+        pos, doc = 12, None
+        while pos < length:
+            chunk_len, chunk_type = struct.unpack_from("<II", data, pos)
+            chunk = data[pos + 8:pos + 8 + chunk_len]
+            if chunk_type == 0x4E4F534A:    # JSON
+                doc = json.loads(chunk.decode("utf-8"))
+            elif chunk_type == 0x004E4942:  # BIN
+                glb_bin = chunk
+            pos += 8 + chunk_len
+    else:
+        doc = json.loads(data.decode("utf-8"))
+
+    buffers = []
+    for b in doc.get("buffers", []):
+        uri = b.get("uri")
+        if uri is None:
+            buffers.append(glb_bin)
+        elif uri.startswith("data:"):
+            buffers.append(base64.b64decode(uri.split(",", 1)[1]))
+        else:
+            with open(os.path.join(base_dir, uri), "rb") as f:
+                buffers.append(f.read())
+    return doc, buffers
+
+
+def _gltf_accessor(doc, buffers, index):
+    acc = doc["accessors"][index]
+    if "sparse" in acc:
+        raise ValueError("sparse glTF accessors are not supported")
+    comp = np.dtype("<" + GLTF_COMPONENTS[acc["componentType"]])
+    width = GLTF_WIDTH[acc["type"]]
+    view = doc["bufferViews"][acc["bufferView"]]
+    buf = buffers[view["buffer"]]
+    start = view.get("byteOffset", 0) + acc.get("byteOffset", 0)
+    stride = view.get("byteStride", comp.itemsize * width)
+    count = acc["count"]
+    raw = np.frombuffer(buf, dtype=np.uint8, count=stride * (count - 1) + comp.itemsize * width, offset=start)
+    out = np.lib.stride_tricks.as_strided(raw, shape=(count, comp.itemsize * width), strides=(stride, 1))
+    out = np.ascontiguousarray(out).view(comp).reshape(count, width)
+    if acc.get("normalized") and comp.str[1:] in GLTF_NORMALIZE:
+        out = np.maximum(out.astype(np.float32) / GLTF_NORMALIZE[comp.str[1:]], -1.0)
+    return out
+
+
+def _gltf_node_matrix(node):
+    if "matrix" in node:
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+    t = np.eye(4)
+    t[:3, 3] = node.get("translation", (0.0, 0.0, 0.0))
+    x, y, z, w = node.get("rotation", (0.0, 0.0, 0.0, 1.0))
+    r = np.eye(4)
+    r[:3, :3] = [[1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+                 [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+                 [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]]
+    s = np.diag(list(node.get("scale", (1.0, 1.0, 1.0))) + [1.0])
+    return t @ r @ s
+
+
+def parse_gltf(path):
+    doc, buffers = _gltf_load(path)
+    parts = []
+
+    def visit(node_id, parent):
+        node = doc["nodes"][node_id]
+        world = parent @ _gltf_node_matrix(node)
+        if "mesh" in node:
+            normal_m = np.linalg.inv(world[:3, :3]).T
+            for prim in doc["meshes"][node["mesh"]]["primitives"]:
+                if prim.get("mode", 4) != 4:
+                    continue
+                attrs = prim["attributes"]
+                pos = _gltf_accessor(doc, buffers, attrs["POSITION"]).astype(np.float64)
+                if "indices" in prim:
+                    tris = _gltf_accessor(doc, buffers, prim["indices"]).astype(np.int64).reshape(-1, 3)
+                else:
+                    tris = np.arange(len(pos)).reshape(-1, 3)
+                pos = pos @ world[:3, :3].T + world[:3, 3]
+                nrm = None
+                if "NORMAL" in attrs:
+                    nrm = _gltf_accessor(doc, buffers, attrs["NORMAL"]).astype(np.float64) @ normal_m.T
+                    nrm /= np.maximum(np.linalg.norm(nrm, axis=1, keepdims=True), 1e-12)
+                uv = None
+                if "TEXCOORD_0" in attrs:
+                    uv = _gltf_accessor(doc, buffers, attrs["TEXCOORD_0"]).astype(np.float32).copy()
+                    uv[:, 1] = 1.0 - uv[:, 1]  # в glTF начало uv в левом верхнем углу
+                parts.append(assemble(pos.astype(np.float32), tris, nrm, uv))
+        for child in node.get("children", []):
+            visit(child, world)
+
+    scene = doc.get("scenes", [{"nodes": list(range(len(doc.get("nodes", []))))}])[doc.get("scene", 0)]
+    for node_id in scene["nodes"]:
+        visit(node_id, np.eye(4))
+    if not parts:
+        raise ValueError(f"{path}: no triangle primitives")
+    vertices, indices, base = [], [], 0
+    for v, i in parts:
+        vertices.append(v)
+        indices.append(i + base)
+        base += len(v)
+    return np.concatenate(vertices), np.concatenate(indices).astype(np.uint32)
+
+
+IMPORTERS = {".obj": parse_obj, ".ply": parse_ply, ".gltf": parse_gltf, ".glb": parse_gltf}
+
+
+def import_mesh(path, weld_tolerance=0.0):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in IMPORTERS:
+        raise ValueError(f"unsupported mesh format: {path}")
+    vertices, indices = IMPORTERS[ext](path)
+    vertices, indices = weld(vertices, indices, weld_tolerance)
+    return vertices, drop_degenerate(indices).astype(np.uint32)
+
+
+# --- Кэш: упакованные массивы рядом с исходным файлом ---
+CACHE_MAGIC = b"MSH1"
+CACHE_HEADER = struct.Struct("<4sQqIQQ")  # magic, размер, mtime_ns исходника, crc опций, вершины, индексы
+
+
+def cache_path(path):
+    return path + ".mcache"
+
+
+def _options_crc(options):
+    return zlib.crc32(json.dumps(options, sort_keys=True).encode())
+
+
+def read_cache(path, options):
+    cpath = cache_path(path)
+    if not os.path.exists(cpath):
+        return None
+    st = os.stat(path)
+    with open(cpath, "rb") as f:
+        header = f.read(CACHE_HEADER.size)
+    if len(header) < CACHE_HEADER.size:
+        return None
+    magic, size, mtime, crc, n_verts, n_inds = CACHE_HEADER.unpack(header)
+    if magic != CACHE_MAGIC or size != st.st_size or mtime != st.st_mtime_ns or crc != _options_crc(options):
+        return None
+    vertices = np.fromfile(cpath, dtype=np.float32, count=n_verts * FLOATS_PER_VERTEX,
+                           offset=CACHE_HEADER.size).reshape(n_verts, FLOATS_PER_VERTEX)
+    indices = np.fromfile(cpath, dtype=np.uint32, count=n_inds,
+                          offset=CACHE_HEADER.size + vertices.nbytes)
+    return vertices, indices
+
+
+def write_cache(path, options, vertices, indices):
+    st = os.stat(path)
+    tmp = cache_path(path) + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(CACHE_HEADER.pack(CACHE_MAGIC, st.st_size, st.st_mtime_ns, _options_crc(options),
+                                  len(vertices), len(indices)))
+        f.write(np.ascontiguousarray(vertices, dtype=np.float32).tobytes())
+        f.write(np.ascontiguousarray(indices, dtype=np.uint32).tobytes())
+    os.replace(tmp, cache_path(path))
+
+
+def load_mesh(path, use_cache=True, weld_tolerance=0.0, optimize=False):
+    """Меш из файла через кэш: повторная загрузка - два np.fromfile.
+    optimize=True - порядок индексов и вершин из mesh_optimize (тоже кэшируется)."""
+    options = {"weld": weld_tolerance}
+    if optimize:
+        options["optimize"] = True
+    if use_cache:
+        cached = read_cache(path, options)
+        if cached is not None:
+            return cached
+    vertices, indices = import_mesh(path, weld_tolerance)
+    if optimize:
+        from mesh_optimize import optimize_mesh  # mesh_optimize сам импортирует weld отсюда
+        vertices, indices, _ = optimize_mesh(vertices, indices)
+    if use_cache:
+        try:
+            write_cache(path, options, vertices, indices)
+        except OSError as e:
+            print("[WARN] mesh cache not written:", e)
+    return vertices, indices
+
+
+def main(argv):
+    if len(argv) < 2:
+        print("usage: python mesh_import.py <model.obj|.ply|.gltf|.glb> [--no-cache]")
+        return
+    path = argv[1]
+    t0 = time.perf_counter()
+    vertices, indices = load_mesh(path, use_cache="--no-cache" not in argv)
+    dt = time.perf_counter() - t0
+    print(f"[INFO] {path}: {len(vertices)} vertices, {len(indices) // 3} triangles in {dt * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,217 @@
+# File: mesh_optimize.py
+# Оптимизация индексных буферов после генерации и импорта:
+#   1) склейка одинаковых вершин (weld),
+#   2) порядок треугольников под кэш вершин после трансформации (Tipsify),
+#   3) нумерация вершин по первому использованию (локальность выборки).
+# ACMR - промахи кэша на треугольник, ATVR - промахи на вершину (1.0 - идеал).
+# Tipsify и симуляция кэша - последовательные циклы Python, поэтому результат
+# для мешей без исходного файла (генераторы, .npz) хранится в CACHE_DIR под
+# хэшем входных массивов; файлы OBJ / PLY / glTF кэшируются в .mcache.
+#
+#   python mesh_optimize.py scenes/default.json
+#   python mesh_optimize.py model.obj
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+import numpy as np
+from mesh_import import FLOATS_PER_VERTEX, weld
+
+VERTEX_CACHE_SIZE = 16
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "lab3_new", "meshes")
+CACHE_MAGIC = b"OPT1"
+CACHE_HEADER = struct.Struct("<4sQQ")  # magic, вершины, индексы
+
+
+def cache_misses(indices, cache_size=VERTEX_CACHE_SIZE):
+    """Промахи FIFO-кэша вершин: вершина в кэше, если после её загрузки
+    было меньше cache_size промахов."""
+    stamp = {}
+    misses = 0
+    for v in np.asarray(indices).tolist():
+        t = stamp.get(v)
+        if t is None or misses - t >= cache_size:
+            stamp[v] = misses
+            misses += 1
+    return misses
+
+
+def cache_stats(indices, cache_size=VERTEX_CACHE_SIZE):
+    indices = np.asarray(indices)
+    if len(indices) == 0:
+        return {"acmr": 0.0, "atvr": 0.0}
+    misses = cache_misses(indices, cache_size)
+    return {"acmr": misses / (len(indices) // 3), "atvr": misses / len(np.unique(indices))}
+
+
+def _vertex_triangles(tris, vertex_count):
+    """Смежность вершина -> треугольники в виде CSR (offsets, triangles)."""
+    corner_vertex = tris.ravel()
+    order = np.argsort(corner_vertex, kind="stable")
+    offsets = np.zeros(vertex_count + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(corner_vertex, minlength=vertex_count))
+    return offsets.tolist(), (order // 3).tolist()
+
+
+def tipsify(indices, vertex_count, cache_size=VERTEX_CACHE_SIZE):
+    """Порядок треугольников по Sander et al. 2007 ("Fast triangle reordering
+    for vertex locality and reduced overdraw"): веер вокруг текущей вершины,
+    следующая вершина - та, что ещё в кэше и скоро будет исчерпана."""
+    tris = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    offsets, adjacency = _vertex_triangles(tris, vertex_count)
+    tri_list = tris.tolist()
+    live = np.bincount(tris.ravel(), minlength=vertex_count).tolist()
+    stamp = [0] * vertex_count
+    emitted = [False] * len(tri_list)
+    dead_end = []
+    out = []
+    time_stamp = cache_size + 1
+    cursor = 0
+    fan = 0 if len(tri_list) else -1
+
+    while fan >= 0:
+        candidates = []
+        for t in adjacency[offsets[fan]:offsets[fan + 1]]:
+            if emitted[t]:
+                continue
+            emitted[t] = True
+            out.append(t)
+            for v in tri_list[t]:
+                dead_end.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if time_stamp - stamp[v] > cache_size:
+                    stamp[v] = time_stamp
+                    time_stamp += 1
+
+        # Следующая вершина веера: из кандидатов, которая останется в кэше
+        fan, best = -1, -1
+        for v in candidates:
+            if live[v] > 0:
+                priority = 0
+                if time_stamp - stamp[v] + 2 * live[v] <= cache_size:
+                    priority = time_stamp - stamp[v]
+                if priority > best:
+                    best, fan = priority, v
+        if fan >= 0:
+            continue
+        # Тупик: недавние вершины из стека, затем просто следующая живая
+        while dead_end:
+            v = dead_end.pop()
+            if live[v] > 0:
+                fan = v
+                break
+        if fan >= 0:
+            continue
+        while cursor < vertex_count:
+            if live[cursor] > 0:
+                fan = cursor
+                break
+            cursor += 1
+
+    return tris[np.asarray(out, dtype=np.int64)].ravel()
+
+
+def reorder_vertices(vertices, indices):
+    """Нумерация вершин в порядке первого использования; неиспользуемые выбрасываются."""
+    indices = np.asarray(indices, dtype=np.int64)
+    used, first = np.unique(indices, return_index=True)
+    order = used[np.argsort(first, kind="stable")]
+    remap = np.full(len(vertices), -1, dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    return vertices[order], remap[indices].astype(np.uint32)
+
+
+def optimize_mesh(vertices, indices, cache_size=VERTEX_CACHE_SIZE):
+    """weld + Tipsify + порядок вершин. Возвращает (vertices, indices, stats)."""
+    vertices = np.asarray(vertices, dtype=np.float32)
+    before = cache_stats(indices, cache_size)
+    stats = {"vertices_before": len(vertices)}
+    vertices, indices = weld(vertices, indices)
+    reordered = tipsify(indices, len(vertices), cache_size)
+    # Вееры вокруг вершин большой валентности (вершина конуса, центр
+    # крышки) Tipsify раскладывает хуже исходного порядка - берём лучший
+    welded = cache_stats(indices, cache_size)
+    after = cache_stats(reordered, cache_size)
+    if after["acmr"] <= welded["acmr"]:
+        indices = reordered
+    else:
+        after = welded
+    vertices, indices = reorder_vertices(vertices, indices)
+    stats.update({
+        "vertices_after": len(vertices),
+        "acmr_before": before["acmr"], "acmr_after": after["acmr"],
+        "atvr_before": before["atvr"], "atvr_after": after["atvr"],
+    })
+    return vertices, indices, stats
+
+
+def optimize_cached(vertices, indices, cache_size=VERTEX_CACHE_SIZE, cache_dir=CACHE_DIR):
+    """optimize_mesh без статистики, через кэш на диске: ключ - SHA-1 входных
+    массивов и размера кэша вершин, повторная загрузка - два np.fromfile."""
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+    indices = np.ascontiguousarray(indices, dtype=np.uint32)
+    digest = hashlib.sha1(struct.pack("<I", cache_size))
+    digest.update(vertices.tobytes())
+    digest.update(indices.tobytes())
+    path = os.path.join(cache_dir, digest.hexdigest() + ".opt")
+    try:
+        with open(path, "rb") as f:
+            magic, n_verts, n_inds = CACHE_HEADER.unpack(f.read(CACHE_HEADER.size))
+            if magic == CACHE_MAGIC:
+                cached = np.fromfile(f, dtype=np.float32, count=n_verts * FLOATS_PER_VERTEX)
+                return cached.reshape(n_verts, FLOATS_PER_VERTEX), np.fromfile(f, dtype=np.uint32, count=n_inds)
+    except (OSError, struct.error, ValueError):
+        pass
+    vertices, indices, _ = optimize_mesh(vertices, indices, cache_size)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, len(vertices), len(indices)))
+            f.write(np.ascontiguousarray(vertices, dtype=np.float32).tobytes())
+            f.write(np.ascontiguousarray(indices, dtype=np.uint32).tobytes())
+        os.replace(tmp, path)
+    except OSError as e:
+        print("[WARN] optimized mesh cache not written:", e)
+    return vertices, indices
+
+
+def format_stats(name, stats):
+    return (f"{name:<28} verts {stats['vertices_before']:8d} -> {stats['vertices_after']:8d}  "
+            f"ACMR {stats['acmr_before']:.3f} -> {stats['acmr_after']:.3f}  "
+            f"ATVR {stats['atvr_before']:.3f} -> {stats['atvr_after']:.3f}")
+
+
+def main(argv):
+    if len(argv) != 2:
+        print("usage: python mesh_optimize.py <scene.json | model.obj|.ply|.gltf|.glb>")
+        return 1
+    from scene_format import build_mesh
+    from lod import lod_chain
+    path = argv[1]
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            meshes = json.load(f).get("meshes", {})
+        base_dir = os.path.dirname(os.path.abspath(path))
+        items = []
+        for name, spec in meshes.items():
+            chain = [(spec, 0.0)] if "file" in spec else lod_chain(spec)
+            for level, (level_spec, _) in enumerate(chain):
+                items.append((f"{name}[{level}]", dict(level_spec, optimize=False)))
+    else:
+        base_dir = os.path.dirname(os.path.abspath(path))
+        items = [(os.path.basename(path), {"file": os.path.basename(path), "optimize": False})]
+
+    for name, spec in items:
+        vertices, indices = build_mesh(spec, base_dir)
+        t0 = time.perf_counter()
+        _, _, stats = optimize_mesh(vertices, indices)
+        print(format_stats(name, stats) + f"  {(time.perf_counter() - t0) * 1000:7.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
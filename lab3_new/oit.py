@@ -0,0 +1,87 @@
+# File: oit.py
+# Weighted blended order-independent transparency
+# (McGuire, Bavoil, "Weighted Blended Order-Independent Transparency", 2013).
+# Непрозрачная часть рисуется в COLOR0 собственного FBO, прозрачная - в два
+# буфера без сортировки: accum (RGBA16F, сумма цвета с весом) и reveal
+# (R16F, произведение (1 - alpha)). Затем полноэкранный проход смешивает их
+# поверх непрозрачного цвета, и результат копируется в окно.
+from OpenGL.GL import *
+from shaders import COMPOSITE_VS, COMPOSITE_FS, create_program
+
+
+class WeightedBlendedOIT:
+    def __init__(self, width, height):
+        self.width = self.height = 0
+        self.fbo = glGenFramebuffers(1)
+        self.opaque, self.accum, self.reveal = glGenTextures(3)
+        self.depth = glGenRenderbuffers(1)
+        self.composite = create_program(COMPOSITE_VS, COMPOSITE_FS)
+        self.empty_vao = glGenVertexArrays(1)
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        if (width, height) == (self.width, self.height):
+            return
+        self.width, self.height = width, height
+        for tex, internal, fmt in ((self.opaque, GL_RGBA8, GL_RGBA),
+                                   (self.accum, GL_RGBA16F, GL_RGBA),
+                                   (self.reveal, GL_R16F, GL_RED)):
+            glBindTexture(GL_TEXTURE_2D, tex)
+            glTexImage2D(GL_TEXTURE_2D, 0, internal, width, height, 0, fmt, GL_FLOAT, None)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        for i, tex in enumerate((self.opaque, self.accum, self.reveal)):
+            glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0 + i, GL_TEXTURE_2D, tex, 0)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth)
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            print("[ERROR] OIT FBO incomplete")
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def begin_opaque(self):
+        """Непрозрачный проход: COLOR0 и глубина FBO (очищаются текущим цветом фона)."""
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glDrawBuffers(1, [GL_COLOR_ATTACHMENT0])
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+    def begin_transparent(self):
+        """Прозрачный проход: тест глубины с непрозрачной частью, без записи глубины."""
+        glDrawBuffers(2, [GL_COLOR_ATTACHMENT1, GL_COLOR_ATTACHMENT2])
+        glClearBufferfv(GL_COLOR, 0, (GLfloat * 4)(0.0, 0.0, 0.0, 0.0))
+        glClearBufferfv(GL_COLOR, 1, (GLfloat * 4)(1.0, 0.0, 0.0, 0.0))
+        glDepthMask(GL_FALSE)
+        glEnable(GL_BLEND)
+        glBlendFunci(0, GL_ONE, GL_ONE)
+        glBlendFunci(1, GL_ZERO, GL_ONE_MINUS_SRC_COLOR)
+
+    def resolve(self, target=0):
+        """Смешивание слоёв поверх непрозрачного цвета и копирование в target."""
+        glDepthMask(GL_TRUE)
+        glDrawBuffers(1, [GL_COLOR_ATTACHMENT0])
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glDisable(GL_DEPTH_TEST)
+        glUseProgram(self.composite)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, self.accum)
+        glUniform1i(glGetUniformLocation(self.composite, "accumTex"), 0)
+        glActiveTexture(GL_TEXTURE1)
+        glBindTexture(GL_TEXTURE_2D, self.reveal)
+        glUniform1i(glGetUniformLocation(self.composite, "revealTex"), 1)
+        glBindVertexArray(self.empty_vao)
+        glDrawArrays(GL_TRIANGLES, 0, 3)
+        glBindVertexArray(0)
+        glUseProgram(0)
+        glDisable(GL_BLEND)
+        glEnable(GL_DEPTH_TEST)
+
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        glReadBuffer(GL_COLOR_ATTACHMENT0)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, target)
+        glBlitFramebuffer(0, 0, self.width, self.height, 0, 0, self.width, self.height,
+                          GL_COLOR_BUFFER_BIT, GL_NEAREST)
+        glBindFramebuffer(GL_FRAMEBUFFER, target)
@@ -0,0 +1,121 @@
+# File: render_scale.py
+# Динамическое разрешение. Сцена рисуется в собственный FBO размером
+# scale * окно, затем растягивается на окно полноэкранным треугольником
+# (upscale.frag: билинейно или с повышением резкости). При программной
+# растеризации время кадра почти пропорционально числу пикселей, поэтому
+# scale - главный рычаг; ResolutionController подбирает его и размер карты
+# теней по измеренному времени кадра, чтобы держать целевое.
+from OpenGL.GL import *
+
+UPSCALE_FILTERS = ("bilinear", "sharpen")
+RENDER_SCALES = (1.0, 0.75, 0.5)   # ручное переключение клавишей
+
+# Ступени качества контроллера: (масштаб кадра, сдвиг размера карты теней);
+# сначала уменьшается кадр, карта теней - когда масштаб уже заметен
+RENDER_LEVELS = (
+    (1.0, 0), (0.85, 0), (0.7, 0), (0.7, 1), (0.6, 1), (0.5, 1), (0.5, 2),
+)
+
+
+def scaled_size(width, height, scale):
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+class ScaledFramebuffer:
+    def __init__(self):
+        self.width = self.height = 0
+        self.fbo = glGenFramebuffers(1)
+        self.color = glGenTextures(1)
+        self.depth = glGenRenderbuffers(1)
+        self.empty_vao = glGenVertexArrays(1)
+
+    def resize(self, width, height):
+        if (width, height) == (self.width, self.height):
+            return
+        self.width, self.height = width, height
+        glBindTexture(GL_TEXTURE_2D, self.color)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.color, 0)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth)
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            print("[ERROR] Render scale FBO incomplete")
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def begin(self, width, height):
+        """Кадр пониженного разрешения: FBO и viewport размером width x height."""
+        self.resize(width, height)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, width, height)
+
+    def present(self, prog, width, height, sharpness=0.0, target=0):
+        """Растягивает кадр на target размером width x height программой prog."""
+        glBindFramebuffer(GL_FRAMEBUFFER, target)
+        glViewport(0, 0, width, height)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_BLEND)
+        glUseProgram(prog)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, self.color)
+        glUniform1i(glGetUniformLocation(prog, "frame"), 0)
+        glUniform2f(glGetUniformLocation(prog, "outputSize"), width, height)
+        glUniform1f(glGetUniformLocation(prog, "sharpness"), sharpness)
+        glBindVertexArray(self.empty_vao)
+        glDrawArrays(GL_TRIANGLES, 0, 3)
+        glBindVertexArray(0)
+        glUseProgram(0)
+        glEnable(GL_DEPTH_TEST)
+
+
+class ResolutionController:
+    """Ступень качества по сглаженному времени кадра: выше target * (1 + tolerance) -
+    ступенью ниже, меньше target * headroom - ступенью выше. После каждой смены
+    cooldown кадров без решений: новая ступень должна успеть проявиться."""
+    def __init__(self, target_ms, levels=RENDER_LEVELS, smoothing=0.2, tolerance=0.1,
+                 headroom=0.7, cooldown=15):
+        self.target_ms = target_ms
+        self.levels = levels
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.headroom = headroom
+        self.cooldown = cooldown
+        self.level = 0
+        self.average_ms = None
+        self.wait = cooldown
+
+    @property
+    def scale(self):
+        return self.levels[self.level][0]
+
+    def shadow_size(self, base):
+        return base >> self.levels[self.level][1]
+
+    def update(self, frame_ms):
+        """Учитывает время очередного кадра; True - ступень изменилась."""
+        if self.average_ms is None:
+            self.average_ms = frame_ms
+        else:
+            self.average_ms += self.smoothing * (frame_ms - self.average_ms)
+        if self.wait > 0:
+            self.wait -= 1
+            return False
+        level = self.level
+        if self.average_ms > self.target_ms * (1.0 + self.tolerance):
+            level = min(level + 1, len(self.levels) - 1)
+        elif self.average_ms < self.target_ms * self.headroom:
+            level = max(level - 1, 0)
+        if level == self.level:
+            return False
+        self.level = level
+        self.average_ms = None
+        self.wait = self.cooldown
+        return True
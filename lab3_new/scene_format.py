@@ -0,0 +1,408 @@
+# File: scene_format.py
+# Декларативное описание сцены: JSON для редактирования и упакованный
+# бинарный формат (.scnb) для быстрой загрузки. Большие сцены обрабатываются
+# порциями по STREAM_CHUNK записей: массивы .scnb отображаются в память и
+# читаются с диска по частям - экземпляры при построении графа и границ,
+# вершины и индексы при заливке в VBO/EBO (setup.upload_chunked); сетки
+# "grid" в JSON заполняют таблицу объектов тоже порциями.
+#
+#   python scene_format.py compile scenes/default.json scenes/default.scnb
+#   python scene_format.py info scenes/default.scnb
+import json
+import math
+import os
+import struct
+import sys
+import numpy as np
+from setup import VERTEX_FORMATS, pack_indices, quantization_error, vertex_layout
+from mesh_import import IMPORTERS, load_mesh
+from lod import MAX_LODS, lod_chain
+from mesh_optimize import optimize_cached
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from geometry import primitives
+
+# --- Генераторы примитивов, на которые ссылается поле "generator" ---
+# Оси как в geometry/primitives.py: конус и цилиндр вдоль Z (цилиндр с центром
+# в начале координат), тор лежит в плоскости XZ, пол - в XZ с нормалью +Y
+MESH_GENERATORS = {
+    "cone": lambda p: primitives.cone(p["radius"], p["height"], p.get("slices", 64)),
+    "cylinder": lambda p: primitives.cylinder(p["radius"], p["height"], p.get("slices", 64), center=True),
+    "torus": lambda p: primitives.torus(p["radius_major"], p["radius_minor"],
+                                        p.get("radial_segments", 48), p.get("tubular_segments", 32), axis="y"),
+    "sphere": lambda p: primitives.sphere(p["radius"], p.get("slices", 64), p.get("stacks", 32)),
+    "disk": lambda p: primitives.disk(p.get("inner_radius", 0.0), p["radius"], p.get("slices", 64), p.get("loops", 1)),
+    "floor": lambda p: primitives.plane(p["size"], repeat_tex=p.get("repeat_tex", 10)),
+}
+
+MATERIAL_DTYPE = np.dtype([
+    ("diffuse", "<f4", 3),
+    ("specular", "<f4", 3),
+    ("shininess", "<f4"),
+    ("texture", "<i4"),       # индекс в списке текстур, -1 - без текстуры
+    ("transparent", "u1"),
+    ("_pad", "u1", 3),
+])
+
+MESH_RANGE_DTYPE = np.dtype([
+    ("first_index", "<u4"),
+    ("index_count", "<u4"),
+    ("base_vertex", "<u4"),
+    ("vertex_count", "<u4"),
+    ("bounds", "<f4", (2, 3)),  # min / max в координатах модели
+    ("error", "<f4"),           # геометрическая ошибка уровня (единицы модели)
+    ("lods", "<i4", MAX_LODS),  # диапазоны уровней детализации, от подробного к грубому
+])
+
+OBJECT_DTYPE = np.dtype([
+    ("mesh", "<u4"),
+    ("material", "<u4"),
+    ("parent", "<i4"),          # экземпляр-родитель (-1 - корень), см. spatial/scene_graph.py
+    ("model", "<f4", (4, 4)),   # мировая матрица модели (строки - как в математике)
+])
+
+STREAM_CHUNK = 1 << 16  # записей (экземпляров, вершин, индексов) в одной порции
+MAGIC = b"SCNB"
+VERSION = 3
+HEADER = struct.Struct("<4s7I")  # magic, version, meta, ranges, vertices, indices, materials, objects
+FLOATS_PER_VERTEX = 8
+
+
+# --- Матрицы преобразований ---
+def translate_m(x, y, z):
+    m = np.eye(4)
+    m[:3, 3] = (x, y, z)
+    return m
+
+
+def scale_m(x, y, z):
+    return np.diag([x, y, z, 1.0])
+
+
+def rotate_m(angle_deg, x, y, z):
+    axis = np.array([x, y, z], dtype=np.float64)
+    axis /= np.linalg.norm(axis)
+    a = math.radians(angle_deg)
+    c, s = math.cos(a), math.sin(a)
+    k = np.array([[0.0, -axis[2], axis[1]],
+                  [axis[2], 0.0, -axis[0]],
+                  [-axis[1], axis[0], 0.0]])
+    m = np.eye(4)
+    m[:3, :3] = c * np.eye(3) + s * k + (1.0 - c) * np.outer(axis, axis)
+    return m
+
+
+TRANSFORM_OPS = {"translate": translate_m, "rotate": rotate_m, "scale": scale_m}
+
+
+def transform_matrix(spec):
+    """Список операций [["translate", x, y, z], ["rotate", deg, ax, ay, az], ...]
+    перемножается слева направо, как цепочка glm.translate/glm.rotate."""
+    m = np.eye(4)
+    for op in spec or ():
+        m = m @ TRANSFORM_OPS[op[0]](*op[1:])
+    return m
+
+
+def grid_offsets(grid):
+    """Смещения экземпляров для "grid": {"count": [nx, ny, nz], "step": [sx, sy, sz]}."""
+    count = grid["count"]
+    step = np.asarray(grid["step"], dtype=np.float64)
+    idx = np.stack(np.meshgrid(*[np.arange(n) for n in count], indexing="ij"), axis=-1).reshape(-1, 3)
+    centered = idx - (np.asarray(count) - 1) / 2.0
+    return centered * step
+
+
+# --- Геометрия ---
+def load_mesh_file(path, weld_tolerance=0.0, optimize=True):
+    """Внешний меш: OBJ / PLY / glTF (через кэш mesh_import) или .npz
+    с массивами vertices (N x 8) и indices."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npz":
+        data = np.load(path)
+        vertices, indices = data["vertices"].astype(np.float32), data["indices"].astype(np.uint32)
+        return optimize_cached(vertices, indices) if optimize else (vertices, indices)
+    if ext in IMPORTERS:
+        return load_mesh(path, weld_tolerance=weld_tolerance, optimize=optimize)
+    raise ValueError(f"unsupported mesh file: {path}")
+
+
+def build_mesh(spec, base_dir):
+    """Геометрия меша; "optimize": false отключает mesh_optimize
+    (результат кэшируется: для файлов - в .mcache, для прочих - в mesh_optimize.CACHE_DIR)."""
+    optimize = spec.get("optimize", True)
+    if "file" in spec:
+        return load_mesh_file(os.path.join(base_dir, spec["file"]), spec.get("weld", 0.0), optimize)
+    params = {k: v for k, v in spec.items() if k not in ("generator", "optimize")}
+    verts, inds = MESH_GENERATORS[spec["generator"]](params)[0]
+    verts = np.asarray(verts, dtype=np.float32).reshape(-1, FLOATS_PER_VERTEX)
+    inds = np.asarray(inds, dtype=np.uint32)
+    if optimize:
+        verts, inds = optimize_cached(verts, inds)
+    return verts, inds
+
+
+class MeshPool:
+    """Все меши сцены в одном вершинном и одном индексном массиве.
+    Одинаковые описания мешей собираются один раз."""
+    def __init__(self):
+        self.keys = {}
+        self.vertices = []
+        self.indices = []
+        self.ranges = []
+        self.vertex_total = 0
+        self.index_total = 0
+
+    def add(self, spec, base_dir):
+        """Меш и его уровни детализации; возвращает диапазон подробного уровня."""
+        chain = [(spec, 0.0)] if "file" in spec else lod_chain(spec)
+        ids = [self._add_level(level_spec, error, base_dir) for level_spec, error in chain]
+        self.ranges[ids[0]][6][:] = ids + [ids[-1]] * (MAX_LODS - len(ids))
+        return ids[0]
+
+    def _add_level(self, spec, error, base_dir):
+        key = json.dumps(spec, sort_keys=True)
+        if key in self.keys:
+            return self.keys[key]
+        verts, inds = build_mesh(spec, base_dir)
+        pos = verts[:, :3]
+        range_id = len(self.ranges)
+        self.ranges.append((self.index_total, len(inds), self.vertex_total, len(verts),
+                            np.stack([pos.min(axis=0), pos.max(axis=0)]), error, [range_id] * MAX_LODS))
+        self.vertices.append(verts)
+        self.indices.append(inds)
+        self.vertex_total += len(verts)
+        self.index_total += len(inds)
+        self.keys[key] = range_id
+        return range_id
+
+    def finish(self):
+        ranges = np.array(self.ranges, dtype=MESH_RANGE_DTYPE)
+        vertices = np.concatenate(self.vertices) if self.vertices else np.zeros((0, FLOATS_PER_VERTEX), np.float32)
+        indices = np.concatenate(self.indices) if self.indices else np.zeros(0, np.uint32)
+        return ranges, vertices, indices
+
+
+class SceneData:
+    def __init__(self, meta, ranges, vertices, indices, materials, objects):
+        self.meta = meta              # camera, light, textures, names
+        self.ranges = ranges
+        self.vertices = vertices
+        self.indices = indices
+        self.materials = materials
+        self.objects = objects
+
+    @property
+    def camera(self):
+        return self.meta.get("camera", {})
+
+    @property
+    def light(self):
+        return self.meta.get("light", {})
+
+    @property
+    def textures(self):
+        return self.meta.get("textures", [])
+
+    def iter_objects(self, chunk=STREAM_CHUNK):
+        """(номер первого, записи) порциями: для .scnb каждая порция читается
+        из отображённого файла отдельно, вся таблица в памяти не собирается."""
+        for start in range(0, len(self.objects), chunk):
+            yield start, np.array(self.objects[start:start + chunk])
+
+    def world_bounds(self, models=None):
+        """AABB экземпляров в мировых координатах: (N, 3) min и max.
+        models - текущие мировые матрицы (по умолчанию - из файла сцены).
+        Углы (N, 8, 3) считаются порциями - временные массивы не растут с N."""
+        n = len(self.objects)
+        lo, hi = np.empty((n, 3)), np.empty((n, 3))
+        mesh_bounds = np.asarray(self.ranges["bounds"], dtype=np.float64)
+        corner = np.array([[i & 1, (i >> 1) & 1, (i >> 2) & 1] for i in range(8)])
+        for start in range(0, n, STREAM_CHUNK):
+            stop = min(start + STREAM_CHUNK, n)
+            bounds = mesh_bounds[self.objects["mesh"][start:stop]]
+            corners = np.where(corner[None, :, :] == 0, bounds[:, None, 0], bounds[:, None, 1])
+            part = (self.objects["model"] if models is None else models)[start:stop]
+            part = np.asarray(part, dtype=np.float64)
+            world = np.einsum("nij,nkj->nki", part[:, :3, :3], corners) + part[:, None, :3, 3]
+            lo[start:stop], hi[start:stop] = world.min(axis=1), world.max(axis=1)
+        return lo, hi
+
+    def draw_order(self):
+        """Сначала непрозрачные (сгруппированные по материалу), затем прозрачные."""
+        transparent = self.materials["transparent"][self.objects["material"]]
+        return np.lexsort((self.objects["material"], transparent))
+
+
+# --- JSON ---
+def _material_key(mat):
+    return (tuple(mat.get("diffuse", (0.8, 0.8, 0.8))), tuple(mat.get("specular", (0.0, 0.0, 0.0))),
+            float(mat.get("shininess", 1.0)), mat.get("texture"), bool(mat.get("transparent", False)))
+
+
+def load_json(path):
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+
+    textures = []
+    material_ids, material_rows, material_by_key = {}, [], {}
+    for name, mat in doc.get("materials", {}).items():
+        key = _material_key(mat)
+        if key not in material_by_key:
+            tex = mat.get("texture")
+            if tex is not None and tex not in textures:
+                textures.append(tex)
+            material_by_key[key] = len(material_rows)
+            material_rows.append((key[0], key[1], key[2], textures.index(tex) if tex is not None else -1, key[4], (0, 0, 0)))
+        material_ids[name] = material_by_key[key]
+
+    pool = MeshPool()
+    mesh_ids = {name: pool.add(spec, base_dir) for name, spec in doc.get("meshes", {}).items()}
+
+    # "parent": имя объекта выше по списку - "transform" задаётся относительно
+    # него. Родитель - один экземпляр (не "grid")
+    chunks, names, placed = [], [], {}
+    count = 0
+    for obj in doc.get("objects", []):
+        mesh = obj["mesh"]
+        mesh_id = mesh_ids[mesh] if isinstance(mesh, str) else pool.add(mesh, base_dir)
+        model = transform_matrix(obj.get("transform"))
+        offsets = grid_offsets(obj["grid"]) if "grid" in obj else None
+        parent, parent_model = -1, None
+        if "parent" in obj:
+            if obj["parent"] not in placed:
+                raise ValueError(f"object '{obj.get('name', '')}': parent '{obj['parent']}' "
+                                 "must be a single-instance object listed earlier")
+            parent, parent_model = placed[obj["parent"]]
+        n = 1 if offsets is None else len(offsets)
+        block = np.zeros(n, dtype=OBJECT_DTYPE)
+        block["mesh"] = mesh_id
+        block["material"] = material_ids[obj["material"]]
+        block["parent"] = parent
+        # Матрицы float64 - порциями, сразу в записи float32
+        for start in range(0, n, STREAM_CHUNK):
+            models = np.repeat(model[None], min(STREAM_CHUNK, n - start), axis=0)
+            if offsets is not None:
+                models[:, :3, 3] += offsets[start:start + STREAM_CHUNK]
+            if parent_model is not None:
+                models = parent_model @ models
+            block["model"][start:start + len(models)] = models
+        if n == 1:
+            placed[obj.get("name", "")] = (count, models[0])
+        chunks.append(block)
+        names.append(obj.get("name", ""))
+        count += n
+
+    ranges, vertices, indices = pool.finish()
+    meta = {
+        "camera": doc.get("camera", {}),
+        "light": doc.get("light", {}),
+        "point_lights": doc.get("point_lights", []),
+        "shadow": doc.get("shadow", {}),
+        "lod": doc.get("lod", {}),
+        "shading": doc.get("shading", "forward"),
+        "render_scale": doc.get("render_scale", {}),
+        "vertex_format": doc.get("vertex_format", "float32"),
+        "textures": [os.path.normpath(os.path.join(base_dir, t)) for t in textures],
+        "names": names,
+    }
+    objects = np.concatenate(chunks) if chunks else np.zeros(0, dtype=OBJECT_DTYPE)
+    return SceneData(meta, ranges, vertices, indices, np.array(material_rows, dtype=MATERIAL_DTYPE), objects)
+
+
+# --- Бинарный формат ---
+def save_binary(scene, path):
+    base_dir = os.path.dirname(os.path.abspath(path))
+    meta = dict(scene.meta)
+    meta["textures"] = [os.path.relpath(t, base_dir) for t in scene.textures]
+    meta_bytes = json.dumps(meta).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(meta_bytes), len(scene.ranges), len(scene.vertices),
+                            len(scene.indices), len(scene.materials), len(scene.objects)))
+        f.write(meta_bytes)
+        for arr in (scene.ranges, scene.vertices.astype(np.float32), scene.indices.astype(np.uint32),
+                    scene.materials, scene.objects):
+            f.write(np.ascontiguousarray(arr).tobytes())
+
+
+def load_binary(path):
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, "rb") as f:
+        magic, version, meta_len, n_ranges, n_verts, n_inds, n_mats, n_objs = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a packed scene (v{VERSION})")
+        meta = json.loads(f.read(meta_len).decode("utf-8"))
+    meta["textures"] = [os.path.normpath(os.path.join(base_dir, t)) for t in meta.get("textures", [])]
+
+    offset = HEADER.size + meta_len
+    layout = ((MESH_RANGE_DTYPE, (n_ranges,)), (np.dtype("<f4"), (n_verts, FLOATS_PER_VERTEX)),
+              (np.dtype("<u4"), (n_inds,)), (MATERIAL_DTYPE, (n_mats,)), (OBJECT_DTYPE, (n_objs,)))
+    arrays = []
+    for dtype, shape in layout:
+        count = int(np.prod(shape))
+        if count == 0:
+            arrays.append(np.zeros(shape, dtype=dtype))
+        else:
+            # memmap: с диска читаются только запрошенные порции (iter_objects,
+            # world_bounds, setup.upload_chunked), без разбора и полной копии
+            arrays.append(np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape))
+        offset += count * dtype.itemsize
+    return SceneData(meta, *arrays)
+
+
+def load_scene(path):
+    with open(path, "rb") as f:
+        is_binary = f.read(4) == MAGIC
+    return load_binary(path) if is_binary else load_json(path)
+
+
+# Допустимые ошибки квантования формата вершин (проверка "check")
+QUANTIZATION_LIMITS = {"position_relative": 1e-3, "normal_deg": 0.5, "uv": 1e-2}
+
+
+def check_vertex_format(scene, fmt):
+    """Ошибки квантования по каждому мешу; возвращает строки отчёта и число нарушений."""
+    rows, failures = [], 0
+    for mesh_id, r in enumerate(scene.ranges):
+        start = int(r["base_vertex"])
+        err = quantization_error(scene.vertices[start:start + int(r["vertex_count"])], fmt)
+        bad = [k for k, limit in QUANTIZATION_LIMITS.items() if err[k] > limit]
+        failures += len(bad)
+        rows.append(f"{fmt:<15} mesh {mesh_id:3d}  position {err['position']:.5f} ({err['position_relative']:.1e})  "
+                    f"normal {err['normal_deg']:.3f} deg  uv {err['uv']:.5f}  {'FAIL ' + ','.join(bad) if bad else 'ok'}")
+    return rows, failures
+
+
+def main(argv):
+    if len(argv) == 4 and argv[1] == "compile":
+        scene = load_json(argv[2])
+        save_binary(scene, argv[3])
+        print(f"[INFO] {argv[3]}: {len(scene.ranges)} meshes, {len(scene.materials)} materials, "
+              f"{len(scene.objects)} objects, {len(scene.vertices)} vertices")
+    elif len(argv) == 3 and argv[1] == "info":
+        scene = load_scene(argv[2])
+        print(f"meshes {len(scene.ranges)}, vertices {len(scene.vertices)}, indices {len(scene.indices)}, "
+              f"materials {len(scene.materials)}, objects {len(scene.objects)}, textures {scene.textures}")
+    elif len(argv) in (3, 4) and argv[1] == "check":
+        scene = load_scene(argv[2])
+        formats = [argv[3]] if len(argv) == 4 else [f for f in VERTEX_FORMATS if f != "float32"]
+        failures = 0
+        for fmt in formats:
+            rows, bad = check_vertex_format(scene, fmt)
+            failures += bad
+            print("\n".join(rows))
+            print(f"[INFO] {fmt}: {vertex_layout(fmt)[0].itemsize} B/vertex "
+                  f"(float32: {vertex_layout('float32')[0].itemsize}), indices {pack_indices(scene.indices)[0].dtype}")
+        if failures:
+            print(f"[ERROR] {failures} quantization error(s) above {QUANTIZATION_LIMITS}")
+            return 1
+    else:
+        print("usage: python scene_format.py compile <scene.json> <scene.scnb>\n"
+              "       python scene_format.py info <scene.json|scene.scnb>\n"
+              "       python scene_format.py check <scene.json|scene.scnb> [vertex_format]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
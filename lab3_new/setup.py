@@ -1,133 +1,157 @@
-import math
 import numpy as np
-import trimesh
 from OpenGL.GL import *
 
-def generate_cone_data(radius, height, slices):
-    cone = trimesh.creation.cone(radius=radius, height=height, sections=slices)
-    verts = cone.vertices
-    normals = cone.vertex_normals
-    inds = cone.faces.flatten()
-
-    uvs = np.zeros((verts.shape[0], 2), dtype=np.float32)
-    for i, (x, y, z) in enumerate(verts):
-        theta = math.atan2(z, x)
-        u = (theta + math.pi) / (2 * math.pi)
-        v = (y + height / 2) / height
-        uvs[i] = [u, v]
-
-    verts_with_data = np.hstack([verts, normals, uvs]).astype(np.float32)
-    return verts_with_data, np.array(inds, dtype=np.uint32), len(inds)
-
-def generate_cylinder_data(radius, height, slices):
-    cyl = trimesh.creation.cylinder(radius=radius, height=height, sections=slices)
-    verts = cyl.vertices
-    normals = cyl.vertex_normals
-    inds = cyl.faces.flatten()
-
-    uvs = np.zeros((verts.shape[0], 2), dtype=np.float32)
-    for i, (x, y, z) in enumerate(verts):
-        theta = math.atan2(z, x)
-        u = (theta + math.pi) / (2 * math.pi)
-        v = (y + height / 2) / height
-        uvs[i] = [u, v]
-
-    verts_with_data = np.hstack([verts, normals, uvs]).astype(np.float32)
-    return verts_with_data, np.array(inds, dtype=np.uint32), len(inds)
-
-def generate_floor_data(size, repeat_tex=10):
-    half = size / 2.0
-    verts = np.array([
-        -half, 0.0, -half, 0.0, 1.0, 0.0, 0.0, repeat_tex,
-        half, 0.0, -half, 0.0, 1.0, 0.0, repeat_tex, repeat_tex,
-        half, 0.0, half, 0.0, 1.0, 0.0, repeat_tex, 0.0,
-        -half, 0.0, half, 0.0, 1.0, 0.0, 0.0, 0.0
-    ], dtype=np.float32)
-    inds = np.array([0, 1, 2, 2, 3, 0], dtype=np.uint32)
-    return verts, inds, len(inds)
-
-def generate_torus_data(radius_major, radius_minor, radial_segments, tubular_segments):
-    vertices = []
-    normals = []
-    uvs = []
-    indices = []
-
-    for i in range(radial_segments):
-        theta = (i / radial_segments) * 2 * math.pi
-        next_theta = ((i + 1) % radial_segments) / radial_segments * 2 * math.pi
-
-        for j in range(tubular_segments):
-            phi = (j / tubular_segments) * 2 * math.pi
-            next_phi = ((j + 1) % tubular_segments) / tubular_segments * 2 * math.pi
-
-            def point(a, b):
-                x = (radius_major + radius_minor * math.cos(b)) * math.cos(a)
-                y = radius_minor * math.sin(b)
-                z = (radius_major + radius_minor * math.cos(b)) * math.sin(a)
-                return np.array([x, y, z], dtype=np.float32)
-
-            p1 = point(theta, phi)
-            p2 = point(theta, next_phi)
-            p3 = point(next_theta, phi)
-            p4 = point(next_theta, next_phi)
-
-            def normal(a, b):
-                nx = math.cos(a) * math.cos(b)
-                ny = math.sin(b)
-                nz = math.sin(a) * math.cos(b)
-                return np.array([nx, ny, nz], dtype=np.float32)
-
-            n1 = normal(theta, phi)
-            n2 = normal(theta, next_phi)
-            n3 = normal(next_theta, phi)
-            n4 = normal(next_theta, next_phi)
-
-            u1, v1 = i / radial_segments, j / tubular_segments
-            u2, v2 = i / radial_segments, (j + 1) / tubular_segments
-            u3, v3 = (i + 1) / radial_segments, j / tubular_segments
-            u4, v4 = (i + 1) / radial_segments, (j + 1) / tubular_segments
-
-            idx = len(vertices) // 3
-            vertices.extend(p1); normals.extend(n1); uvs.extend([u1, v1])
-            vertices.extend(p2); normals.extend(n2); uvs.extend([u2, v2])
-            vertices.extend(p3); normals.extend(n3); uvs.extend([u3, v3])
-            vertices.extend(p4); normals.extend(n4); uvs.extend([u4, v4])
-
-            indices += [
-                idx, idx + 1, idx + 2,
-                idx + 2, idx + 1, idx + 3
-            ]
-
-    vertices = np.array(vertices, dtype=np.float32).reshape(-1, 3)
-    normals = np.array(normals, dtype=np.float32).reshape(-1, 3)
-    uvs = np.array(uvs, dtype=np.float32).reshape(-1, 2)
-
-    verts_with_data = np.hstack([vertices, normals, uvs]).astype(np.float32)
-    indices = np.array(indices, dtype=np.uint32)
-
-    return verts_with_data, indices, len(indices)
-
-def setup_object_vao_vbo(vertices_data, indices_data=None):
+# --- Форматы вершин ---
+# Компоненты вершины: позиция, нормаль, uv. Для каждой - способ хранения:
+#   f32        - float32 (как раньше)
+#   f16        - половинная точность, дополняется до кратного 4 байтам
+#   i2_10_10_10 - нормаль в 32 битах (GL_INT_2_10_10_10_REV, нормализованная)
+VERTEX_FORMATS = {
+    "float32": {"position": "f32", "normal": "f32", "uv": "f32"},    # 32 байта
+    "packed_normals": {"position": "f32", "normal": "i2_10_10_10", "uv": "f32"},  # 24 байта
+    "compact": {"position": "f16", "normal": "i2_10_10_10", "uv": "f16"},    # 16 байт
+}
+VERTEX_ATTRIBUTES = (("position", 0, 3, slice(0, 3)), ("normal", 1, 3, slice(3, 6)), ("uv", 2, 2, slice(6, 8)))
+UPLOAD_CHUNK = 1 << 16  # вершин / индексов в одной порции (glBufferSubData, проверка квантования)
+
+
+def _encoding_dtype(encoding, components):
+    if encoding == "f32":
+        return np.dtype(("<f4", components)), GL_FLOAT, GL_FALSE
+    if encoding == "f16":
+        return np.dtype(("<f2", components + components % 2)), GL_HALF_FLOAT, GL_FALSE
+    if encoding == "i2_10_10_10":
+        return np.dtype("<u4"), GL_INT_2_10_10_10_REV, GL_TRUE
+    raise ValueError(f"unknown vertex encoding: {encoding}")
+
+
+def vertex_layout(fmt="float32"):
+    """dtype вершины и атрибуты [(location, size, gl_type, normalized, offset)]."""
+    spec = VERTEX_FORMATS[fmt]
+    fields, attribs, offset = [], [], 0
+    for name, location, components, _ in VERTEX_ATTRIBUTES:
+        dtype, gl_type, normalized = _encoding_dtype(spec[name], components)
+        fields.append((name, dtype))
+        attribs.append((location, 4 if gl_type == GL_INT_2_10_10_10_REV else components, gl_type, normalized, offset))
+        offset += dtype.itemsize
+    return np.dtype(fields), attribs
+
+
+def pack_normals_2_10_10_10(normals):
+    # Знаковые 10-битные компоненты (x, y, z), w = 0
+    q = np.rint(np.clip(normals, -1.0, 1.0) * 511.0).astype(np.int32) & 0x3FF
+    return (q[:, 0] | (q[:, 1] << 10) | (q[:, 2] << 20)).astype(np.uint32)
+
+
+def unpack_normals_2_10_10_10(packed):
+    q = (packed[:, None].astype(np.int64) >> np.array([0, 10, 20])) & 0x3FF
+    q = np.where(q >= 512, q - 1024, q)
+    return np.maximum(q / 511.0, -1.0)
+
+
+def pack_vertices(vertices, fmt="float32"):
+    """Вершины N x 8 float32 -> структурированный массив выбранного формата."""
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 8)
+    if fmt == "float32":
+        return vertices
+    dtype, _ = vertex_layout(fmt)
+    spec = VERTEX_FORMATS[fmt]
+    out = np.zeros(len(vertices), dtype=dtype)
+    for name, _, components, cols in VERTEX_ATTRIBUTES:
+        if spec[name] == "i2_10_10_10":
+            out[name] = pack_normals_2_10_10_10(vertices[:, cols])
+        else:
+            out[name][:, :components] = vertices[:, cols]
+    return out
+
+
+def unpack_vertices(packed, fmt="float32"):
+    if fmt == "float32":
+        return np.asarray(packed, dtype=np.float32).reshape(-1, 8)
+    spec = VERTEX_FORMATS[fmt]
+    out = np.zeros((len(packed), 8), dtype=np.float32)
+    for name, _, components, cols in VERTEX_ATTRIBUTES:
+        if spec[name] == "i2_10_10_10":
+            out[:, cols] = unpack_normals_2_10_10_10(packed[name])
+        else:
+            out[:, cols] = packed[name][:, :components]
+    return out
+
+
+def quantization_error(vertices, fmt, chunk=UPLOAD_CHUNK):
+    """Ошибки формата: позиция (единицы модели и доля размера), угол нормали (градусы), uv.
+    Вершины упаковываются и распаковываются порциями по chunk."""
+    vertices = np.asarray(vertices).reshape(-1, 8)
+    pos_err = angle = uv_err = 0.0
+    lo, hi = np.full(3, np.inf, dtype=np.float32), np.full(3, -np.inf, dtype=np.float32)
+    for start in range(0, len(vertices), chunk):
+        part = np.asarray(vertices[start:start + chunk], dtype=np.float32)
+        restored = unpack_vertices(pack_vertices(part, fmt), fmt)
+        pos_err = max(pos_err, np.abs(restored[:, 0:3] - part[:, 0:3]).max())
+        lo, hi = np.minimum(lo, part[:, 0:3].min(axis=0)), np.maximum(hi, part[:, 0:3].max(axis=0))
+        n0 = part[:, 3:6]
+        n1 = restored[:, 3:6]
+        lengths = np.linalg.norm(n0, axis=1) * np.linalg.norm(n1, axis=1)
+        valid = lengths > 1e-6
+        cos = np.einsum("ij,ij->i", n0[valid], n1[valid]) / lengths[valid]
+        angle = max(angle, np.degrees(np.arccos(np.clip(cos, -1.0, 1.0))).max(initial=0.0))
+        uv_err = max(uv_err, np.abs(restored[:, 6:8] - part[:, 6:8]).max())
+    extent = (hi - lo).max() if len(vertices) else 0.0
+    return {
+        "position": float(pos_err),
+        "position_relative": float(pos_err / extent) if extent > 0 else 0.0,
+        "normal_deg": float(angle),
+        "uv": float(uv_err),
+    }
+
+
+def index_format(indices):
+    """dtype и тип GL индексов: uint16, если помещаются (индексы мешей локальные -
+    см. base_vertex). Только проход max, без копии массива."""
+    if len(indices) == 0 or int(np.max(indices)) <= 0xFFFF:
+        return np.dtype(np.uint16), GL_UNSIGNED_SHORT
+    return np.dtype(np.uint32), GL_UNSIGNED_INT
+
+
+def pack_indices(indices):
+    """Индексы в формате index_format одной копией (для отчётов и проверок)."""
+    indices = np.asarray(indices)
+    dtype, gl_type = index_format(indices)
+    return indices.astype(dtype), gl_type
+
+
+def upload_chunked(target, data, itemsize, convert, chunk=UPLOAD_CHUNK):
+    """Буфер под len(data) элементов по itemsize байт, заполняемый порциями
+    glBufferSubData: из data (в том числе memmap сцены .scnb) читается и
+    преобразуется только текущая порция, полная копия не собирается."""
+    glBufferData(target, len(data) * itemsize, None, GL_STATIC_DRAW)
+    for start in range(0, len(data), chunk):
+        part = convert(data[start:start + chunk])
+        glBufferSubData(target, start * itemsize, part.nbytes, part)
+
+
+def setup_object_vao_vbo(vertices_data, indices_data=None, vertex_format="float32", index_dtype=None):
+    """VAO с вершинами (N x 8, в формате vertex_format) и индексами
+    (index_dtype, по умолчанию - как в indices_data); оба буфера заливаются порциями."""
+    dtype, attribs = vertex_layout(vertex_format)
     vao = glGenVertexArrays(1)
     vbo = glGenBuffers(1)
     glBindVertexArray(vao)
     glBindBuffer(GL_ARRAY_BUFFER, vbo)
-    glBufferData(GL_ARRAY_BUFFER, vertices_data.nbytes, vertices_data, GL_STATIC_DRAW)
+    upload_chunked(GL_ARRAY_BUFFER, vertices_data.reshape(-1, 8), dtype.itemsize,
+                   lambda part: pack_vertices(part, vertex_format))
 
     ebo = None
     if indices_data is not None:
+        index_dtype = indices_data.dtype if index_dtype is None else np.dtype(index_dtype)
         ebo = glGenBuffers(1)
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
-        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices_data.nbytes, indices_data, GL_STATIC_DRAW)
+        upload_chunked(GL_ELEMENT_ARRAY_BUFFER, indices_data.reshape(-1), index_dtype.itemsize,
+                       lambda part: np.ascontiguousarray(part, dtype=index_dtype))
 
-    glEnableVertexAttribArray(0)
-    glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 8 * 4, ctypes.c_void_p(0))
-
-    glEnableVertexAttribArray(1)
-    glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 8 * 4, ctypes.c_void_p(3 * 4))
-
-    glEnableVertexAttribArray(2)
-    glVertexAttribPointer(2, 2, GL_FLOAT, GL_FALSE, 8 * 4, ctypes.c_void_p(6 * 4))
+    for location, size, gl_type, normalized, offset in attribs:
+        glEnableVertexAttribArray(location)
+        glVertexAttribPointer(location, size, gl_type, normalized, dtype.itemsize, ctypes.c_void_p(offset))
 
     glBindVertexArray(0)
     glBindBuffer(GL_ARRAY_BUFFER, 0)
@@ -0,0 +1,198 @@
+# File: shader_manager.py
+# Шейдеры из файлов каталога glsl/:
+#   - #include "file.glsl" (каждый файл включается один раз);
+#   - перестановки через #define, которые вставляются сразу после #version;
+#   - кэш слинкованных программ (glGetProgramBinary) на диске, ключ - хеш
+#     исходников и строка драйвера: повторный запуск обходится без компиляции;
+#   - горячая перезагрузка: poll() раз в кадр проверяет время изменения файлов
+#     и перелинковывает изменившиеся программы. Номер программы при этом не
+#     меняется (бинарь загружается в тот же объект), поэтому сохранённые в
+#     сцене id остаются действительными; при ошибке остаётся старая версия.
+import hashlib
+import os
+import re
+import time
+
+from OpenGL.GL import *
+
+GLSL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "glsl")
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "lab3_new", "shaders")
+POLL_INTERVAL = 0.5  # секунды между проверками файлов
+
+INCLUDE_RE = re.compile(r'^\s*#include\s+"([^"]+)"\s*$', re.M)
+
+
+def preprocess(name, defines=None, base_dir=GLSL_DIR):
+    """Исходник name с раскрытыми #include и #define после #version.
+    Возвращает (текст, список путей всех использованных файлов)."""
+    files = []
+
+    def expand(path):
+        if path in files:
+            return ""
+        files.append(path)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        return INCLUDE_RE.sub(lambda m: expand(os.path.join(os.path.dirname(path), m.group(1))).rstrip("\n"), text)
+
+    source = expand(os.path.join(base_dir, name))
+    if defines:
+        lines = "".join(f"#define {key} {int(value) if isinstance(value, bool) else value}\n"
+                        for key, value in sorted(defines.items()))
+        head, sep, rest = source.partition("\n")
+        if not head.startswith("#version"):
+            head, sep, rest = "", "", source
+        source = head + sep + lines + rest
+    return source, files
+
+
+def driver_string():
+    return "|".join(glGetString(e).decode() for e in (GL_VENDOR, GL_RENDERER, GL_VERSION))
+
+
+def _compile(source, shader_type, label):
+    shader = glCreateShader(shader_type)
+    glShaderSource(shader, source)
+    glCompileShader(shader)
+    if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+        log = glGetShaderInfoLog(shader).decode()
+        glDeleteShader(shader)
+        raise RuntimeError(f"{label}: {log}")
+    return shader
+
+
+class ShaderProgram:
+    """Программа из вершинного и фрагментного файла с набором #define."""
+    def __init__(self, vs_name, fs_name, defines):
+        self.vs_name, self.fs_name = vs_name, fs_name
+        self.defines = dict(defines or {})
+        self.id = glCreateProgram()
+        self.files = []
+        self.mtimes = {}
+
+    @property
+    def label(self):
+        variant = ",".join(f"{k}={v}" for k, v in sorted(self.defines.items()))
+        return f"{self.vs_name}+{self.fs_name}" + (f"[{variant}]" if variant else "")
+
+    def sources(self, base_dir):
+        vs, vs_files = preprocess(self.vs_name, self.defines, base_dir)
+        fs, fs_files = preprocess(self.fs_name, self.defines, base_dir)
+        self.files = vs_files + [f for f in fs_files if f not in vs_files]
+        self.mtimes = {f: os.path.getmtime(f) for f in self.files}
+        return vs, fs
+
+    def changed(self):
+        return any(not os.path.exists(f) or os.path.getmtime(f) != t for f, t in self.mtimes.items())
+
+
+class ShaderManager:
+    def __init__(self, base_dir=GLSL_DIR, cache_dir=CACHE_DIR, use_cache=True):
+        self.base_dir = base_dir
+        self.cache_dir = cache_dir
+        # Бинарные программы нужны от драйвера хотя бы в одном формате
+        self.use_cache = use_cache and glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS) > 0
+        self.driver = driver_string()
+        self.programs = {}
+        self.last_poll = 0.0
+        self.stats = {"compiled": 0, "cached": 0, "reloaded": 0}
+
+    def program(self, vs_name, fs_name, defines=None):
+        """id программы; одинаковые (файлы, defines) линкуются один раз."""
+        key = (vs_name, fs_name, tuple(sorted((defines or {}).items())))
+        prog = self.programs.get(key)
+        if prog is None:
+            prog = ShaderProgram(vs_name, fs_name, defines)
+            self.build(prog)
+            self.programs[key] = prog
+        return prog.id
+
+    # --- сборка ---
+    def cache_path(self, vs, fs):
+        digest = hashlib.sha1("\0".join((self.driver, vs, fs)).encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".bin")
+
+    def load_binary(self, program_id, path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return False
+        fmt = int.from_bytes(data[:4], "little")
+        glProgramBinary(program_id, fmt, data[4:], len(data) - 4)
+        # Драйвер вправе отвергнуть бинарь (обновление и т.п.) - тогда компиляция
+        return bool(glGetProgramiv(program_id, GL_LINK_STATUS))
+
+    def save_binary(self, path, binary, fmt):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(int(fmt).to_bytes(4, "little") + binary)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _program_binary(program_id, length):
+        fmt = GLenum(0)
+        size = GLsizei(0)
+        buf = (GLubyte * length)()
+        glGetProgramBinary(program_id, length, size, fmt, buf)
+        return bytes(buf)[:size.value], fmt.value
+
+    def link(self, vs, fs, label):
+        """Новая программа из исходников (исключение при ошибке)."""
+        shaders = [_compile(vs, GL_VERTEX_SHADER, label), _compile(fs, GL_FRAGMENT_SHADER, label)]
+        program_id = glCreateProgram()
+        for shader in shaders:
+            glAttachShader(program_id, shader)
+        glProgramParameteri(program_id, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+        glLinkProgram(program_id)
+        for shader in shaders:
+            glDetachShader(program_id, shader)
+            glDeleteShader(shader)
+        if not glGetProgramiv(program_id, GL_LINK_STATUS):
+            log = glGetProgramInfoLog(program_id).decode()
+            glDeleteProgram(program_id)
+            raise RuntimeError(f"{label}: {log}")
+        return program_id
+
+    def build(self, prog):
+        vs, fs = prog.sources(self.base_dir)
+        path = self.cache_path(vs, fs)
+        if self.use_cache and self.load_binary(prog.id, path):
+            self.stats["cached"] += 1
+            return
+        fresh = self.link(vs, fs, prog.label)
+        self.stats["compiled"] += 1
+        if self.use_cache:
+            binary, fmt = self._program_binary(fresh, glGetProgramiv(fresh, GL_PROGRAM_BINARY_LENGTH))
+            glProgramBinary(prog.id, fmt, binary, len(binary))
+            if glGetProgramiv(prog.id, GL_LINK_STATUS):
+                self.save_binary(path, binary, fmt)
+                glDeleteProgram(fresh)
+                return
+        # Без поддержки бинарей программа заменяется целиком (id меняется)
+        glDeleteProgram(prog.id)
+        prog.id = fresh
+
+    # --- горячая перезагрузка ---
+    def poll(self):
+        """Перелинковывает программы с изменёнными файлами; True - что-то перезагружено."""
+        now = time.monotonic()
+        if now - self.last_poll < POLL_INTERVAL:
+            return False
+        self.last_poll = now
+        reloaded = False
+        for prog in self.programs.values():
+            if not prog.changed():
+                continue
+            try:
+                self.build(prog)
+            except (OSError, RuntimeError) as e:
+                # Старая версия продолжает работать, ошибка - в консоль
+                prog.mtimes = {f: os.path.getmtime(f) for f in prog.files if os.path.exists(f)}
+                print(f"[ERROR] shader reload failed: {e}")
+                continue
+            self.stats["reloaded"] += 1
+            reloaded = True
+            print(f"[INFO] shader reloaded: {prog.label}")
+        return reloaded
@@ -0,0 +1,461 @@
+# File: software_renderer.py
+# Программный растеризатор на NumPy - эталон для сцен lab3_new без OpenGL.
+# Берёт те же чередующиеся вершины (позиция, нормаль, uv), индексы и
+# матрицы, что main.py, и повторяет его кадр:
+#   1) проход теней: глубина из источника света (орто) с glPolygonOffset(8, 32);
+#   2) непрозрачные объекты: отсечение по ближней плоскости, разбиение экрана
+#      на плитки, функции рёбер по блоку пикселей плитки, тест глубины (LESS);
+#   3) освещение SCENE_FS (Фонг, 3x3 PCF с билинейной выборкой карты теней)
+#      только для видимых пикселей;
+#   4) прозрачные объекты (alpha 0.7) поверх, от дальних к ближним, без записи глубины.
+# Плитки можно раздать пулу процессов. Отличия от GL: текстуры без мипмапов,
+# все объекты на уровне детализации 0.
+#
+#   python software_renderer.py [scene.json|.scnb] [out.png] [workers]
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from scene_format import load_scene, rotate_m
+
+CLEAR_COLOR = (0.6, 0.6, 0.6)
+TILE_SIZE = 32
+TRANSPARENT_ALPHA = 0.7
+POLYGON_OFFSET = (8.0, 32.0)       # factor, units - как в main.py
+DEPTH_RESOLUTION = 1.0 / (1 << 24)  # шаг 24-битного буфера глубины
+
+
+# --- Матрицы (строки - как в математике, совпадают с glm) ---
+def perspective(fov_deg, aspect, near, far):
+    f = 1.0 / math.tan(math.radians(fov_deg) / 2.0)
+    return np.array([[f / aspect, 0, 0, 0], [0, f, 0, 0],
+                     [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)], [0, 0, -1, 0]])
+
+
+def ortho(left, right, bottom, top, near, far):
+    return np.array([[2 / (right - left), 0, 0, -(right + left) / (right - left)],
+                     [0, 2 / (top - bottom), 0, -(top + bottom) / (top - bottom)],
+                     [0, 0, -2 / (far - near), -(far + near) / (far - near)], [0, 0, 0, 1]])
+
+
+def look_at(eye, center, up):
+    eye, center, up = (np.asarray(v, dtype=np.float64) for v in (eye, center, up))
+    f = (center - eye) / np.linalg.norm(center - eye)
+    s = np.cross(f, up)
+    s /= np.linalg.norm(s)
+    u = np.cross(s, f)
+    m = np.eye(4)
+    m[0, :3], m[1, :3], m[2, :3] = s, u, -f
+    m[:3, 3] = -m[:3, :3] @ eye
+    return m
+
+
+# --- Геометрия ---
+def clip_near(clip, varyings):
+    """Отсечение треугольников (T, 3, 4) плоскостью z + w >= 0 (ближняя плоскость GL).
+    Атрибуты (T, 3, K) интерполируются линейно в пространстве отсечения."""
+    d = clip[:, :, 2] + clip[:, :, 3]
+    inside = d >= 0
+    n_in = inside.sum(axis=1)
+    data = np.concatenate([clip, varyings], axis=2)
+    out = [data[n_in == 3]]
+
+    def lerp(a, b, da, db):
+        t = (da / (da - db))[:, None]
+        return a + (b - a) * t
+
+    rows = np.arange(len(data))
+    source = [rows[n_in == 3]]
+    for count in (1, 2):
+        sel = rows[n_in == count]
+        if not len(sel):
+            continue
+        # Особая вершина: единственная внутри (count=1) или единственная снаружи (count=2)
+        odd = np.argmax(inside[sel] if count == 1 else ~inside[sel], axis=1)
+        i0, i1, i2 = odd, (odd + 1) % 3, (odd + 2) % 3
+        v0, v1, v2 = data[sel, i0], data[sel, i1], data[sel, i2]
+        d0, d1, d2 = d[sel, i0], d[sel, i1], d[sel, i2]
+        if count == 1:
+            out.append(np.stack([v0, lerp(v0, v1, d0, d1), lerp(v0, v2, d0, d2)], axis=1))
+            source.append(sel)
+        else:
+            p20 = lerp(v2, v0, d2, d0)
+            p01 = lerp(v0, v1, d0, d1)
+            out += [np.stack([v1, v2, p20], axis=1), np.stack([v1, p20, p01], axis=1)]
+            source += [sel, sel]
+    # Порядок отрисовки сохраняется: части треугольника стоят на его месте
+    source = np.concatenate(source)
+    order = np.argsort(source, kind="stable")
+    data = np.concatenate(out)[order]
+    source = source[order]
+    return data[:, :, :4], data[:, :, 4:], source
+
+
+class Triangles:
+    """Экранные треугольники: коэффициенты барицентрических координат
+    l_i = A_i x + B_i y + C_i, глубина окна в вершинах и разбиение по плиткам."""
+    def __init__(self, clip, width, height, tile=TILE_SIZE, polygon_offset=None):
+        w = clip[:, :, 3]
+        ndc = clip[:, :, :3] / w[:, :, None]
+        x = (ndc[:, :, 0] * 0.5 + 0.5) * width
+        y = (ndc[:, :, 1] * 0.5 + 0.5) * height
+        z = ndc[:, :, 2] * 0.5 + 0.5
+        area = (x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0])
+        self.valid = np.abs(area) > 1e-12
+        area = np.where(self.valid, area, 1.0)
+
+        coef = np.empty((len(clip), 3, 3))
+        for i, (a, b) in enumerate(((1, 2), (2, 0), (0, 1))):
+            dx, dy = x[:, b] - x[:, a], y[:, b] - y[:, a]
+            coef[:, i, 0] = -dy / area
+            coef[:, i, 1] = dx / area
+            coef[:, i, 2] = (dy * x[:, a] - dx * y[:, a]) / area
+        self.coef = coef
+        self.z = z
+        self.inv_w = 1.0 / w
+        self.offset = np.zeros(len(clip))
+        if polygon_offset is not None:
+            # glPolygonOffset: factor * max(|dz/dx|, |dz/dy|) + units * r
+            dzdx = np.einsum("ti,ti->t", coef[:, :, 0], z)
+            dzdy = np.einsum("ti,ti->t", coef[:, :, 1], z)
+            factor, units = polygon_offset
+            self.offset = factor * np.maximum(np.abs(dzdx), np.abs(dzdy)) + units * DEPTH_RESOLUTION
+
+        # Плитки, которые задевает AABB треугольника
+        self.width, self.height, self.tile = width, height, tile
+        self.tiles_x, self.tiles_y = -(-width // tile), -(-height // tile)
+        tx0 = np.clip(np.floor(x.min(1) / tile), 0, self.tiles_x).astype(np.int64)
+        tx1 = np.clip(np.floor(x.max(1) / tile) + 1, 0, self.tiles_x).astype(np.int64)
+        ty0 = np.clip(np.floor(y.min(1) / tile), 0, self.tiles_y).astype(np.int64)
+        ty1 = np.clip(np.floor(y.max(1) / tile) + 1, 0, self.tiles_y).astype(np.int64)
+        nx = np.where(self.valid, np.maximum(tx1 - tx0, 0), 0)
+        ny = np.where(self.valid, np.maximum(ty1 - ty0, 0), 0)
+        counts = nx * ny
+        tri = np.repeat(np.arange(len(clip)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        nxr = np.maximum(nx[tri], 1)
+        tile_id = (ty0[tri] + local // nxr) * self.tiles_x + tx0[tri] + local % nxr
+        # Устойчивая сортировка: внутри плитки треугольники идут в порядке отрисовки
+        order = np.argsort(tile_id, kind="stable")
+        self.pair_tri = tri[order]
+        bins = np.bincount(tile_id, minlength=self.tiles_x * self.tiles_y)
+        self.tile_end = np.cumsum(bins)
+        self.tile_start = self.tile_end - bins
+
+    def occupied_tiles(self):
+        return np.flatnonzero(self.tile_end > self.tile_start)
+
+    def tile_pixels(self, tile_id):
+        ty, tx = divmod(int(tile_id), self.tiles_x)
+        xs = np.arange(tx * self.tile, min((tx + 1) * self.tile, self.width))
+        ys = np.arange(ty * self.tile, min((ty + 1) * self.tile, self.height))
+        px, py = np.meshgrid(xs, ys)
+        return px.ravel(), py.ravel()
+
+
+def raster_tile(tris, tile_id, mode, depth_buffer=None):
+    """Растеризация одной плитки всеми её треугольниками сразу.
+    mode: "depth" - минимум глубины; "opaque" - ближайший треугольник и его
+    барицентрические координаты; "blend" - все фрагменты ближе depth_buffer."""
+    ids = tris.pair_tri[tris.tile_start[tile_id]:tris.tile_end[tile_id]]
+    px, py = tris.tile_pixels(tile_id)
+    pixel = py * tris.width + px
+    c = tris.coef[ids]
+    lam = c[:, :, 0, None] * (px + 0.5) + c[:, :, 1, None] * (py + 0.5) + c[:, :, 2, None]   # (T, 3, P)
+    covered = (lam >= 0).all(axis=1)
+    z = np.einsum("ti,tip->tp", tris.z[ids], lam) + tris.offset[ids, None]
+    covered &= (z >= 0.0) & (z <= 1.0)
+    if mode == "depth":
+        return pixel, np.where(covered, z, np.inf).min(axis=0)
+    if mode == "opaque":
+        zm = np.where(covered, z, np.inf)
+        best = np.argmin(zm, axis=0)
+        cols = np.arange(len(pixel))
+        depth = zm[best, cols]
+        hit = np.isfinite(depth)
+        return pixel[hit], ids[best[hit]], lam[best[hit], :, cols[hit]], depth[hit]
+    covered &= z < depth_buffer[pixel][None, :]
+    t, p = np.nonzero(covered)
+    return pixel[p], ids[t], lam[t, :, p]
+
+
+# Пул процессов: треугольники передаются один раз при запуске процесса
+_worker_tris = None
+
+
+def _init_worker(tris):
+    global _worker_tris
+    _worker_tris = tris
+
+
+def _raster_chunk(args):
+    tiles, mode, depth_buffer = args
+    return [raster_tile(_worker_tris, t, mode, depth_buffer) for t in tiles]
+
+
+def rasterize(tris, mode, depth_buffer=None, workers=0):
+    tiles = tris.occupied_tiles()
+    if workers > 1 and len(tiles) > workers:
+        chunks = np.array_split(tiles, workers * 4)
+        ctx = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+        with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker, initargs=(tris,)) as pool:
+            parts = pool.map(_raster_chunk, [(chunk, mode, depth_buffer) for chunk in chunks])
+            return [r for part in parts for r in part]
+    return [raster_tile(tris, t, mode, depth_buffer) for t in tiles]
+
+
+def perspective_weights(tris, tri, lam):
+    """Экранные барицентрические -> перспективно-корректные."""
+    b = lam * tris.inv_w[tri]
+    return b / b.sum(axis=1, keepdims=True)
+
+
+# --- Текстуры и тени ---
+def load_texture(path):
+    img = Image.open(path).transpose(Image.FLIP_TOP_BOTTOM).convert("RGBA")
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def sample_bilinear(image, u, v, wrap="repeat", border=1.0):
+    """Билинейная выборка как GL_LINEAR: центры текселей в (i + 0.5) / size."""
+    h, w = image.shape[:2]
+    x = u * w - 0.5
+    y = v * h - 0.5
+    x0, y0 = np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+    fx, fy = x - x0, y - y0
+    result = 0.0
+    for dx, dy, weight in ((0, 0, (1 - fx) * (1 - fy)), (1, 0, fx * (1 - fy)),
+                           (0, 1, (1 - fx) * fy), (1, 1, fx * fy)):
+        xi, yi = x0 + dx, y0 + dy
+        if wrap == "repeat":
+            texel = image[yi % h, xi % w]
+        else:
+            inside = (xi >= 0) & (xi < w) & (yi >= 0) & (yi < h)
+            texel = np.where(inside, image[np.clip(yi, 0, h - 1), np.clip(xi, 0, w - 1)], border)
+        result = result + (weight[:, None] if texel.ndim == 2 else weight) * texel
+    return result
+
+
+def shadow_pcf(shadow_map, light_space, world, normal, light_dir):
+    """calculateShadow() из SCENE_FS: 3x3 PCF по билинейно выбранной глубине."""
+    p = world @ light_space[:3, :3].T + light_space[:3, 3]
+    p = p * 0.5 + 0.5
+    inside = (p[:, 0] >= 0) & (p[:, 0] <= 1) & (p[:, 1] >= 0) & (p[:, 1] <= 1)
+    n = normal / np.linalg.norm(normal, axis=1, keepdims=True)
+    bias = np.maximum(0.12 * (1.0 - np.einsum("ij,ij->i", n, light_dir)), 0.03)
+    texel = 1.0 / shadow_map.shape[0]
+    shadow = np.zeros(len(p))
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            depth = sample_bilinear(shadow_map, p[:, 0] + dx * texel, p[:, 1] + dy * texel, wrap="border")
+            shadow += p[:, 2] - bias > depth
+    return np.where(inside, np.clip(shadow / 9.0, 0.0, 1.0), 0.0)
+
+
+class SoftwareRenderer:
+    """Кадр lab3_new: камера, свет и карта теней - как в main.Scene.display()."""
+    def __init__(self, data, width=1200, height=800, workers=0):
+        self.data = data
+        self.width, self.height = width, height
+        self.workers = workers
+        camera, light = data.camera, data.light
+        self.cam_rot_x = camera.get("rot_x", 30.0)
+        self.cam_rot_y = camera.get("rot_y", -30.0)
+        self.cam_distance = camera.get("distance", 1000.0)
+        self.fov = 50.0
+        enabled = light.get("enabled", True)
+        self.light_pos = np.array(light.get("position", [500.0, 500.0, 800.0, 1.0])[:3], dtype=np.float64)
+        self.light_color = np.array(light.get("diffuse", [1.0, 1.0, 1.0, 1.0])[:3]) * (1.0 if enabled else 0.0)
+        self.light_intensity = light.get("intensity", 1.2) if enabled else 0.0
+        self.light_ambient = np.array(light.get("ambient", [0.08, 0.08, 0.08, 1.0])[:3])
+        shadow = data.meta.get("shadow", {})
+        self.shadow_size = shadow.get("size", 2048)
+        self.shadow_extent = shadow.get("extent", 1200.0)
+        self.shadow_near, self.shadow_far = shadow.get("near", 1.0), shadow.get("far", 3000.0)
+        self.textures = [load_texture(path) for path in data.textures]
+        self.timings = {}
+
+    # --- матрицы кадра ---
+    def camera_rotation(self):
+        return rotate_m(self.cam_rot_x, 1, 0, 0) @ rotate_m(self.cam_rot_y, 0, 1, 0)
+
+    def view_matrix(self):
+        return look_at((0.0, 400.0, self.cam_distance), (0, 0, 0), (0, 1, 0)) @ self.camera_rotation()
+
+    def light_space_matrix(self):
+        e = self.shadow_extent
+        return ortho(-e, e, -e, e, self.shadow_near, self.shadow_far) @ look_at(self.light_pos, (0, 0, 0), (0, 1, 0))
+
+    # --- геометрия сцены ---
+    def world_triangles(self, object_ids):
+        """Все треугольники объектов (уровень детализации 0) в мировых координатах:
+        (T, 3, 8) - позиция, нормаль, uv; и номер объекта каждого треугольника."""
+        data = self.data
+        tris, owners = [], []
+        for i in object_ids:
+            obj = data.objects[i]
+            r = data.ranges[int(obj["mesh"])]
+            first, count, base = int(r["first_index"]), int(r["index_count"]), int(r["base_vertex"])
+            idx = np.asarray(data.indices[first:first + count], dtype=np.int64) + base
+            v = np.asarray(data.vertices, dtype=np.float64)[idx]
+            model = np.asarray(obj["model"], dtype=np.float64)
+            normal_m = np.linalg.inv(model[:3, :3]).T
+            world = np.concatenate([v[:, :3] @ model[:3, :3].T + model[:3, 3], v[:, 3:6] @ normal_m.T, v[:, 6:8]], axis=1)
+            tris.append(world.reshape(-1, 3, 8))
+            owners.append(np.full(len(idx) // 3, i))
+        if not tris:
+            return np.zeros((0, 3, 8)), np.zeros(0, dtype=np.int64)
+        return np.concatenate(tris), np.concatenate(owners)
+
+    def project(self, world_tris, matrix):
+        pos = np.concatenate([world_tris[:, :, :3], np.ones(world_tris.shape[:2] + (1,))], axis=2)
+        return pos @ matrix.T
+
+    # --- проходы ---
+    def render_shadow_map(self, world_tris, light_space):
+        clip = self.project(world_tris, light_space)   # орто: w = 1, ближняя плоскость не нужна
+        tris = Triangles(clip, self.shadow_size, self.shadow_size, tile=64, polygon_offset=POLYGON_OFFSET)
+        depth = np.ones(self.shadow_size * self.shadow_size)
+        for pixel, z in rasterize(tris, "depth", workers=self.workers):
+            depth[pixel] = np.minimum(z, 1.0)
+        return depth.reshape(self.shadow_size, self.shadow_size)
+
+    def shade(self, world, normal, uv, materials, shadow_map, light_space, view_pos):
+        mats = self.data.materials[materials]
+        diffuse_c = mats["diffuse"].astype(np.float64)
+        ambient = self.light_ambient * diffuse_c
+        norm = normal / np.linalg.norm(normal, axis=1, keepdims=True)
+        light_dir = self.light_pos - world
+        light_dir /= np.linalg.norm(light_dir, axis=1, keepdims=True)
+        diff = np.maximum(np.einsum("ij,ij->i", norm, light_dir), 0.0)
+        diffuse = self.light_color * diff[:, None] * diffuse_c * self.light_intensity
+        view_dir = view_pos - world
+        view_dir /= np.linalg.norm(view_dir, axis=1, keepdims=True)
+        reflect_dir = -light_dir + 2.0 * np.einsum("ij,ij->i", norm, light_dir)[:, None] * norm
+        rv = np.maximum(np.einsum("ij,ij->i", view_dir, reflect_dir), 0.0)
+        spec = np.where(diff > 0.0, rv ** mats["shininess"].astype(np.float64), 0.0)
+        specular = self.light_color * spec[:, None] * mats["specular"].astype(np.float64) * self.light_intensity
+        shadow = shadow_pcf(shadow_map, light_space, world, normal, light_dir)
+        lighting = ambient + (1.0 - shadow)[:, None] * (diffuse + specular)
+
+        tex_color = diffuse_c
+        for tex_id in np.unique(mats["texture"]):
+            if tex_id < 0:
+                continue
+            sel = mats["texture"] == tex_id
+            sampled = sample_bilinear(self.textures[tex_id], uv[sel, 0], uv[sel, 1])
+            tex_color = tex_color.copy()
+            tex_color[sel] = sampled[:, :3]
+        return lighting * tex_color
+
+    def interpolate(self, tris, varyings, tri, lam):
+        b = perspective_weights(tris, tri, lam)
+        return np.einsum("pk,pkc->pc", b, varyings[tri])
+
+    def render(self):
+        """Кадр (height, width, 3) uint8, строка 0 - верх изображения."""
+        t0 = time.perf_counter()
+        data = self.data
+        transparent = data.materials["transparent"][data.objects["material"]].astype(bool)
+        order = data.draw_order()
+        opaque_ids = order[~transparent[order]]
+        view = self.view_matrix()
+        proj = perspective(self.fov, self.width / float(self.height), 1.0, 5000.0)
+        view_proj = proj @ view
+        light_space = self.light_space_matrix()
+        view_pos = (self.camera_rotation() @ np.array([0.0, 400.0, self.cam_distance, 1.0]))[:3]
+
+        all_world, _ = self.world_triangles(order)
+        shadow_map = self.render_shadow_map(all_world, light_space)
+        self.timings["shadow_ms"] = (time.perf_counter() - t0) * 1000.0
+
+        # Непрозрачные: ближайший треугольник на пиксель, затем освещение
+        t1 = time.perf_counter()
+        world, owners = self.world_triangles(opaque_ids)
+        clip, varyings, source = clip_near(self.project(world, view_proj), world)
+        owners = owners[source]
+        tris = Triangles(clip, self.width, self.height)
+        n_pixels = self.width * self.height
+        depth = np.ones(n_pixels)
+        color = np.tile(np.asarray(CLEAR_COLOR, dtype=np.float64), (n_pixels, 1))
+        hits = rasterize(tris, "opaque", workers=self.workers)
+        if hits:
+            pixel, tri, lam, z = (np.concatenate(a) for a in zip(*hits))
+            depth[pixel] = z
+            attrs = self.interpolate(tris, varyings, tri, lam)
+            materials = data.objects["material"][owners[tri]]
+            color[pixel] = self.shade(attrs[:, :3], attrs[:, 3:6], attrs[:, 6:8], materials,
+                                      shadow_map, light_space, view_pos)
+        self.timings["opaque_ms"] = (time.perf_counter() - t1) * 1000.0
+
+        # Прозрачные: объекты от дальних к ближним, фрагменты смешиваются по порядку
+        t2 = time.perf_counter()
+        transparent_ids = order[transparent[order]]
+        if len(transparent_ids):
+            lo, hi = data.world_bounds()
+            centers = (lo[transparent_ids] + hi[transparent_ids]) * 0.5
+            depth_key = -(centers @ view[2, :3] + view[2, 3])
+            transparent_ids = transparent_ids[np.argsort(-depth_key, kind="stable")]
+            self.blend_transparent(transparent_ids, view_proj, depth, color, shadow_map, light_space, view_pos)
+        self.timings["transparent_ms"] = (time.perf_counter() - t2) * 1000.0
+
+        image = np.clip(color, 0.0, 1.0).reshape(self.height, self.width, 3)[::-1]
+        self.timings["total_ms"] = (time.perf_counter() - t0) * 1000.0
+        return (image * 255.0 + 0.5).astype(np.uint8)
+
+    def blend_transparent(self, object_ids, view_proj, depth, color, shadow_map, light_space, view_pos):
+        world, owners = self.world_triangles(object_ids)
+        clip, varyings, source = clip_near(self.project(world, view_proj), world)
+        owners = owners[source]
+        tris = Triangles(clip, self.width, self.height)
+        frags = rasterize(tris, "blend", depth_buffer=depth, workers=self.workers)
+        if not frags:
+            return
+        pixel, tri, lam = (np.concatenate(a) for a in zip(*frags))
+        if not len(pixel):
+            return
+        attrs = self.interpolate(tris, varyings, tri, lam)
+        materials = self.data.objects["material"][owners[tri]]
+        frag_color = np.clip(self.shade(attrs[:, :3], attrs[:, 3:6], attrs[:, 6:8], materials,
+                                        shadow_map, light_space, view_pos), 0.0, 1.0)
+        # Последовательное смешивание src*a + dst*(1-a) в замкнутой форме:
+        # вклад фрагмента ослабляется (1-a)^(число фрагментов после него)
+        a = TRANSPARENT_ALPHA
+        seq = np.lexsort((tri, pixel))
+        pixel, frag_color = pixel[seq], frag_color[seq]
+        counts = np.bincount(pixel, minlength=len(depth))
+        end = np.cumsum(counts)[pixel]
+        after = end - 1 - np.arange(len(pixel))
+        weight = a * (1.0 - a) ** after
+        keep = (1.0 - a) ** counts
+        dst = np.clip(color, 0.0, 1.0) * keep[:, None]
+        for k in range(3):
+            dst[:, k] += np.bincount(pixel, weight * frag_color[:, k], minlength=len(depth))
+        color[:] = dst
+
+
+def main(argv):
+    scene_path = argv[1] if len(argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            "scenes", "default.json")
+    out = argv[2] if len(argv) > 2 else "software.png"
+    workers = int(argv[3]) if len(argv) > 3 else 0
+    if len(argv) > 4:
+        print("usage: python software_renderer.py [scene.json|.scnb] [out.png] [workers]")
+        return 1
+    renderer = SoftwareRenderer(load_scene(scene_path), workers=workers)
+    image = renderer.render()
+    Image.fromarray(image).save(out)
+    t = renderer.timings
+    print(f"[INFO] {out}: {renderer.width}x{renderer.height}, shadow {t['shadow_ms']:.0f} ms, "
+          f"opaque {t['opaque_ms']:.0f} ms, transparent {t['transparent_ms']:.0f} ms, total {t['total_ms']:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
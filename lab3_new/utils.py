@@ -1,4 +1,8 @@
 # File: utils.py
+import ctypes
+from collections import deque
+
+import numpy as np
 from pyglm import glm
 from OpenGL.GL import *
 from PIL import Image
@@ -30,6 +34,28 @@ def set_mat4_uniform(program, name, mat):
     if loc != -1:
         glUniformMatrix4fv(loc, 1, GL_FALSE, glm.value_ptr(mat))
 
+# --- Uniform без преобразований на кадр ---
+# PyOpenGL переводит список, срез или float64-массив в новый float32-массив
+# при каждом glUniform*fv; ctypes-массив float32 уходит в драйвер как есть.
+# UniformBuffer живёт всё время работы и заполняется на месте через NumPy-вид
+# array (mat4 - в строчной записи, загрузка с GL_TRUE; из glm.mat4 копируется
+# присваиванием array[:] = m)
+class UniformBuffer:
+    def __init__(self, *shape):
+        self.data = (ctypes.c_float * int(np.prod(shape)))()
+        self.array = np.ctypeslib.as_array(self.data).reshape(shape)
+
+# Расположения uniform по (программа, имя): glGetUniformLocation кодирует имя
+# при каждом вызове. После перелинковки программ расположения могут измениться -
+# кэш очищается (clear)
+class UniformLocations(dict):
+    def __call__(self, program, name):
+        key = (program, name)
+        loc = self.get(key)
+        if loc is None:
+            loc = self[key] = glGetUniformLocation(program, name)
+        return loc
+
 # VAO   - Vertex Array Object
 # EBO   - Element Buffer Object (индексы)
 # VBO   - Vertex Buffer Object
@@ -41,6 +67,13 @@ def draw_vao_elements(VAO, EBO, count):
         glDrawArrays(GL_TRIANGLES, 0, count)
     glBindVertexArray(0)
 
+INDEX_SIZES = {GL_UNSIGNED_SHORT: 2, GL_UNSIGNED_INT: 4}
+
+# Отрисовка диапазона общего буфера сцены (VAO должен быть привязан)
+def draw_mesh_range(first_index, count, base_vertex, index_type=GL_UNSIGNED_INT):
+    glDrawElementsBaseVertex(GL_TRIANGLES, count, index_type,
+                             ctypes.c_void_p(first_index * INDEX_SIZES[index_type]), base_vertex)
+
 def load_texture_file(path):
     try:
         img = Image.open(path).transpose(Image.FLIP_TOP_BOTTOM)
@@ -64,6 +97,36 @@ def load_texture_file(path):
         print("[ERROR] Failed to load texture:", e)
         return 0
 
+# Время прохода на GPU (GL_TIME_ELAPSED). Два запроса по очереди: результат
+# кадра N читается в кадре N+1, когда он уже готов, - без остановки конвейера.
+# 32-битный результат в нс: до 4 с на проход. Окно замеров - deque без копий списка
+class GpuTimer:
+    def __init__(self, window=60):
+        self.queries = list(glGenQueries(2))
+        self.pending = [False, False]
+        self.index = 0
+        self.window = window
+        self.samples = deque(maxlen=window)
+
+    def begin(self):
+        glBeginQuery(GL_TIME_ELAPSED, self.queries[self.index])
+
+    def end(self):
+        glEndQuery(GL_TIME_ELAPSED)
+        self.pending[self.index] = True
+        self.index ^= 1
+        query = self.queries[self.index]
+        if self.pending[self.index] and glGetQueryObjectiv(query, GL_QUERY_RESULT_AVAILABLE):
+            self.samples.append(glGetQueryObjectuiv(query, GL_QUERY_RESULT) / 1e6)
+            self.pending[self.index] = False
+
+    def reset(self):
+        self.samples.clear()
+        self.pending = [False, False]
+
+    def average_ms(self):
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
 def print_controls():
     print("\n------ Controls -------- ")
     print("1 2 3 4 5 6 - смена цвета света")
@@ -73,4 +136,13 @@ def print_controls():
     print("[ ] - приближение/отдаление камеры")
     print("ё - включить/выключить освещение")
     print("0 - включить/выключить текстуру сферы")
+    print("l - включить/выключить уровни детализации (LOD)")
+    print("b - прозрачность: сортировка / OIT")
+    print("h - фильтр теней: pcf3x3 / hw2x2 / hw3x3 / poisson / pcss")
+    print("g - освещение: прямое / отложенное (deferred)")
+    print("v - масштаб кадра: 1 / 0.75 / 0.5")
+    print("n - растяжение кадра: билинейное / с резкостью")
+    print("m - включить/выключить динамическое разрешение")
+    print("левая кнопка мыши - выбор объекта")
+    print("y - поворот выбранного объекта (с дочерними)")
     print("----------------------------\n")
@@ -0,0 +1,376 @@
+# File: bvh.py
+# Иерархия ограничивающих объёмов (BVH) на массивах NumPy.
+#
+# Узлы хранятся в плоских массивах: границы bmin/bmax, first_child (второй
+# ребёнок - first_child + 1, у листа -1), start/count - непрерывный
+# диапазон примитивов узла в перестановке order. Диапазон есть у каждого
+# узла, поэтому целиком видимое поддерево отдаётся одним срезом.
+#
+# Построение - бинированный SAH, сразу для всех узлов одного уровня
+# (без цикла Python по узлам). Запросы тоже пакетные: пары (луч, узел)
+# обрабатываются фронтом, уровень за уровнем.
+import numpy as np
+
+SAH_BINS = 16
+LEAF_SIZE = 4          # узел с таким числом примитивов всегда лист
+MAX_LEAF_SIZE = 16     # больше - делим даже если SAH против
+TRAVERSAL_COST = 1.0   # стоимость обхода узла относительно теста примитива
+
+
+def _box_area(bmin, bmax):
+    d = np.maximum(bmax - bmin, 0.0)
+    return 2.0 * (d[..., 0] * d[..., 1] + d[..., 1] * d[..., 2] + d[..., 2] * d[..., 0])
+
+
+def _ranges(starts, counts):
+    """Конкатенация диапазонов [start, start + count) без цикла."""
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(np.asarray(starts, dtype=np.int64) - offsets, counts) + np.arange(total)
+
+
+class BVH:
+    """BVH над произвольными AABB (треугольники, экземпляры, частицы).
+
+    bmin, bmax - (N, 3) границы примитивов. После перемещения примитивов
+    достаточно refit() с новыми границами - топология сохраняется.
+    """
+    def __init__(self, bmin, bmax, leaf_size=LEAF_SIZE, bins=SAH_BINS):
+        self.prim_min = np.ascontiguousarray(bmin, dtype=np.float32)
+        self.prim_max = np.ascontiguousarray(bmax, dtype=np.float32)
+        self.leaf_size = leaf_size
+        self.bins = bins
+        self._build()
+
+    # --- Построение ---
+    def _build(self):
+        n = len(self.prim_min)
+        capacity = max(1, 2 * n - 1)
+        self.bmin = np.zeros((capacity, 3), dtype=np.float32)
+        self.bmax = np.zeros((capacity, 3), dtype=np.float32)
+        self.first_child = np.full(capacity, -1, dtype=np.int32)
+        self.start = np.zeros(capacity, dtype=np.int64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.order = np.arange(n, dtype=np.int64)
+        self.levels = []
+        if n == 0:
+            self.node_count = 1
+            self.bmin[0], self.bmax[0] = np.inf, -np.inf
+            self._trim()
+            return
+
+        # Рабочие массивы активных (ещё делимых) примитивов в порядке сегментов:
+        # после разбиения они переставляются, листья из них выбрасываются
+        ids = np.arange(n, dtype=np.int64)
+        wmin, wmax = self.prim_min.copy(), self.prim_max.copy()
+        seg_node = np.zeros(1, dtype=np.int64)
+        seg_start = np.zeros(1, dtype=np.int64)
+        seg_count = np.full(1, n, dtype=np.int64)
+        self.count[0] = n
+        next_node = 1
+
+        while len(seg_node):
+            self.levels.append(seg_node)
+            offsets = np.cumsum(seg_count) - seg_count
+            node_min = np.minimum.reduceat(wmin, offsets, axis=0)
+            node_max = np.maximum.reduceat(wmax, offsets, axis=0)
+            self.bmin[seg_node], self.bmax[seg_node] = node_min, node_max
+
+            split = seg_count > self.leaf_size
+            if not split.all():
+                # Дальше работаем только с делимыми узлами
+                keep = np.repeat(split, seg_count)
+                ids, wmin, wmax = ids[keep], wmin[keep], wmax[keep]
+                seg_node, seg_start, seg_count = seg_node[split], seg_start[split], seg_count[split]
+                node_min, node_max = node_min[split], node_max[split]
+                if not len(seg_node):
+                    break
+                offsets = np.cumsum(seg_count) - seg_count
+            seg_of = np.repeat(np.arange(len(seg_node)), seg_count)
+            centers = (wmin + wmax) * 0.5
+            cmin = np.minimum.reduceat(centers, offsets, axis=0)
+            cmax = np.maximum.reduceat(centers, offsets, axis=0)
+
+            side, n_left, as_leaf = self._sah_split(wmin, wmax, centers, cmin, cmax, seg_of, seg_count,
+                                                    _box_area(node_min, node_max))
+            if as_leaf.any():
+                # SAH решил, что разбивать не выгодно - узел остаётся листом
+                go = ~as_leaf
+                keep = np.repeat(go, seg_count)
+                ids, wmin, wmax, side = ids[keep], wmin[keep], wmax[keep], side[keep]
+                seg_node, seg_start, seg_count, n_left = seg_node[go], seg_start[go], seg_count[go], n_left[go]
+                if not len(seg_node):
+                    break
+                offsets = np.cumsum(seg_count) - seg_count
+                seg_of = np.repeat(np.arange(len(seg_node)), seg_count)
+
+            # Устойчивое разбиение внутри сегмента: сначала левые, затем правые
+            left = side.astype(np.int64)
+            left_rank = np.cumsum(left) - left - np.repeat(np.cumsum(n_left) - n_left, seg_count)
+            local = np.arange(len(ids)) - np.repeat(offsets, seg_count)
+            new_local = np.repeat(offsets, seg_count) + np.where(side, left_rank, n_left[seg_of] + local - left_rank)
+            perm = np.empty_like(new_local)
+            perm[new_local] = np.arange(len(ids))
+            ids, wmin, wmax = ids[perm], wmin[perm], wmax[perm]
+            self.order[_ranges(seg_start, seg_count)] = ids
+
+            children = next_node + 2 * np.arange(len(seg_node))
+            next_node += 2 * len(seg_node)
+            self.first_child[seg_node] = children
+            self.start[children], self.count[children] = seg_start, n_left
+            self.start[children + 1], self.count[children + 1] = seg_start + n_left, seg_count - n_left
+
+            seg_node = np.stack([children, children + 1], axis=1).ravel()
+            seg_start = np.stack([seg_start, seg_start + n_left], axis=1).ravel()
+            seg_count = np.stack([n_left, seg_count - n_left], axis=1).ravel()
+
+        self.node_count = next_node
+        self._trim()
+
+    def _sah_split(self, wmin, wmax, c, cmin, cmax, seg_of, seg_count, node_area):
+        """Лучшее разбиение каждого сегмента по бинам центров.
+        Возвращает side (True - влево) для примитивов, число левых по сегментам
+        и маску сегментов, которые выгоднее оставить листьями."""
+        n_seg = len(seg_count)
+        # Мелким узлам хватает меньшего числа бинов
+        bins = self.bins if len(c) >= 64 * n_seg else max(4, self.bins // 2)
+        extent = np.maximum(cmax - cmin, 1e-30)
+        best_cost = np.full(n_seg, np.inf)
+        best_axis = np.zeros(n_seg, dtype=np.int64)
+        best_bin = np.zeros(n_seg, dtype=np.int64)
+        pmin = np.ascontiguousarray(wmin.T)
+        pmax = np.ascontiguousarray(wmax.T)
+        ct = np.ascontiguousarray(c.T)
+        scale = bins / extent
+
+        bin_of = []
+        for axis in range(3):
+            b = ((ct[axis] - cmin[:, axis][seg_of]) * scale[:, axis][seg_of]).astype(np.int64)
+            np.clip(b, 0, bins - 1, out=b)
+            bin_of.append(b)
+            key = seg_of * bins + b
+            counts = np.bincount(key, minlength=n_seg * bins).reshape(n_seg, bins)
+            # ufunc.at по одномерным массивам заметно быстрее, чем по строкам
+            bin_min = np.full((3, n_seg * bins), np.inf, dtype=np.float32)
+            bin_max = np.full((3, n_seg * bins), -np.inf, dtype=np.float32)
+            for k in range(3):
+                np.minimum.at(bin_min[k], key, pmin[k])
+                np.maximum.at(bin_max[k], key, pmax[k])
+            bin_min = bin_min.T.reshape(n_seg, bins, 3)
+            bin_max = bin_max.T.reshape(n_seg, bins, 3)
+
+            # Префиксы слева и суффиксы справа; разрез после бина s
+            left_n = np.cumsum(counts, axis=1)[:, :-1]
+            left_a = _box_area(np.minimum.accumulate(bin_min, axis=1), np.maximum.accumulate(bin_max, axis=1))[:, :-1]
+            right_n = np.cumsum(counts[:, ::-1], axis=1)[:, ::-1][:, 1:]
+            right_a = _box_area(np.minimum.accumulate(bin_min[:, ::-1], axis=1),
+                                np.maximum.accumulate(bin_max[:, ::-1], axis=1))[:, ::-1][:, 1:]
+            cost = left_n * left_a + right_n * right_a
+            cost[(left_n == 0) | (right_n == 0)] = np.inf
+            s = np.argmin(cost, axis=1)
+            axis_cost = cost[np.arange(n_seg), s]
+            better = axis_cost < best_cost
+            best_cost[better], best_axis[better], best_bin[better] = axis_cost[better], axis, s[better]
+
+        # SAH: лист дешевле, если count <= MAX_LEAF_SIZE и разбиение не окупается
+        split_cost = TRAVERSAL_COST + best_cost / np.maximum(node_area, 1e-30)
+        as_leaf = (seg_count <= MAX_LEAF_SIZE) & (split_cost >= seg_count)
+        median = ~np.isfinite(best_cost) & ~as_leaf  # все центры в одной точке
+
+        axis = best_axis[seg_of]
+        b = np.choose(axis, bin_of)
+        side = b <= best_bin[seg_of]
+        if median.any():
+            local = np.arange(len(c)) - np.repeat(np.cumsum(seg_count) - seg_count, seg_count)
+            side = np.where(median[seg_of], local < (seg_count // 2)[seg_of], side)
+        n_left = np.bincount(seg_of, weights=side, minlength=n_seg).astype(np.int64)
+        return side, n_left, as_leaf
+
+    def _trim(self):
+        n = self.node_count
+        for name in ("bmin", "bmax", "first_child", "start", "count"):
+            setattr(self, name, getattr(self, name)[:n])
+
+    # --- Обновление ---
+    def refit(self, bmin, bmax):
+        """Новые границы примитивов при той же топологии (движение без перестройки)."""
+        self.prim_min = np.ascontiguousarray(bmin, dtype=np.float32)
+        self.prim_max = np.ascontiguousarray(bmax, dtype=np.float32)
+        if len(self.order) == 0:
+            return
+        leaves = np.nonzero(self.first_child < 0)[0]
+        leaves = leaves[self.count[leaves] > 0]
+        leaves = leaves[np.argsort(self.start[leaves])]
+        sorted_min = self.prim_min[self.order]
+        sorted_max = self.prim_max[self.order]
+        self.bmin[leaves] = np.minimum.reduceat(sorted_min, self.start[leaves], axis=0)
+        self.bmax[leaves] = np.maximum.reduceat(sorted_max, self.start[leaves], axis=0)
+        for level in reversed(self.levels):
+            parents = level[self.first_child[level] >= 0]
+            c = self.first_child[parents]
+            self.bmin[parents] = np.minimum(self.bmin[c], self.bmin[c + 1])
+            self.bmax[parents] = np.maximum(self.bmax[c], self.bmax[c + 1])
+
+    @property
+    def depth(self):
+        return len(self.levels)
+
+    # --- Запросы ---
+    def _expand(self, items, nodes):
+        """Пары (элемент, узел) -> пары с детьми внутренних узлов и примитивами листьев."""
+        leaf = self.first_child[nodes] < 0
+        inner_items, inner = items[~leaf], nodes[~leaf]
+        child = self.first_child[inner]
+        next_items = np.repeat(inner_items, 2)
+        next_nodes = np.stack([child, child + 1], axis=1).ravel()
+        leaf_nodes = nodes[leaf]
+        cnt = self.count[leaf_nodes]
+        prim_items = np.repeat(items[leaf], cnt)
+        prims = self.order[_ranges(self.start[leaf_nodes], cnt)]
+        return next_items, next_nodes, prim_items, prims
+
+    def intersect_rays(self, origins, dirs, t_max=np.inf, intersect=None):
+        """Ближайшее пересечение для пакета лучей.
+
+        intersect(ray_ids, prim_ids, origins, dirs) -> t (inf - промах);
+        по умолчанию пересекаются сами AABB примитивов.
+        Возвращает (t, prim): t = inf и prim = -1 для промахов.
+        """
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+        dirs = np.asarray(dirs, dtype=np.float64).reshape(-1, 3)
+        n = len(origins)
+        with np.errstate(divide="ignore"):
+            inv = 1.0 / dirs
+        t_best = np.broadcast_to(np.asarray(t_max, dtype=np.float64), (n,)).copy()
+        hit = np.full(n, -1, dtype=np.int64)
+        if intersect is None:
+            intersect = self._intersect_boxes
+
+        rays = np.arange(n)
+        nodes = np.zeros(n, dtype=np.int64)
+        while len(rays):
+            t_near, t_far = _slab(origins[rays], inv[rays], self.bmin[nodes], self.bmax[nodes])
+            keep = (t_near <= t_far) & (t_near < t_best[rays])
+            rays, nodes, prim_rays, prims = self._expand(rays[keep], nodes[keep])
+            if len(prims):
+                t = intersect(prim_rays, prims, origins, dirs)
+                closer = t < t_best[prim_rays]
+                prim_rays, prims, t = prim_rays[closer], prims[closer], t[closer]
+                # Для каждого луча - минимальное t среди найденных
+                idx = np.lexsort((t, prim_rays))
+                first = np.unique(prim_rays[idx], return_index=True)[1]
+                sel = idx[first]
+                t_best[prim_rays[sel]] = t[sel]
+                hit[prim_rays[sel]] = prims[sel]
+        t_best[hit < 0] = np.inf
+        return t_best, hit
+
+    def _intersect_boxes(self, rays, prims, origins, dirs):
+        with np.errstate(divide="ignore"):
+            inv = 1.0 / dirs[rays]
+        t_near, t_far = _slab(origins[rays], inv, self.prim_min[prims], self.prim_max[prims])
+        return np.where(t_near <= t_far, t_near, np.inf)
+
+    def query_frustum(self, planes):
+        """Примитивы, чьи AABB пересекают выпуклую область планов (a, b, c, d):
+        внутри a*x + b*y + c*z + d >= 0. Возвращает индексы примитивов."""
+        planes = np.asarray(planes, dtype=np.float64).reshape(-1, 4)
+        normals, dist = planes[:, :3], planes[:, 3]
+        positive = normals >= 0
+        found = []
+        nodes = np.zeros(1, dtype=np.int64)
+        while len(nodes):
+            bmin, bmax = self.bmin[nodes].astype(np.float64), self.bmax[nodes].astype(np.float64)
+            # Самая "внутренняя" и самая "внешняя" вершины AABB для каждого плана
+            p_vert = np.where(positive[None], bmax[:, None], bmin[:, None])
+            n_vert = np.where(positive[None], bmin[:, None], bmax[:, None])
+            outside = ((p_vert * normals).sum(-1) + dist < 0).any(axis=1)
+            inside = ((n_vert * normals).sum(-1) + dist >= 0).all(axis=1)
+            full = nodes[inside & ~outside]
+            found.append(self.order[_ranges(self.start[full], self.count[full])])
+            partial = nodes[~inside & ~outside]
+            leaf = self.first_child[partial] < 0
+            leaves = partial[leaf]
+            prims = self.order[_ranges(self.start[leaves], self.count[leaves])]
+            if len(prims):
+                p_vert = np.where(positive[None], self.prim_max[prims, None], self.prim_min[prims, None])
+                found.append(prims[~(((p_vert * normals).sum(-1) + dist) < 0).any(axis=1)])
+            child = self.first_child[partial[~leaf]]
+            nodes = np.stack([child, child + 1], axis=1).ravel()
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+    def query_boxes(self, qmin, qmax):
+        """Пары (запрос, примитив) с пересекающимися AABB для пакета запросов."""
+        qmin = np.asarray(qmin, dtype=np.float32).reshape(-1, 3)
+        qmax = np.asarray(qmax, dtype=np.float32).reshape(-1, 3)
+        items = np.arange(len(qmin))
+        nodes = np.zeros(len(qmin), dtype=np.int64)
+        out_q, out_p = [], []
+        while len(items):
+            overlap = ((qmin[items] <= self.bmax[nodes]) & (qmax[items] >= self.bmin[nodes])).all(axis=1)
+            items, nodes, prim_items, prims = self._expand(items[overlap], nodes[overlap])
+            if len(prims):
+                hit = ((qmin[prim_items] <= self.prim_max[prims]) & (qmax[prim_items] >= self.prim_min[prims])).all(axis=1)
+                out_q.append(prim_items[hit])
+                out_p.append(prims[hit])
+        if not out_q:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(out_q), np.concatenate(out_p)
+
+
+def _slab(origins, inv_dirs, bmin, bmax):
+    """Отрезок [t_near, t_far] пересечения лучей с AABB (t >= 0)."""
+    with np.errstate(invalid="ignore"):
+        t0 = (bmin - origins) * inv_dirs
+        t1 = (bmax - origins) * inv_dirs
+    # 0 * inf (луч в плоскости грани) даёт nan - такой луч не ограничивает ось
+    t_lo = np.where(np.isnan(t0), -np.inf, np.minimum(t0, t1))
+    t_hi = np.where(np.isnan(t1), np.inf, np.maximum(t0, t1))
+    return np.maximum(t_lo.max(axis=1), 0.0), t_hi.min(axis=1)
+
+
+class TriangleBVH(BVH):
+    """BVH над треугольниками меша; лучи пересекаются с самими треугольниками."""
+    def __init__(self, vertices, indices, **kwargs):
+        self.positions = np.ascontiguousarray(np.asarray(vertices)[:, :3], dtype=np.float64)
+        self.triangles = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+        corners = self.positions[self.triangles]
+        super().__init__(corners.min(axis=1), corners.max(axis=1), **kwargs)
+
+    def update_positions(self, vertices):
+        """Деформация без изменения топологии: новые позиции + refit."""
+        self.positions = np.ascontiguousarray(np.asarray(vertices)[:, :3], dtype=np.float64)
+        corners = self.positions[self.triangles]
+        self.refit(corners.min(axis=1), corners.max(axis=1))
+
+    def intersect_rays(self, origins, dirs, t_max=np.inf, intersect=None):
+        return super().intersect_rays(origins, dirs, t_max, intersect or self._intersect_triangles)
+
+    def _intersect_triangles(self, rays, prims, origins, dirs):
+        # Möller-Trumbore для пар (луч, треугольник), обе стороны
+        tri = self.positions[self.triangles[prims]]
+        o, d = origins[rays], dirs[rays]
+        e1 = tri[:, 1] - tri[:, 0]
+        e2 = tri[:, 2] - tri[:, 0]
+        p = np.cross(d, e2)
+        det = np.einsum("ij,ij->i", e1, p)
+        ok = np.abs(det) > 1e-12
+        inv_det = np.where(ok, 1.0 / np.where(ok, det, 1.0), 0.0)
+        s = o - tri[:, 0]
+        u = np.einsum("ij,ij->i", s, p) * inv_det
+        q = np.cross(s, e1)
+        v = np.einsum("ij,ij->i", d, q) * inv_det
+        t = np.einsum("ij,ij->i", e2, q) * inv_det
+        hit = ok & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+        return np.where(hit, t, np.inf)
+
+
+def frustum_planes(matrix):
+    """Шесть планов усечённой пирамиды из матрицы проекция * вид
+    (строки - как в математике: clip = M @ p). Нормали смотрят внутрь."""
+    m = np.asarray(matrix, dtype=np.float64)
+    planes = np.array([m[3] + m[0], m[3] - m[0], m[3] + m[1], m[3] - m[1], m[3] + m[2], m[3] - m[2]])
+    return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
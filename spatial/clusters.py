@@ -0,0 +1,110 @@
+# File: clusters.py
+# Кластерное распределение точечных источников света (clustered shading,
+# Olsson et al. 2012). Пирамида камеры делится на тайлы экрана tiles_x x tiles_y
+# и slices слоёв по глубине с экспоненциальным шагом (ближние слои тоньше);
+# каждый кластер получает список источников, сферы которых его задевают.
+#   1) по сфере источника - диапазон слоёв и тайлов (AABB сферы в проекции);
+#   2) пары (источник, кластер) разворачиваются без циклов и проверяются
+#      точно: сфера против AABB кластера в пространстве вида;
+#   3) устойчивая сортировка по кластеру -> (смещение, число) на кластер и
+#      общий список индексов - то, что читает фрагментный шейдер.
+import numpy as np
+
+
+class ClusterGrid:
+    def __init__(self, tiles_x=16, tiles_y=9, slices=24, near=50.0, far=5000.0):
+        self.dims = (tiles_x, tiles_y, slices)
+        self.near, self.far = near, far
+        # Слой фрагмента на глубине d: floor(log(d) * scale - bias)
+        self.depth_scale = slices / np.log(far / near)
+        self.depth_bias = np.log(near) * self.depth_scale
+        self.width = self.height = 0
+        self.proj = None
+        self.boxes = None
+
+    @property
+    def count(self):
+        return int(np.prod(self.dims))
+
+    def tile_size(self):
+        """Размер тайла в пикселях (как его считает шейдер по gl_FragCoord)."""
+        return self.width / self.dims[0], self.height / self.dims[1]
+
+    def slice_of(self, depth):
+        s = np.floor(np.log(np.maximum(depth, 1e-6)) * self.depth_scale - self.depth_bias)
+        return np.clip(s, 0, self.dims[2] - 1).astype(np.int64)
+
+    def configure(self, proj, width, height):
+        """AABB кластеров в пространстве вида для симметричной перспективы proj
+        (строки - как в математике). Пересчёт только при смене проекции или окна."""
+        proj = np.asarray(proj, dtype=np.float64)
+        if self.proj is not None and (width, height) == (self.width, self.height) and np.array_equal(proj, self.proj):
+            return
+        self.proj, self.width, self.height = proj, width, height
+        nx, ny, nz = self.dims
+        edges = self.near * (self.far / self.near) ** (np.arange(nz + 1) / nz)
+        edges[0] = 0.0
+        x_ndc = np.linspace(-1.0, 1.0, nx + 1) / proj[0, 0]
+        y_ndc = np.linspace(-1.0, 1.0, ny + 1) / proj[1, 1]
+        z0, z1 = edges[:-1][:, None, None], edges[1:][:, None, None]
+        xa, xb = x_ndc[:-1][None, None, :], x_ndc[1:][None, None, :]
+        ya, yb = y_ndc[:-1][None, :, None], y_ndc[1:][None, :, None]
+        # Тайл расширяется с глубиной: крайние значения - на ближней или дальней грани
+        lo = np.stack(np.broadcast_arrays(np.minimum(xa * z0, xa * z1), np.minimum(ya * z0, ya * z1), -z1), axis=-1)
+        hi = np.stack(np.broadcast_arrays(np.maximum(xb * z0, xb * z1), np.maximum(yb * z0, yb * z1), -z0), axis=-1)
+        self.boxes = np.stack([lo.reshape(-1, 3), hi.reshape(-1, 3)], axis=1)   # (кластер, min/max, xyz)
+
+    def light_ranges(self, centers, radii):
+        """Диапазоны [начало, конец) тайлов и слоёв для сфер в пространстве вида."""
+        nx, ny, nz = self.dims
+        depth = -centers[:, 2]
+        visible = (depth + radii > 0.0) & (depth - radii < self.far)
+        z0, z1 = self.slice_of(depth - radii), self.slice_of(depth + radii) + 1
+
+        # Экранные границы по углам AABB сферы; если сфера задевает плоскость
+        # камеры, проекция вырождается - берётся весь экран
+        corner = np.array([[i & 1, (i >> 1) & 1, (i >> 2) & 1] for i in range(8)]) * 2.0 - 1.0
+        pts = centers[:, None, :] + corner[None] * radii[:, None, None]
+        w = np.maximum(-pts[..., 2], 1e-6)
+        sx = pts[..., 0] * self.proj[0, 0] / w
+        sy = pts[..., 1] * self.proj[1, 1] / w
+        behind = depth - radii <= 1e-3
+        sx_lo = np.where(behind, -1.0, sx.min(axis=1))
+        sx_hi = np.where(behind, 1.0, sx.max(axis=1))
+        sy_lo = np.where(behind, -1.0, sy.min(axis=1))
+        sy_hi = np.where(behind, 1.0, sy.max(axis=1))
+        x0 = np.clip(np.floor((sx_lo * 0.5 + 0.5) * nx), 0, nx).astype(np.int64)
+        x1 = np.clip(np.floor((sx_hi * 0.5 + 0.5) * nx) + 1, 0, nx).astype(np.int64)
+        y0 = np.clip(np.floor((sy_lo * 0.5 + 0.5) * ny), 0, ny).astype(np.int64)
+        y1 = np.clip(np.floor((sy_hi * 0.5 + 0.5) * ny) + 1, 0, ny).astype(np.int64)
+        empty = ~visible | (x1 <= x0) | (y1 <= y0)
+        return x0, x1, y0, y1, z0, np.where(empty, z0, z1)
+
+    def assign(self, centers, radii):
+        """centers (N, 3) в пространстве вида, radii (N,).
+        Возвращает (clusters (C, 2) uint32 - смещение и число, indices uint32)."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        radii = np.asarray(radii, dtype=np.float64).reshape(-1)
+        nx, ny, nz = self.dims
+        x0, x1, y0, y1, z0, z1 = self.light_ranges(centers, radii)
+        sx, sy, sz = x1 - x0, y1 - y0, z1 - z0
+        counts = sx * sy * sz
+        light = np.repeat(np.arange(len(radii)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        lx, rest = local % sx[light], local // sx[light]
+        ly, lz = rest % sy[light], rest // sy[light]
+        cluster = ((z0[light] + lz) * ny + y0[light] + ly) * nx + x0[light] + lx
+
+        # Точная проверка: расстояние от центра сферы до AABB кластера
+        box = self.boxes[cluster]
+        c = centers[light]
+        d = c - np.clip(c, box[:, 0], box[:, 1])
+        keep = np.einsum("ij,ij->i", d, d) <= radii[light] ** 2
+        light, cluster = light[keep], cluster[keep]
+
+        order = np.argsort(cluster, kind="stable")
+        per_cluster = np.bincount(cluster, minlength=self.count)
+        clusters = np.empty((self.count, 2), dtype=np.uint32)
+        clusters[:, 1] = per_cluster
+        clusters[:, 0] = np.cumsum(per_cluster) - per_cluster
+        return clusters, light[order].astype(np.uint32)
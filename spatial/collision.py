@@ -0,0 +1,245 @@
+# File: collision.py
+# Столкновения пакета точек (частиц) с плоскостями и статическими мешами.
+#
+# Плоскости проверяются аналитически. Для меша заранее строится сетка
+# знакового расстояния (SDF) в узкой полосе у поверхности: точные расстояния
+# до треугольников (кандидаты - из BVH), знак - по чётности пересечений луча
+# вдоль +x. Запрос - трилинейная интерполяция расстояния и его градиента,
+# отклик - вынос точки на поверхность и отражение скорости по нормали.
+import numpy as np
+
+from spatial.bvh import TriangleBVH
+
+SURFACE_MARGIN = 0.01   # на сколько точка выносится за поверхность
+WELD_FRACTION = 1e-4    # допуск склейки вершин при проверке замкнутости, доля ячейки
+
+
+def reflect(vel, normals, restitution, friction=0.0):
+    """Отражение нормальной составляющей скорости (только при движении внутрь)."""
+    vn = np.einsum("ij,ij->i", vel, normals)
+    approaching = vn < 0.0
+    vn = np.where(approaching, vn, 0.0)
+    tangent = vel - vn[:, None] * normals
+    return np.where(approaching[:, None], tangent * (1.0 - friction) - restitution * vn[:, None] * normals, vel)
+
+
+class PlaneColliders:
+    """Набор плоскостей n . p + d >= 0 (разрешённая сторона) - быстрый путь."""
+    def __init__(self, planes, restitution=0.8, friction=0.0):
+        planes = np.asarray(planes, dtype=np.float64).reshape(-1, 4)
+        length = np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+        self.planes = planes / length
+        self.restitution = restitution
+        self.friction = friction
+
+    def collide(self, pos, vel, radius=0.0):
+        """Исправляет pos и vel на месте; возвращает маску столкнувшихся точек."""
+        hit_any = np.zeros(len(pos), dtype=bool)
+        for n, d in zip(self.planes[:, :3], self.planes[:, 3]):
+            s = pos @ n + d - radius
+            hit = s <= 0.0
+            if not hit.any():
+                continue
+            pos[hit] += np.outer(SURFACE_MARGIN - s[hit], n)
+            vel[hit] = reflect(vel[hit], np.broadcast_to(n, (int(hit.sum()), 3)), self.restitution, self.friction)
+            hit_any |= hit
+        return hit_any
+
+
+def closest_points_on_triangles(p, a, b, c):
+    """Ближайшие точки треугольников (a, b, c) к точкам p - по областям
+    Вороного (Ericson, "Real-Time Collision Detection", 5.1.5), пакетно."""
+    ab, ac, ap = b - a, c - a, p - a
+    d1 = np.einsum("ij,ij->i", ab, ap)
+    d2 = np.einsum("ij,ij->i", ac, ap)
+    bp = p - b
+    d3 = np.einsum("ij,ij->i", ab, bp)
+    d4 = np.einsum("ij,ij->i", ac, bp)
+    cp = p - c
+    d5 = np.einsum("ij,ij->i", ab, cp)
+    d6 = np.einsum("ij,ij->i", ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denom = 1.0 / (va + vb + vc)
+        result = a + ab * (vb * denom)[:, None] + ac * (vc * denom)[:, None]          # внутри
+        t_bc = (d4 - d3) / ((d4 - d3) + (d5 - d6))
+        t_ac = d2 / (d2 - d6)
+        t_ab = d1 / (d1 - d3)
+    regions = [
+        (d1 <= 0) & (d2 <= 0), a,                                                       # вершина a
+        (d3 >= 0) & (d4 <= d3), b,                                                      # вершина b
+        (d6 >= 0) & (d5 <= d6), c,                                                      # вершина c
+        (vc <= 0) & (d1 >= 0) & (d3 <= 0), a + ab * t_ab[:, None],                      # ребро ab
+        (vb <= 0) & (d2 >= 0) & (d6 <= 0), a + ac * t_ac[:, None],                      # ребро ac
+        (va <= 0) & ((d4 - d3) >= 0) & ((d5 - d6) >= 0), b + (c - b) * t_bc[:, None],   # ребро bc
+    ]
+    # Проверяем в обратном порядке, чтобы вершины имели приоритет над рёбрами
+    for i in range(len(regions) - 2, -1, -2):
+        result = np.where(regions[i][:, None], regions[i + 1], result)
+    return result
+
+
+def is_closed(positions, triangles, tolerance=0.0):
+    """Каждое ребро (по склеенным позициям) принадлежит ровно двум треугольникам.
+    tolerance > 0 - позиции склеиваются по сетке с этим шагом: на швах тора и
+    в полюсах сферы (geometry/primitives.py) совпадающие вершины расходятся на
+    ошибку округления sin/cos."""
+    if tolerance > 0:
+        positions = np.round(np.asarray(positions) / tolerance).astype(np.int64)
+    _, pid = np.unique(positions, axis=0, return_inverse=True)
+    tri = pid.ravel()[triangles]
+    edges = np.sort(np.concatenate([tri[:, [0, 1]], tri[:, [1, 2]], tri[:, [2, 0]]]), axis=1)
+    _, counts = np.unique(edges, axis=0, return_counts=True)
+    return bool(len(counts)) and bool((counts == 2).all())
+
+
+class SDFGrid:
+    """Сетка знакового расстояния меша в узкой полосе (band ячеек) у поверхности.
+    Дальше полосы значение ограничено +-band * cell. Для незамкнутых мешей
+    расстояние беззнаковое (тонкая оболочка)."""
+    def __init__(self, vertices, indices, resolution=48, band=3):
+        positions = np.asarray(vertices, dtype=np.float64)[:, :3]
+        triangles = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+        lo, hi = positions.min(axis=0), positions.max(axis=0)
+        self.cell = float((hi - lo).max()) / resolution
+        pad = (band + 1) * self.cell
+        self.origin = lo - pad
+        self.dims = np.ceil((hi - lo + 2 * pad) / self.cell).astype(np.int64) + 1
+        self.band = band * self.cell
+        self.closed = is_closed(positions, triangles, WELD_FRACTION * self.cell)
+
+        axes = [self.origin[k] + np.arange(self.dims[k]) * self.cell for k in range(3)]
+        points = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+        dist = self._unsigned_distance(positions, triangles, points)
+        if self.closed:
+            dist = np.where(self._inside(positions, triangles, axes), -dist, dist)
+        self.distance = dist.reshape(*self.dims).astype(np.float32)
+        self.gradient = np.stack(np.gradient(self.distance, self.cell), axis=-1).astype(np.float32)
+        self.bounds = (self.origin, self.origin + (self.dims - 1) * self.cell)
+
+    def _unsigned_distance(self, positions, triangles, points, chunk=16384):
+        bvh = TriangleBVH(positions, triangles)
+        dist = np.full(len(points), self.band)
+        for start in range(0, len(points), chunk):
+            p = points[start:start + chunk]
+            q, t = bvh.query_boxes(p - self.band, p + self.band)
+            tri = positions[triangles[t]]
+            closest = closest_points_on_triangles(p[q], tri[:, 0], tri[:, 1], tri[:, 2])
+            d = np.linalg.norm(p[q] - closest, axis=1)
+            np.fmin.at(dist, start + q, d)  # fmin: вырожденные треугольники дают nan
+        return dist
+
+    def _inside(self, positions, triangles, axes):
+        """Чётность пересечений луча вдоль +x для каждой строки сетки (y, z)."""
+        ny, nz = self.dims[1], self.dims[2]
+        # Сдвиг строк на долю ячейки - луч не попадает точно в рёбра
+        ys = axes[1] + self.cell * 1.234567e-4
+        zs = axes[2] + self.cell * 2.345678e-4
+        tri = positions[triangles]
+        j0 = np.clip(np.ceil((tri[:, :, 1].min(1) - ys[0]) / self.cell), 0, ny).astype(np.int64)
+        j1 = np.clip(np.floor((tri[:, :, 1].max(1) - ys[0]) / self.cell) + 1, 0, ny).astype(np.int64)
+        k0 = np.clip(np.ceil((tri[:, :, 2].min(1) - zs[0]) / self.cell), 0, nz).astype(np.int64)
+        k1 = np.clip(np.floor((tri[:, :, 2].max(1) - zs[0]) / self.cell) + 1, 0, nz).astype(np.int64)
+        nj, nk = np.maximum(j1 - j0, 0), np.maximum(k1 - k0, 0)
+        counts = nj * nk
+        t = np.repeat(np.arange(len(tri)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        j = j0[t] + local // np.maximum(nk[t], 1)
+        k = k0[t] + local % np.maximum(nk[t], 1)
+
+        # Барицентрические координаты точки строки в проекции треугольника на (y, z)
+        a, b, c = tri[t, 0], tri[t, 1], tri[t, 2]
+        py, pz = ys[j], zs[k]
+        det = (b[:, 1] - a[:, 1]) * (c[:, 2] - a[:, 2]) - (c[:, 1] - a[:, 1]) * (b[:, 2] - a[:, 2])
+        ok = np.abs(det) > 1e-18
+        det = np.where(ok, det, 1.0)
+        u = ((py - a[:, 1]) * (c[:, 2] - a[:, 2]) - (c[:, 1] - a[:, 1]) * (pz - a[:, 2])) / det
+        v = ((b[:, 1] - a[:, 1]) * (pz - a[:, 2]) - (py - a[:, 1]) * (b[:, 2] - a[:, 2])) / det
+        hit = ok & (u >= 0) & (v >= 0) & (u + v <= 1)
+        x = a[hit, 0] + u[hit] * (b[hit, 0] - a[hit, 0]) + v[hit] * (c[hit, 0] - a[hit, 0])
+        row = j[hit] * nz + k[hit]
+
+        # Для каждого узла - число пересечений левее него в той же строке
+        nx = self.dims[0]
+        keys = np.sort(row * (nx + 1.0) + (x - self.origin[0]) / self.cell)
+        ii, jj, kk = np.meshgrid(np.arange(nx), np.arange(ny), np.arange(nz), indexing="ij")
+        node_row = (jj * nz + kk).ravel()
+        before = np.searchsorted(keys, node_row * (nx + 1.0) + ii.ravel())
+        row_start = np.searchsorted(keys, node_row * (nx + 1.0) - 0.5)
+        return (before - row_start) % 2 == 1
+
+    def sample(self, points):
+        """Трилинейная интерполяция: (расстояние, градиент). Вне сетки - band и 0."""
+        g = (np.asarray(points, dtype=np.float64) - self.origin) / self.cell
+        inside = ((g >= 0) & (g < self.dims - 1)).all(axis=1)
+        i0 = np.clip(np.floor(g).astype(np.int64), 0, self.dims - 2)
+        f = np.clip(g - i0, 0.0, 1.0)
+        dist = np.zeros(len(g))
+        grad = np.zeros((len(g), 3))
+        for corner in range(8):
+            o = np.array([corner & 1, (corner >> 1) & 1, (corner >> 2) & 1])
+            w = np.prod(np.where(o == 1, f, 1.0 - f), axis=1)
+            idx = i0 + o
+            dist += w * self.distance[idx[:, 0], idx[:, 1], idx[:, 2]]
+            grad += w[:, None] * self.gradient[idx[:, 0], idx[:, 1], idx[:, 2]]
+        dist = np.where(inside, dist, self.band)
+        grad[~inside] = 0.0
+        return dist, grad
+
+
+class MeshCollider:
+    """Статический меш с матрицей модели (поворот, перенос, равномерный масштаб)."""
+    def __init__(self, sdf, model=None, restitution=0.6, friction=0.1):
+        self.sdf = sdf
+        self.model = np.eye(4) if model is None else np.asarray(model, dtype=np.float64)
+        self.inverse = np.linalg.inv(self.model)
+        self.scale = float(np.cbrt(abs(np.linalg.det(self.model[:3, :3]))))
+        self.restitution = restitution
+        self.friction = friction
+        # Мировой AABB сетки - грубый отбор частиц
+        lo, hi = sdf.bounds
+        corner = np.array([[i & 1, (i >> 1) & 1, (i >> 2) & 1] for i in range(8)])
+        corners = np.where(corner == 0, lo, hi) @ self.model[:3, :3].T + self.model[:3, 3]
+        self.world_min, self.world_max = corners.min(axis=0), corners.max(axis=0)
+
+    def collide(self, pos, vel, radius=0.0):
+        near = np.flatnonzero(((pos >= self.world_min) & (pos <= self.world_max)).all(axis=1))
+        if not len(near):
+            return near
+        p = pos[near]
+        local = p @ self.inverse[:3, :3].T + self.inverse[:3, 3]
+        dist, grad = self.sdf.sample(local)
+        dist = dist * self.scale
+        if not self.sdf.closed:
+            # Незамкнутый меш - оболочка толщиной radius с обеих сторон
+            radius = max(radius, self.sdf.cell * self.scale * 0.5)
+        hit = dist < radius
+        if not hit.any():
+            return near[:0]
+        normal = grad[hit] @ self.model[:3, :3].T
+        length = np.linalg.norm(normal, axis=1, keepdims=True)
+        normal = np.divide(normal, length, out=np.zeros_like(normal), where=length > 1e-12)
+        idx = near[hit]
+        pos[idx] = p[hit] + normal * (radius - dist[hit] + SURFACE_MARGIN)[:, None]
+        vel[idx] = reflect(vel[idx], normal, self.restitution, self.friction)
+        return idx
+
+
+class CollisionWorld:
+    """Плоскости + меши; collide() обрабатывает весь пакет частиц."""
+    def __init__(self, planes=None, meshes=(), radius=0.0):
+        self.planes = planes
+        self.meshes = list(meshes)
+        self.radius = radius
+
+    def collide(self, pos, vel, mask=None):
+        idx = np.flatnonzero(mask) if mask is not None else slice(None)
+        p, v = pos[idx], vel[idx]
+        for mesh in self.meshes:
+            mesh.collide(p, v, self.radius)
+        if self.planes is not None:
+            self.planes.collide(p, v, self.radius)
+        pos[idx], vel[idx] = p, v
@@ -0,0 +1,43 @@
+# File: depth_sort.py
+# Порядок отрисовки полупрозрачных объектов от дальних к ближним.
+#   full        - np.argsort глубин каждый кадр;
+#   incremental - глубины берутся в порядке прошлого кадра и досортировываются
+#                 устойчивой сортировкой (timsort): при плавном движении камеры
+#                 массив почти упорядочен и сортировка близка к линейной;
+#   radix       - глубина квантуется в 16 бит, устойчивая сортировка uint16 в
+#                 NumPy - поразрядная (LSD radix), O(N).
+import numpy as np
+
+SORT_MODES = ("full", "incremental", "radix")
+
+
+def view_depth(points, view):
+    """Расстояние вдоль взгляда (больше - дальше) для матрицы вида 4x4
+    (строки - как в математике; камера смотрит вдоль -z)."""
+    view = np.asarray(view, dtype=np.float64)
+    return -(points @ view[2, :3] + view[2, 3])
+
+
+class DepthSorter:
+    def __init__(self, mode="incremental"):
+        if mode not in SORT_MODES:
+            raise ValueError(f"unknown sort mode '{mode}'")
+        self.mode = mode
+        self.order = np.zeros(0, dtype=np.intp)
+
+    def sort(self, depth):
+        """Индексы от дальних к ближним. Число элементов может меняться
+        между кадрами - тогда порядок строится заново."""
+        keys = -np.asarray(depth)
+        if not len(keys):
+            self.order = np.zeros(0, dtype=np.intp)
+        elif self.mode == "radix":
+            # Диапазон - по самим ключам: все 16 бит уходят на разброс глубин
+            lo, hi = keys.min(), keys.max()
+            scale = 65535.0 / (hi - lo) if hi > lo else 0.0
+            self.order = np.argsort(((keys - lo) * scale).astype(np.uint16), kind="stable")
+        elif self.mode == "incremental" and len(self.order) == len(keys):
+            self.order = self.order[np.argsort(keys[self.order], kind="stable")]
+        else:
+            self.order = np.argsort(keys, kind="stable")
+        return self.order
@@ -0,0 +1,101 @@
+# File: hash.py
+# Пространственный хэш для поиска соседей среди частиц.
+# Частицы раскладываются по ячейкам со стороной cell_size. Целые координаты
+# ячейки упаковываются в один int64 (по CELL_BITS бит на ось), ключ - его
+# мультипликативный хэш по модулю размера таблицы. Сортировка по ключу
+# (np.argsort) даёт для каждого ключа непрерывный отрезок [cell_start,
+# cell_end). Соседи ищутся только в 27 ячейках вокруг частицы, поэтому при
+# ограниченной плотности поиск линеен по числу частиц.
+import numpy as np
+
+from spatial.bvh import _ranges
+
+CELL_BITS = 21
+CELL_BIAS = 1 << (CELL_BITS - 1)     # координаты ячеек в [-2^20, 2^20)
+HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+# Половина окрестности 3x3x3: каждая пара соседних ячеек встречается ровно
+# один раз (вторая половина - те же пары в обратном порядке)
+HALF_STENCIL = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                if (dx, dy, dz) > (0, 0, 0)]
+
+
+def pack_cells(cells):
+    """Целые координаты ячеек (N, 3) -> int64; сдвиг на соседа - сложение."""
+    c = cells + CELL_BIAS
+    return (c[:, 0] << (2 * CELL_BITS)) | (c[:, 1] << CELL_BITS) | c[:, 2]
+
+
+def _offset_id(dx, dy, dz):
+    return (dx << (2 * CELL_BITS)) + (dy << CELL_BITS) + dz
+
+
+class SpatialHash:
+    """Хэш-сетка, перестраиваемая каждый шаг: build(pos), затем pairs(radius).
+    Внутри всё хранится в отсортированном по ключу порядке (order), чтобы
+    частицы одной ячейки лежали в памяти подряд."""
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.bits = 4
+        self.order = np.zeros(0, dtype=np.int64)
+
+    def keys(self, cell_ids):
+        h = cell_ids.astype(np.uint64) * HASH_MULTIPLIER
+        return (h >> np.uint64(64 - self.bits)).astype(np.int64)
+
+    def build(self, pos):
+        # Таблица - степень двойки не меньше 2N: мало коллизий
+        self.bits = max(int(2 * len(pos) - 1).bit_length(), 4)
+        cell_ids = pack_cells(np.floor(pos / self.cell_size).astype(np.int64))
+        keys = self.keys(cell_ids)
+        self.order = np.argsort(keys, kind="stable")
+        self.cell_ids = cell_ids[self.order]
+        counts = np.bincount(keys, minlength=1 << self.bits)
+        self.cell_end = np.cumsum(counts)
+        self.cell_start = self.cell_end - counts
+        return self
+
+    def _candidates(self, offset):
+        """Пары (i, j) в отсортированном порядке: j лежит в ячейке i + offset."""
+        target = self.cell_ids + _offset_id(*offset)
+        key = self.keys(target)
+        start = self.cell_start[key]
+        count = self.cell_end[key] - start
+        j = _ranges(start, count)
+        i = np.repeat(np.arange(len(target)), count)
+        # Коллизии хэша: оставляем только частицы именно из нужной ячейки
+        same = self.cell_ids[j] == np.repeat(target, count)
+        return i[same], j[same]
+
+    def pairs(self, pos, radius):
+        """Пары соседей (i, j), i != j, |pos[i] - pos[j]| < radius, каждая один раз.
+        radius не больше cell_size. Возвращает (i, j, delta = pos[i] - pos[j], dist)."""
+        if radius > self.cell_size:
+            raise ValueError("radius must not exceed cell_size")
+        # Своя ячейка: пары i < j
+        i, j = self._candidates((0, 0, 0))
+        keep = i < j
+        found_i, found_j = [i[keep]], [j[keep]]
+        for offset in HALF_STENCIL:
+            i, j = self._candidates(offset)
+            found_i.append(i)
+            found_j.append(j)
+        i, j = np.concatenate(found_i), np.concatenate(found_j)
+        sorted_pos = pos[self.order]
+        delta = sorted_pos[i] - sorted_pos[j]
+        dist = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+        close = dist < radius
+        return self.order[i[close]], self.order[j[close]], delta[close], dist[close]
+
+
+def separation(pos, grid, radius, stiffness):
+    """Мягкое отталкивание соседей: сила stiffness * (1 - d / radius) вдоль
+    линии центров, равная и противоположная для пары. Возвращает (N, 3)."""
+    i, j, delta, dist = grid.pairs(pos, radius)
+    magnitude = stiffness * (1.0 - dist / radius) / np.maximum(dist, 1e-9)
+    f = delta * magnitude[:, None]
+    n = len(pos)
+    force = np.empty((n, 3))
+    for k in range(3):
+        force[:, k] = np.bincount(i, f[:, k], minlength=n) - np.bincount(j, f[:, k], minlength=n)
+    return force
@@ -0,0 +1,127 @@
+# File: scene_graph.py
+# Иерархия преобразований: узлы с родителем, локальной и мировой матрицей.
+# Все матрицы - в непрерывных массивах (N, 4, 4), строки - как в математике;
+# мировая матрица узла = мировая родителя @ локальная.
+#   1) set_local помечает узлы "грязными";
+#   2) update() идёт по уровням глубины: флаг родителя переходит на детей,
+#      и мировые матрицы всех грязных узлов уровня считаются одним einsum;
+#   3) результат кэшируется (world и его float32-копия world32 для uniform)
+#      и читается всеми проходами кадра - пересчёт только у сдвинутых поддеревьев.
+# Родитель всегда добавляется раньше ребёнка - так уровни задают порядок.
+import numpy as np
+
+
+class SceneGraph:
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.parent = np.full(capacity, -1, dtype=np.int64)
+        self.depth = np.zeros(capacity, dtype=np.int64)
+        self.local = np.tile(np.eye(4), (capacity, 1, 1))
+        self.world = np.tile(np.eye(4), (capacity, 1, 1))
+        self.world32 = np.tile(np.eye(4, dtype=np.float32), (capacity, 1, 1))
+        self.dirty = np.zeros(capacity, dtype=bool)
+        self._levels = None
+
+    def __len__(self):
+        return self.count
+
+    def _reserve(self, count):
+        capacity = len(self.parent)
+        if count <= capacity:
+            return
+        grow = max(count, capacity * 2) - capacity
+        self.parent = np.concatenate([self.parent, np.full(grow, -1, dtype=np.int64)])
+        self.depth = np.concatenate([self.depth, np.zeros(grow, dtype=np.int64)])
+        self.local = np.concatenate([self.local, np.tile(np.eye(4), (grow, 1, 1))])
+        self.world = np.concatenate([self.world, np.tile(np.eye(4), (grow, 1, 1))])
+        self.world32 = np.concatenate([self.world32, np.tile(np.eye(4, dtype=np.float32), (grow, 1, 1))])
+        self.dirty = np.concatenate([self.dirty, np.zeros(grow, dtype=bool)])
+
+    def add(self, parent=-1, local=None):
+        """Один узел; возвращает его номер."""
+        return int(self.add_many([parent], None if local is None else np.asarray(local)[None])[0])
+
+    def add_many(self, parents, locals_=None):
+        """Узлы пачкой: parents (M,) - номера уже добавленных узлов, узлов этой же
+        пачки с меньшим номером или -1; locals_ (M, 4, 4). Возвращает номера."""
+        parents = np.asarray(parents, dtype=np.int64).reshape(-1)
+        first, m = self.count, len(parents)
+        ids = np.arange(first, first + m)
+        if np.any(parents >= ids):
+            raise ValueError("a parent must be added before its children")
+        self._reserve(first + m)
+        self.parent[ids] = parents
+        if locals_ is not None:
+            self.local[ids] = locals_
+        # Глубина: уровень за уровнем, пока ссылки внутри пачки не разрешатся
+        depth = np.zeros(m, dtype=np.int64)
+        has_parent = parents >= 0
+        for _ in range(m + 1):
+            parent_depth = np.where(has_parent, self.depth[np.maximum(parents, 0)] + 1, 0)
+            if np.array_equal(parent_depth, depth):
+                break
+            depth = parent_depth
+            self.depth[ids] = depth
+        self.dirty[ids] = True
+        self.count += m
+        self._levels = None
+        return ids
+
+    def add_world(self, parents, world):
+        """Узлы с уже известными мировыми матрицами (например, порция экземпляров
+        из файла сцены): локальные выводятся как inv(мировая родителя) @ мировая,
+        пересчёта нет. Родители - из этой или прошлых порций. Возвращает номера."""
+        world = np.asarray(world, dtype=np.float64)
+        ids = self.add_many(parents)
+        self.world[ids] = world
+        self.world32[ids] = world
+        parents = self.parent[ids]
+        child = parents >= 0
+        self.local[ids] = world
+        self.local[ids[child]] = np.linalg.inv(self.world[parents[child]]) @ world[child]
+        self.dirty[ids] = False
+        return ids
+
+    @classmethod
+    def from_world(cls, parents, world):
+        """Граф из одной пачки add_world."""
+        graph = cls(max(len(world), 1))
+        graph.add_world(parents, world)
+        return graph
+
+    @property
+    def levels(self):
+        """Номера узлов по уровням глубины (пересчёт при изменении иерархии)."""
+        if self._levels is None:
+            depth = self.depth[:self.count]
+            order = np.argsort(depth, kind="stable")
+            bounds = np.searchsorted(depth[order], np.arange(1, depth.max(initial=0) + 1))
+            self._levels = np.split(order, bounds)
+        return self._levels
+
+    def set_local(self, nodes, matrices):
+        """Новые локальные матрицы; мировые пересчитает update()."""
+        self.local[nodes] = matrices
+        self.dirty[nodes] = True
+
+    def update(self):
+        """Мировые матрицы сдвинутых поддеревьев; возвращает номера пересчитанных узлов."""
+        dirty = self.dirty[:self.count]
+        if not dirty.any():
+            return np.zeros(0, dtype=np.int64)
+        for level, nodes in enumerate(self.levels):
+            flags = dirty[nodes]
+            if level:
+                flags |= dirty[self.parent[nodes]]
+                dirty[nodes] = flags
+            idx = nodes[flags]
+            if not len(idx):
+                continue
+            if level:
+                self.world[idx] = np.einsum("nij,njk->nik", self.world[self.parent[idx]], self.local[idx])
+            else:
+                self.world[idx] = self.local[idx]
+        changed = np.flatnonzero(dirty)
+        self.world32[changed] = self.world[changed]
+        dirty[:] = False
+        return changed